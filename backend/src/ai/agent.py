@@ -21,6 +21,8 @@ from typing import Optional, Dict, List, Any
 from groq import Groq
 from dotenv import load_dotenv
 
+from src.engine.swap_quote import ROUTER_TOKEN, SwapAbort, get_price_impact, to_base_units
+
 load_dotenv()
 
 # Initialize Groq client
@@ -54,6 +56,19 @@ def build_system_prompt(context: Dict[str, Any]) -> str:
     
     price_info = "\n".join(price_lines) if price_lines else "  (Loading prices...)"
     
+    # Format screener rankings
+    screener_lines = []
+    for row in context.get("screener", []):
+        changes = row.get("price_changes", {})
+        rsi = row.get("rsi_14")
+        screener_lines.append(
+            f"  {row['symbol']}: score {row['score']} ({row['action']}), "
+            f"24h {changes.get('24h') or 0:+.2f}%, 7d {changes.get('7d') or 0:+.2f}%, "
+            f"trend {row.get('trend_7d')}" + (f", RSI {rsi:.0f}" if rsi is not None else "")
+        )
+    
+    screener_info = "\n".join(screener_lines) if screener_lines else "  (Screener warming up...)"
+    
     # Format wallet info
     wallet_info = "Not connected"
     if wallet.get("connected"):
@@ -78,6 +93,14 @@ CRITICAL REQUIREMENTS FOR ALL RESPONSES:
 ═══════════════════════════════════════════════════════════════
 {wallet_info}
 
+═══════════════════════════════════════════════════════════════
+              MARKET SCREENER (top ranked signals)
+═══════════════════════════════════════════════════════════════
+{screener_info}
+
+Scores are rule-based (momentum, volume, ATH distance, trend, RSI) on a
+0-100 scale. Cite them as signals, never as guarantees.
+
 ═══════════════════════════════════════════════════════════════
                     RESPONSE PROTOCOL
 ═══════════════════════════════════════════════════════════════
@@ -125,7 +148,8 @@ async def process_message(
     wallet: Optional[Dict] = None,
     pending_orders: Optional[List] = None,
     alerts: Optional[List] = None,
-    conversation_history: Optional[List] = None
+    conversation_history: Optional[List] = None,
+    screener: Optional[List] = None
 ) -> Dict[str, Any]:
     """Process a user message and return AI response."""
     
@@ -133,7 +157,8 @@ async def process_message(
         "prices": prices,
         "wallet": wallet or {"connected": False},
         "pending_orders": pending_orders or [],
-        "alerts": alerts or []
+        "alerts": alerts or [],
+        "screener": screener or []
     }
     
     system_prompt = build_system_prompt(context)
@@ -149,7 +174,7 @@ async def process_message(
     messages.append({"role": "user", "content": user_message})
     
     if not client:
-        return await fallback_response(user_message, prices)
+        return await fallback_response(user_message, prices, screener)
     
     try:
         response = client.chat.completions.create(
@@ -178,7 +203,7 @@ async def process_message(
         }
     except Exception as e:
         print(f"AI Agent error: {e}")
-        return await fallback_response(user_message, prices)
+        return await fallback_response(user_message, prices, screener)
 
 
 def remove_emojis_from_response(response: Dict) -> Dict:
@@ -245,6 +270,26 @@ def validate_response(response: Dict, prices: Dict) -> Dict:
         action["risk_level"] = "high" if amount > 5000 else "medium"
     
     token = action.get("token_to") or action.get("token_from") or ""
+    traded = {(action.get("token_to") or "").upper(), (action.get("token_from") or "").upper()}
+    apt_price = prices.get(ROUTER_TOKEN, 0)
+    if isinstance(apt_price, dict):
+        apt_price = apt_price.get("price", 0)
+    if amount > 0 and apt_price and ROUTER_TOKEN in traded:
+        # Swap router price impact (it only models APT/USDC); amounts past
+        # its u64 range get no estimate
+        quantity = amount / apt_price
+        try:
+            impact_bps = get_price_impact(to_base_units(quantity))
+        except SwapAbort:
+            impact_bps = None
+        if impact_bps is not None:
+            action["price_impact_bps"] = impact_bps
+            if impact_bps >= 50:
+                response.setdefault("warnings", []).append(
+                    f"Estimated price impact: {impact_bps / 100:.2f}% on {quantity:,.2f} {ROUTER_TOKEN}"
+                )
+                action["requires_confirmation"] = True
+    
     memecoins = ["PEPE", "SHIB", "DOGE", "BONK", "WIF", "FLOKI"]
     if token.upper() in memecoins:
         if "warnings" not in response:
@@ -255,7 +300,7 @@ def validate_response(response: Dict, prices: Dict) -> Dict:
     return response
 
 
-async def fallback_response(user_message: str, prices: Dict) -> Dict:
+async def fallback_response(user_message: str, prices: Dict, screener: Optional[List] = None) -> Dict:
     """Fallback response when AI service is unavailable."""
     message_lower = user_message.lower()
     
@@ -288,6 +333,26 @@ async def fallback_response(user_message: str, prices: Dict) -> Dict:
     amounts = re.findall(r'\$\s*(\d+(?:,\d{3})*(?:\.\d+)?)', user_message)
     amounts = [float(a.replace(",", "")) for a in amounts]
     
+    # SCREENER
+    if any(word in message_lower for word in ["screener", "top picks", "opportunit", "signals", "what should i buy"]):
+        if not screener:
+            return {
+                "message": "**Market Screener**\n\nThe screener is still scoring the market. Please try again shortly.",
+                "intent": "analysis",
+                "action": {"type": "none", "requires_confirmation": False}
+            }
+        rows = "\n".join(
+            f"- **{row['symbol']}**: score {row['score']} ({row['action'].replace('_', ' ')}), "
+            f"24h {row['price_changes'].get('24h') or 0:+.2f}%"
+            for row in screener
+        )
+        return {
+            "message": f"**Market Screener - Top Ranked**\n\n{rows}\n\nScores are rule-based signals, not financial advice.",
+            "intent": "analysis",
+            "action": {"type": "none", "requires_confirmation": False},
+            "suggestions": [f"Buy $100 of {screener[0]['symbol']}", "Set price alert"]
+        }
+    
     # PRICE CHECK
     if any(word in message_lower for word in ["price", "how much", "what's", "cost", "worth"]):
         if detected_token:
@@ -0,0 +1,187 @@
+"""
+Stale-While-Revalidate Cache
+============================
+In-memory async cache for slow-moving upstream data (market info, charts).
+
+Each entry has two ages:
+- soft TTL: after this, the cached value is still served but a background
+  refresh is started
+- hard TTL: after this, the value is no longer served and callers wait
+  for a fresh load
+
+Concurrent loads of the same key share one upstream request. Keys that are
+read often ("popular") are refreshed by a background task before their soft
+TTL runs out, so they are almost never served stale.
+
+Usage:
+    cache = SWRCache("token_info", loader=fetch_info, soft_ttl=60, hard_ttl=600)
+    info = await cache.get("APT")
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its load time and read count."""
+    value: Any
+    loaded_at: float
+    hits: int = 0
+
+
+class SWRCache:
+    """
+    Async stale-while-revalidate cache with single-flight loading.
+
+    Args:
+        name: Name used in logs and stats
+        loader: Coroutine function loading a value for a key (None = not found)
+        soft_ttl: Seconds after which values are refreshed in the background
+        hard_ttl: Seconds after which values are no longer served
+        max_entries: Maximum number of cached keys (least recently used evicted)
+        popular_hits: Reads per soft TTL window that mark a key as popular
+        refresh_ahead: Fraction of soft_ttl at which popular keys are refreshed
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[Hashable], Awaitable[Optional[Any]]],
+        soft_ttl: float,
+        hard_ttl: float,
+        max_entries: int = 1000,
+        popular_hits: int = 3,
+        refresh_ahead: float = 0.8,
+    ):
+        self.name = name
+        self._loader = loader
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.max_entries = max_entries
+        self.popular_hits = popular_hits
+        self.refresh_ahead = refresh_ahead
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "loads": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a servable cached value without loading or counting a read."""
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry.loaded_at <= self.hard_ttl:
+            return entry.value
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value as freshly loaded."""
+        self._entries[key] = CacheEntry(value=value, loaded_at=time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop a cached value."""
+        self._entries.pop(key, None)
+
+    async def _load(self, key: Hashable) -> Optional[Any]:
+        """Load a key from upstream and store the result."""
+        self._stats["loads"] += 1
+        try:
+            value = await self._loader(key)
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Cache '{self.name}' load error for {key}: {e}")
+            return None
+
+        if value is not None:
+            # Preserve the read count so popularity survives a refresh
+            previous = self._entries.get(key)
+            self.set(key, value)
+            if previous:
+                self._entries[key].hits = previous.hits
+        return value
+
+    def _start_load(self, key: Hashable) -> asyncio.Task:
+        """Start (or join) a single-flight load for a key."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        return task
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a value, serving stale data while revalidating in the background.
+
+        Returns:
+            Cached or freshly loaded value, or None if the loader found nothing
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.loaded_at
+            if age <= self.hard_ttl:
+                entry.hits += 1
+                self._entries.move_to_end(key)
+                if age <= self.soft_ttl:
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["stale_hits"] += 1
+                    self._start_load(key)
+                return entry.value
+
+        self._stats["misses"] += 1
+        # Shield so one cancelled caller doesn't cancel the shared load
+        return await asyncio.shield(self._start_load(key))
+
+    async def _refresh_popular(self):
+        """Refresh popular keys that are close to their soft TTL."""
+        threshold = self.soft_ttl * self.refresh_ahead
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if entry.hits >= self.popular_hits and now - entry.loaded_at >= threshold:
+                entry.hits = 0
+                self._start_load(key)
+
+    async def _refresh_loop(self):
+        """Background loop keeping popular keys fresh."""
+        interval = max(self.soft_ttl * (1 - self.refresh_ahead), 1.0)
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                await self._refresh_popular()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Cache '{self.name}' refresh error: {e}")
+
+    def start_refresher(self) -> bool:
+        """Start the background refresh task for popular keys."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+            return True
+        return False
+
+    def stop_refresher(self) -> bool:
+        """Stop the background refresh task."""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            self._refresh_task = None
+            return True
+        return False
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and size."""
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            **self._stats,
+        }
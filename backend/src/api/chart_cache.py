@@ -0,0 +1,254 @@
+"""
+Chart Series Cache
+==================
+Caches raw chart series keyed by (symbol, days) so repeated /chart requests
+don't hit CoinGecko /market_chart.
+
+- TTL follows the range's granularity: 1d data (5-minute points) refreshes
+  every minute, 365d data (daily points) every hour.
+- Series are kept as NumPy arrays and persisted to disk (one .npz file per
+  key), so a restart serves warm charts immediately.
+- Concurrent requests for the same key share a single upstream fetch.
+- If a refresh fails, the previous series is served rather than nothing.
+- At most CHART_CACHE_MAX_SERIES series are kept; the least recently used
+  one is evicted from memory and disk.
+
+Usage:
+    cache = ChartCache(loader=fetch_series)
+    series = await cache.get("BTC", 7)
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# Directory for persisted series
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", "data/chart_cache")
+
+# Series kept in memory and on disk (least recently used evicted)
+CHART_CACHE_MAX_SERIES = int(os.getenv("CHART_CACHE_MAX_SERIES", "500"))
+
+# Refresh interval (seconds) per chart range in days
+RANGE_TTLS = {
+    1: 60,
+    7: 300,
+    30: 900,
+    90: 1800,
+    365: 3600,
+}
+
+
+def ttl_for_range(days: int) -> float:
+    """Get the cache TTL for a chart range (nearest configured range at or below)."""
+    eligible = [d for d in RANGE_TTLS if d <= days]
+    return RANGE_TTLS[max(eligible)] if eligible else RANGE_TTLS[min(RANGE_TTLS)]
+
+
+@dataclass
+class ChartSeries:
+    """Raw chart series for one (symbol, days) range."""
+    symbol: str
+    days: int
+    timestamps: np.ndarray  # int64, milliseconds since epoch
+    prices: np.ndarray      # float64, USD
+    volumes: np.ndarray     # float64, USD (aligned with timestamps)
+    fetched_at: float       # unix seconds
+    # Values derived from this exact series (downsampled copies, indicators).
+    # Not persisted; dropped with the series when it is refreshed.
+    derived: Dict = field(default_factory=dict, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[-1]) if len(self.timestamps) else None
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+ChartKey = Tuple[str, int]
+ChartLoader = Callable[[str, int, Optional[ChartSeries]], Awaitable[Optional[ChartSeries]]]
+
+
+class ChartCache:
+    """
+    In-memory + on-disk cache of chart series with per-range TTLs.
+
+    Args:
+        loader: Coroutine (symbol, days, previous) -> ChartSeries or None.
+            `previous` is the expired series, if any.
+        directory: Where series are persisted (None disables persistence)
+        max_series: Series kept before the least recently used is evicted
+    """
+
+    def __init__(
+        self,
+        loader: ChartLoader,
+        directory: Optional[str] = CHART_CACHE_DIR,
+        max_series: int = CHART_CACHE_MAX_SERIES,
+    ):
+        self._loader = loader
+        self._directory = directory
+        self._max_series = max_series
+        self._series: "OrderedDict[ChartKey, ChartSeries]" = OrderedDict()
+        self._inflight: Dict[ChartKey, asyncio.Task] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "disk_loads": 0,
+            "loads": 0,
+            "errors": 0,
+            "stale_served": 0,
+            "evictions": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def _path(self, key: ChartKey) -> str:
+        symbol, days = key
+        return os.path.join(self._directory, f"{symbol}_{days}d.npz")
+
+    def _load_disk(self, key: ChartKey) -> Optional[ChartSeries]:
+        """Read a persisted series, or None if absent or unreadable."""
+        if not self._directory:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                series = ChartSeries(
+                    symbol=key[0],
+                    days=key[1],
+                    timestamps=data["timestamps"],
+                    prices=data["prices"],
+                    volumes=data["volumes"],
+                    fetched_at=float(data["fetched_at"]),
+                )
+        except Exception as e:
+            print(f"Chart cache: ignoring unreadable {path}: {e}")
+            return None
+        self._stats["disk_loads"] += 1
+        return series
+
+    def _save_disk(self, series: ChartSeries):
+        """Persist a series atomically."""
+        if not self._directory:
+            return
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            path = self._path((series.symbol, series.days))
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    timestamps=series.timestamps,
+                    prices=series.prices,
+                    volumes=series.volumes,
+                    fetched_at=np.float64(series.fetched_at),
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Chart cache: could not persist {series.symbol} {series.days}d: {e}")
+
+    def _remember(self, key: ChartKey, series: ChartSeries):
+        """Keep a series as most recently used, evicting beyond max_series."""
+        self._series[key] = series
+        self._series.move_to_end(key)
+        while len(self._series) > self._max_series:
+            evicted, _ = self._series.popitem(last=False)
+            self._stats["evictions"] += 1
+            if self._directory:
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    pass
+
+    def peek(self, symbol: str, days: int) -> Optional[ChartSeries]:
+        """Get the cached series regardless of age, without fetching."""
+        key = (symbol.upper(), days)
+        series = self._series.get(key)
+        if series is None:
+            series = self._load_disk(key)
+            if series is not None:
+                self._remember(key, series)
+        else:
+            self._series.move_to_end(key)
+        return series
+
+    def is_fresh(self, series: ChartSeries) -> bool:
+        return series.age() < ttl_for_range(series.days)
+
+    def get_if_fresh(self, symbol: str, days: int) -> Optional[ChartSeries]:
+        """Get the cached series only if it is within its TTL (counts a hit)."""
+        series = self.peek(symbol, days)
+        if series is not None and self.is_fresh(series):
+            self._stats["hits"] += 1
+            return series
+        return None
+
+    def store(self, series: ChartSeries):
+        """Store (and persist) a series."""
+        self._save_disk(series)
+        self._remember((series.symbol, series.days), series)
+
+    async def _load(self, key: ChartKey) -> Optional[ChartSeries]:
+        """Refresh a key through the loader, falling back to the old series."""
+        previous = self.peek(*key)
+        self._stats["loads"] += 1
+        try:
+            series = await self._loader(key[0], key[1], previous)
+        except Exception as e:
+            print(f"Chart cache load error for {key[0]} {key[1]}d: {e}")
+            series = None
+
+        if series is None:
+            self._stats["errors"] += 1
+            if previous is not None:
+                self._stats["stale_served"] += 1
+            return previous
+
+        self.store(series)
+        return series
+
+    async def get(self, symbol: str, days: int) -> Optional[ChartSeries]:
+        """
+        Get a series, fetching it if missing or older than its range's TTL.
+
+        Returns:
+            ChartSeries or None if it could not be loaded
+        """
+        key = (symbol.upper(), days)
+        series = self.peek(*key)
+        if series is not None and self.is_fresh(series):
+            self._stats["hits"] += 1
+            return series
+
+        self._stats["misses"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # Shield so one cancelled request doesn't cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and size."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "name": "chart",
+            "entries": len(self._series),
+            "max_entries": self._max_series,
+            "inflight": len(self._inflight),
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+        }
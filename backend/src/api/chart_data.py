@@ -2,93 +2,457 @@
 Chart Data API
 ==============
 Provides historical price data for charts.
-Uses CoinGecko for historical data (free tier).
+Reads history from the local candle store when it covers the requested
+window, otherwise from CoinGecko (free tier); either way the result is
+cached per (symbol, days) in the chart cache.
+
+Volumes mean the same from both sources: the rolling 24h USD volume at
+each point, as CoinGecko's total_volumes. Per-bar quote volumes from the
+store are summed over the trailing day.
 """
 
+import asyncio
+import os
+import struct
+import time
 import httpx
+import numpy as np
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterable, Tuple
+
+from src.api.chart_cache import ChartCache, ChartSeries
+from src.api.downsample import lttb_indices
+from src.api.indicators import IndicatorSet
+from src.api.kline_backfill import BACKFILL_TOPUP_MINUTES
+from src.api.resilience import upstream_call
+from src.api.token_registry import get_token_registry
+from src.database.candles import INTERVAL_MS, get_candle_store
 
 # CoinGecko API
 COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
 
-# Symbol to CoinGecko ID mapping
-SYMBOL_TO_COINGECKO = {
-    "BTC": "bitcoin",
-    "ETH": "ethereum",
-    "BNB": "binancecoin",
-    "XRP": "ripple",
-    "SOL": "solana",
-    "ADA": "cardano",
-    "DOGE": "dogecoin",
-    "DOT": "polkadot",
-    "AVAX": "avalanche-2",
-    "MATIC": "matic-network",
-    "LTC": "litecoin",
-    "LINK": "chainlink",
-    "UNI": "uniswap",
-    "ATOM": "cosmos",
-    "ETC": "ethereum-classic",
-    "XLM": "stellar",
-    "ALGO": "algorand",
-    "VET": "vechain",
-    "FIL": "filecoin",
-    "AAVE": "aave",
-    "EOS": "eos",
-    "XTZ": "tezos",
-    "THETA": "theta-token",
-    "FTM": "fantom",
-    "HBAR": "hedera-hashgraph",
-    "EGLD": "elrond-erd-2",
-    "FLOW": "flow",
-    "AXS": "axie-infinity",
-    "SAND": "the-sandbox",
-    "MANA": "decentraland",
-    "GRT": "the-graph",
-    "CHZ": "chiliz",
-    "ENJ": "enjincoin",
-    "BAT": "basic-attention-token",
-    "ZEC": "zcash",
-    "DASH": "dash",
-    "NEO": "neo",
-    "WAVES": "waves",
-    "KSM": "kusama",
-    "CAKE": "pancakeswap-token",
-    "CRV": "curve-dao-token",
-    "SNX": "havven",
-    "COMP": "compound-governance-token",
-    "MKR": "maker",
-    "YFI": "yearn-finance",
-    "SUSHI": "sushi",
-    "1INCH": "1inch",
-    "ENS": "ethereum-name-service",
-    "LDO": "lido-dao",
-    "APE": "apecoin",
-    "GMX": "gmx",
-    "RNDR": "render-token",
-    "IMX": "immutable-x",
-    "FET": "fetch-ai",
-    "AGIX": "singularitynet",
-    "OCEAN": "ocean-protocol",
-    "WLD": "worldcoin-wld",
-    "APT": "aptos",
-    "SUI": "sui",
-    "SEI": "sei-network",
-    "ARB": "arbitrum",
-    "OP": "optimism",
-    "NEAR": "near",
-    "INJ": "injective-protocol",
-    "TIA": "celestia",
-    "STX": "blockstack",
-    "MINA": "mina-protocol",
-    "KAVA": "kava",
-    "ROSE": "oasis-network",
-    "PEPE": "pepe",
-    "SHIB": "shiba-inu",
-    "WIF": "dogwifcoin",
-    "BONK": "bonk",
-    "FLOKI": "floki",
-}
+# Maximum concurrent upstream chart requests (CoinGecko free tier is
+# rate limited, so multi-symbol loads must not fan out unbounded)
+CHART_FETCH_CONCURRENCY = int(os.getenv("CHART_FETCH_CONCURRENCY", "4"))
+_fetch_semaphore = asyncio.Semaphore(CHART_FETCH_CONCURRENCY)
+
+# Supported chart ranges (days); anything else falls back to DEFAULT_CHART_DAYS
+CHART_RANGES = (1, 7, 30, 90, 365)
+DEFAULT_CHART_DAYS = 7
+
+
+# Largest max_points a client may request, and downsampled variants
+# memoized per series (oldest dropped first)
+MAX_CHART_POINTS = 5000
+MAX_DOWNSAMPLE_VARIANTS = 8
+
+
+def normalize_days(days: int) -> int:
+    """A supported chart range: `days` itself, or DEFAULT_CHART_DAYS."""
+    return days if days in CHART_RANGES else DEFAULT_CHART_DAYS
+
+
+def _series_from_market_chart(symbol: str, days: int, data: dict) -> ChartSeries:
+    """Convert a /market_chart response into a ChartSeries."""
+    prices = np.asarray(data.get("prices", []), dtype=np.float64).reshape(-1, 2)
+    volumes = np.asarray(data.get("total_volumes", []), dtype=np.float64).reshape(-1, 2)
+    timestamps = prices[:, 0].astype(np.int64)
+    
+    # Volumes normally share the price timestamps; align them if not
+    if len(volumes) == len(prices):
+        volume_values = volumes[:, 1]
+    elif len(volumes):
+        volume_values = np.interp(prices[:, 0], volumes[:, 0], volumes[:, 1])
+    else:
+        volume_values = np.zeros(len(prices))
+    
+    return ChartSeries(
+        symbol=symbol,
+        days=days,
+        timestamps=timestamps,
+        prices=prices[:, 1].copy(),
+        volumes=volume_values.astype(np.float64),
+        fetched_at=time.time(),
+    )
+
+
+def candle_interval(days: int) -> str:
+    """Candle store interval matching the CoinGecko granularity for a range."""
+    if days <= 1:
+        return "5m"
+    if days <= 90:
+        return "1h"
+    return "1d"
+
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def rolling_day_volume(timestamps: np.ndarray, volumes: np.ndarray, step: int, head: int = 0) -> np.ndarray:
+    """
+    Rolling 24h volume from per-bar volumes: at each bar, the sum over the
+    bars that close within the day ending at its close.
+    
+    Args:
+        timestamps: Bar open times (ms), ascending
+        volumes: Volume per bar
+        step: Bar interval (ms)
+        head: Leading bars that only serve as lookback (dropped from the result)
+    
+    Returns:
+        Rolling volumes for the bars after `head`. Bars with less than a
+        day of lookback are scaled up from the span they have.
+    """
+    closes = timestamps + step
+    cum = np.concatenate(([0.0], np.cumsum(volumes)))
+    lo = np.searchsorted(timestamps, closes - DAY_MS, side="left")
+    totals = cum[1:] - cum[lo]
+    covered = closes - np.maximum(timestamps[0], closes - DAY_MS)
+    return (totals * (DAY_MS / covered))[head:]
+
+
+def store_max_age_ms(interval: str) -> int:
+    """
+    Oldest latest-bar the store may have and still serve a chart: two
+    bars, plus the top-up interval (bars only arrive with top-ups, so a
+    tighter limit would flip charts between the store and CoinGecko).
+    """
+    return int(BACKFILL_TOPUP_MINUTES * 60 * 1000) + 2 * INTERVAL_MS[interval]
+
+
+def _series_from_store(symbol: str, days: int) -> Optional[ChartSeries]:
+    """
+    Build a series from stored candles (close prices, rolling 24h volume),
+    or None if the store doesn't cover the whole window.
+    """
+    interval = candle_interval(days)
+    step = INTERVAL_MS[interval]
+    window_ms = days * DAY_MS
+    try:
+        store = get_candle_store()
+        candles = store.read_window(symbol, interval, window_ms, max_age_ms=store_max_age_ms(interval))
+        if candles is None or len(candles) < 2:
+            return None
+        # The day before the window, for the first points' rolling volume
+        lookback = store.read_range(
+            symbol, interval, int(candles.timestamps[0]) - DAY_MS, int(candles.timestamps[0]) - 1
+        )
+    except Exception as e:
+        print(f"Candle store read error for {symbol}: {e}")
+        return None
+    
+    volumes = rolling_day_volume(
+        np.concatenate([lookback.timestamps, candles.timestamps]),
+        np.concatenate([lookback.volume, candles.volume]),
+        step,
+        head=len(lookback),
+    )
+    
+    _fetch_stats["store_reads"] += 1
+    return ChartSeries(
+        symbol=symbol,
+        days=days,
+        timestamps=candles.timestamps,
+        prices=candles.close,
+        volumes=volumes,
+        fetched_at=time.time(),
+    )
+
+
+def granularity_ms(days: int) -> int:
+    """Point spacing CoinGecko uses for a /market_chart range."""
+    if days <= 1:
+        return 5 * 60 * 1000      # 5-minute points
+    if days <= 90:
+        return 60 * 60 * 1000     # hourly points
+    return 24 * 60 * 60 * 1000    # daily points
+
+
+def stitch_series(previous: ChartSeries, tail: ChartSeries, now_ms: int) -> ChartSeries:
+    """
+    Append newly fetched tail points to a cached series.
+    
+    The tail usually has finer granularity than the series (a short
+    /market_chart/range request returns 5-minute points). Everything after
+    the series' last settled point is re-bucketed to the series' own
+    granularity, keeping the newest point in each bucket, so the final
+    point is always the latest price. The head is then trimmed to the
+    requested window.
+    """
+    step = granularity_ms(previous.days)
+    
+    # Replace the overlapping part of the old series with the tail
+    if len(tail):
+        keep = previous.timestamps < tail.timestamps[0]
+    else:
+        keep = np.ones(len(previous), dtype=bool)
+    timestamps = np.concatenate([previous.timestamps[keep], tail.timestamps])
+    prices = np.concatenate([previous.prices[keep], tail.prices])
+    volumes = np.concatenate([previous.volumes[keep], tail.volumes])
+    
+    # The old last point was a live (partial-interval) point; everything
+    # after the one before it is re-bucketed at the series granularity
+    settled = previous.timestamps[-2] if len(previous) >= 2 else timestamps[0]
+    fresh = timestamps > settled
+    buckets = (timestamps[fresh] - settled - 1) // step
+    last_in_bucket = np.append(buckets[1:] != buckets[:-1], True) if len(buckets) else buckets.astype(bool)
+    
+    select = ~fresh
+    select[np.flatnonzero(fresh)[last_in_bucket]] = True
+    
+    # Trim the head to the requested window
+    select &= timestamps >= now_ms - previous.days * 24 * 60 * 60 * 1000
+    
+    return ChartSeries(
+        symbol=previous.symbol,
+        days=previous.days,
+        timestamps=timestamps[select],
+        prices=prices[select],
+        volumes=volumes[select],
+        fetched_at=time.time(),
+    )
+
+
+# Counters for full vs. incremental upstream fetches
+_fetch_stats = {"store_reads": 0, "full_fetches": 0, "incremental_fetches": 0, "upstream_points": 0}
+
+
+async def _fetch_market_chart(symbol: str, url: str, params: dict) -> dict:
+    """
+    GET a CoinGecko market chart endpoint through the circuit breaker,
+    at most CHART_FETCH_CONCURRENCY at a time.
+    """
+    async with _fetch_semaphore, upstream_call("coingecko"), httpx.AsyncClient(timeout=15.0) as client:
+        response = await client.get(url, params=params)
+        
+        if response.status_code != 200:
+            print(f"CoinGecko error for {symbol}: {response.status_code}")
+            response.raise_for_status()
+        
+        return response.json()
+
+
+async def _fetch_chart_series(
+    symbol: str,
+    days: int,
+    previous: Optional[ChartSeries] = None
+) -> Optional[ChartSeries]:
+    """
+    Load a chart series from the candle store, or fetch it from CoinGecko.
+    
+    The store is used whenever it covers the whole window and was topped
+    up recently (store_max_age_ms). With a previous (expired) series that still overlaps the window, only
+    the points after its last timestamp are fetched from
+    /market_chart/range and stitched on. Otherwise the whole range is
+    fetched from /market_chart.
+    """
+    coingecko_id = get_token_registry().coingecko_id(symbol)
+    
+    if not coingecko_id:
+        return None
+    
+    stored = _series_from_store(symbol, days)
+    if stored is not None:
+        return stored
+    
+    now_ms = int(time.time() * 1000)
+    window_ms = days * 24 * 60 * 60 * 1000
+    
+    if previous is not None and len(previous) >= 2 and now_ms - previous.last_timestamp < window_ms:
+        data = await _fetch_market_chart(
+            symbol,
+            f"{COINGECKO_BASE_URL}/coins/{coingecko_id}/market_chart/range",
+            {
+                "vs_currency": "usd",
+                "from": str(previous.last_timestamp // 1000),
+                "to": str(now_ms // 1000),
+            },
+        )
+        tail = _series_from_market_chart(symbol, days, data)
+        _fetch_stats["incremental_fetches"] += 1
+        _fetch_stats["upstream_points"] += len(tail)
+        return stitch_series(previous, tail, now_ms)
+    
+    data = await _fetch_market_chart(
+        symbol,
+        f"{COINGECKO_BASE_URL}/coins/{coingecko_id}/market_chart",
+        {
+            "vs_currency": "usd",
+            "days": str(days),
+        },
+    )
+    series = _series_from_market_chart(symbol, days, data)
+    _fetch_stats["full_fetches"] += 1
+    _fetch_stats["upstream_points"] += len(series)
+    return series
+
+
+def get_chart_fetch_stats() -> dict:
+    """Get counters of candle store reads vs. full/incremental upstream fetches."""
+    return dict(_fetch_stats)
+
+
+# Shared cache of raw chart series keyed by (symbol, days)
+chart_cache = ChartCache(loader=_fetch_chart_series)
+
+
+def _chart_stats(series: ChartSeries) -> Optional[Dict[str, Any]]:
+    """Calculate summary price statistics for a series."""
+    if not len(series):
+        return None
+    
+    current_price = float(series.prices[-1])
+    start_price = float(series.prices[0])
+    price_change = current_price - start_price
+    price_change_percent = (price_change / start_price) * 100 if start_price else 0
+    
+    return {
+        "current": current_price,
+        "open": start_price,
+        "high": float(series.prices.max()),
+        "low": float(series.prices.min()),
+        "change": price_change,
+        "change_percent": round(price_change_percent, 2),
+        "period": f"{series.days}d"
+    }
+
+
+def format_chart_data(series: ChartSeries) -> Dict[str, Any]:
+    """Format a cached series as the /chart/{token} response body."""
+    timestamps = series.timestamps.tolist()
+    
+    # Convert to chart-friendly format
+    formatted_prices = [
+        {"time": t, "value": p} for t, p in zip(timestamps, series.prices.tolist())
+    ]
+    formatted_volumes = [
+        {"time": t, "value": v} for t, v in zip(timestamps, series.volumes.tolist())
+    ]
+    
+    return {
+        "symbol": series.symbol,
+        "prices": formatted_prices,
+        "volumes": formatted_volumes,
+        "stats": _chart_stats(series),
+        "days": series.days,
+        "data_points": len(formatted_prices),
+        "last_updated": datetime.utcfromtimestamp(series.fetched_at).isoformat()
+    }
+
+
+def format_chart_columnar(series: ChartSeries, delta: bool = False) -> Dict[str, Any]:
+    """
+    Format a series as parallel arrays instead of one dict per point.
+    
+    With delta=True, timestamps are delta-encoded: the first value is
+    absolute and each following value is the gap to the previous one.
+    Decode with a running sum. Prices and volumes are always absolute.
+    """
+    timestamps = series.timestamps
+    if delta and len(timestamps):
+        timestamps = np.diff(timestamps, prepend=0)
+    
+    return {
+        "symbol": series.symbol,
+        "format": "columnar",
+        "timestamp_encoding": "delta" if delta else "absolute",
+        "timestamps": timestamps.tolist(),
+        "prices": series.prices.tolist(),
+        "volumes": series.volumes.tolist(),
+        "stats": _chart_stats(series),
+        "days": series.days,
+        "data_points": len(series),
+        "last_updated": datetime.utcfromtimestamp(series.fetched_at).isoformat()
+    }
+
+
+# Binary chart payload, negotiated with "Accept: application/vnd.tradeapt.chart"
+CHART_BINARY_MEDIA_TYPE = "application/vnd.tradeapt.chart"
+_BINARY_HEADER = struct.Struct("<4sHHI")
+_BINARY_MAGIC = b"TCH1"
+
+
+def encode_chart_binary(series: ChartSeries) -> bytes:
+    """
+    Encode a series as a little-endian binary payload.
+    
+    Layout:
+        header:     magic "TCH1" | days u16 | reserved u16 | count u32
+        timestamps: count x int64 (ms since epoch)
+        prices:     count x float64
+        volumes:    count x float64
+    """
+    header = _BINARY_HEADER.pack(_BINARY_MAGIC, series.days, 0, len(series))
+    return b"".join([
+        header,
+        series.timestamps.astype("<i8", copy=False).tobytes(),
+        series.prices.astype("<f8", copy=False).tobytes(),
+        series.volumes.astype("<f8", copy=False).tobytes(),
+    ])
+
+
+async def get_chart_series(symbol: str, days: int = 7) -> Optional[ChartSeries]:
+    """
+    Get the raw cached series for (symbol, days).
+    CoinGecko is only called when the cached series is older than its
+    range's TTL. Unsupported ranges fall back to DEFAULT_CHART_DAYS.
+    """
+    if not get_token_registry().coingecko_id(symbol):
+        return None
+    
+    return await chart_cache.get(symbol, normalize_days(days))
+
+
+def downsample_series(series: ChartSeries, max_points: Optional[int]) -> ChartSeries:
+    """
+    Downsample a series to at most max_points with LTTB on the prices.
+    The result is memoized on the source series (up to
+    MAX_DOWNSAMPLE_VARIANTS sizes), so each (symbol, range, max_points) is
+    computed once per refresh.
+    """
+    if not max_points or max_points >= len(series):
+        return series
+    
+    key = ("lttb", max_points)
+    cached = series.derived.get(key)
+    if cached is None:
+        variants = [k for k in series.derived if isinstance(k, tuple) and k[0] == "lttb"]
+        for old in variants[:max(0, len(variants) - MAX_DOWNSAMPLE_VARIANTS + 1)]:
+            del series.derived[old]
+            series.derived.pop(("lttb_idx", old[1]), None)
+        idx = lttb_indices(series.timestamps, series.prices, max_points)
+        series.derived[("lttb_idx", max_points)] = idx
+        cached = ChartSeries(
+            symbol=series.symbol,
+            days=series.days,
+            timestamps=series.timestamps[idx],
+            prices=series.prices[idx],
+            volumes=series.volumes[idx],
+            fetched_at=series.fetched_at,
+        )
+        series.derived[key] = cached
+    return cached
+
+
+def get_indicator_set(series: ChartSeries) -> IndicatorSet:
+    """
+    Get the IndicatorSet for a series, kept alongside it in the chart cache
+    so indicators and their shared intermediates are computed once per
+    refresh.
+    """
+    indicators = series.derived.get("indicators")
+    if indicators is None:
+        indicators = IndicatorSet(series.prices)
+        series.derived["indicators"] = indicators
+    return indicators
+
+
+def downsample_indices(series: ChartSeries, max_points: Optional[int]) -> Optional[np.ndarray]:
+    """Indices of the LTTB-downsampled points, or None if not downsampled."""
+    if not max_points or max_points >= len(series):
+        return None
+    downsample_series(series, max_points)
+    return series.derived[("lttb_idx", max_points)]
 
 
 async def get_chart_data(
@@ -107,75 +471,68 @@ async def get_chart_data(
     Returns:
         Dictionary with prices, volumes, market_caps arrays
     """
-    coingecko_id = SYMBOL_TO_COINGECKO.get(symbol.upper())
-    
-    if not coingecko_id:
+    series = await get_chart_series(symbol, days)
+    if series is None:
         return None
     
+    return format_chart_data(series)
+
+
+async def iter_chart_series(
+    symbols: Iterable[str],
+    days: int = 7
+) -> AsyncIterator[Tuple[str, Optional[ChartSeries], bool]]:
+    """
+    Load chart series for several symbols, yielding each as it is ready.
+    
+    Fresh cached series are yielded immediately; only the misses are
+    fetched (concurrently, bounded by CHART_FETCH_CONCURRENCY) and yielded
+    in completion order. Duplicate symbols are yielded once.
+    
+    Yields:
+        (symbol, series or None, served_from_cache)
+    """
+    days = normalize_days(days)
+    registry = get_token_registry()
+    misses = []
+    seen = set()
+    
+    for symbol in symbols:
+        symbol = symbol.upper()
+        if symbol in seen:
+            continue
+        seen.add(symbol)
+        
+        if not registry.coingecko_id(symbol):
+            yield symbol, None, False
+            continue
+        
+        series = chart_cache.get_if_fresh(symbol, days)
+        if series is not None:
+            yield symbol, series, True
+        else:
+            misses.append(symbol)
+    
+    if not misses:
+        return
+    
+    async def load(symbol: str) -> Tuple[str, Optional[ChartSeries]]:
+        try:
+            return symbol, await chart_cache.get(symbol, days)
+        except Exception as e:
+            print(f"Error getting chart for {symbol}: {e}")
+            return symbol, None
+    
+    tasks = [asyncio.create_task(load(symbol)) for symbol in misses]
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            url = f"{COINGECKO_BASE_URL}/coins/{coingecko_id}/market_chart"
-            params = {
-                "vs_currency": "usd",
-                "days": str(days),
-            }
-            
-            response = await client.get(url, params=params)
-            
-            if response.status_code != 200:
-                print(f"CoinGecko error for {symbol}: {response.status_code}")
-                return None
-            
-            data = response.json()
-            
-            # Format the data for frontend charts
-            prices = data.get("prices", [])
-            volumes = data.get("total_volumes", [])
-            market_caps = data.get("market_caps", [])
-            
-            # Convert to chart-friendly format
-            formatted_prices = [
-                {"time": p[0], "value": p[1]} for p in prices
-            ]
-            formatted_volumes = [
-                {"time": v[0], "value": v[1]} for v in volumes
-            ]
-            
-            # Calculate price statistics
-            if prices:
-                price_values = [p[1] for p in prices]
-                current_price = price_values[-1]
-                start_price = price_values[0]
-                high_price = max(price_values)
-                low_price = min(price_values)
-                price_change = current_price - start_price
-                price_change_percent = (price_change / start_price) * 100 if start_price else 0
-                
-                stats = {
-                    "current": current_price,
-                    "open": start_price,
-                    "high": high_price,
-                    "low": low_price,
-                    "change": price_change,
-                    "change_percent": round(price_change_percent, 2),
-                    "period": f"{days}d"
-                }
-            else:
-                stats = None
-            
-            return {
-                "symbol": symbol.upper(),
-                "prices": formatted_prices,
-                "volumes": formatted_volumes,
-                "stats": stats,
-                "days": days,
-                "data_points": len(formatted_prices),
-                "last_updated": datetime.utcnow().isoformat()
-            }
-            
-    except Exception as e:
-        print(f"Error fetching chart data for {symbol}: {e}")
-        return None
+        for next_done in asyncio.as_completed(tasks):
+            symbol, series = await next_done
+            yield symbol, series, False
+    finally:
+        # Consumer went away: stop waiting (shared fetches keep running
+        # and still populate the cache)
+        for task in tasks:
+            task.cancel()
 
 
 async def get_multi_chart_data(
@@ -192,18 +549,10 @@ async def get_multi_chart_data(
     Returns:
         Dictionary mapping symbols to their chart data
     """
-    import asyncio
+    chart_data = {symbol.upper(): None for symbol in symbols}
     
-    tasks = [get_chart_data(s, days) for s in symbols]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    chart_data = {}
-    for symbol, result in zip(symbols, results):
-        if isinstance(result, Exception):
-            print(f"Error getting chart for {symbol}: {result}")
-            chart_data[symbol.upper()] = None
-        else:
-            chart_data[symbol.upper()] = result
+    async for symbol, series, _ in iter_chart_series(symbols, days):
+        chart_data[symbol] = format_chart_data(series) if series is not None else None
     
     return chart_data
 
@@ -218,13 +567,13 @@ async def get_coin_analysis(symbol: str) -> Optional[Dict[str, Any]]:
     - Volume analysis
     - Simple technical indicators
     """
-    coingecko_id = SYMBOL_TO_COINGECKO.get(symbol.upper())
+    coingecko_id = get_token_registry().coingecko_id(symbol)
     
     if not coingecko_id:
         return None
     
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_call("coingecko"), httpx.AsyncClient(timeout=15.0) as client:
             # Get detailed coin data
             url = f"{COINGECKO_BASE_URL}/coins/{coingecko_id}"
             params = {
@@ -237,9 +586,7 @@ async def get_coin_analysis(symbol: str) -> Optional[Dict[str, Any]]:
             }
             
             response = await client.get(url, params=params)
-            
-            if response.status_code != 200:
-                return None
+            response.raise_for_status()
             
             data = response.json()
             market_data = data.get("market_data", {})
@@ -266,8 +613,12 @@ async def get_coin_analysis(symbol: str) -> Optional[Dict[str, Any]]:
             market_cap = market_data.get("market_cap", {}).get("usd", 0)
             volume_to_mcap = (volume_24h / market_cap * 100) if market_cap else 0
             
-            # Simple trend analysis
+            # Simple trend analysis, on stored hourly closes when the
+            # candle store covers the last 7 days
             sparkline = market_data.get("sparkline_7d", {}).get("price", [])
+            stored = _series_from_store(symbol.upper(), 7)
+            if stored is not None:
+                sparkline = stored.prices.tolist()
             trend = "neutral"
             if sparkline and len(sparkline) > 1:
                 recent = sparkline[-24:]  # Last 24 hours
@@ -276,9 +627,17 @@ async def get_coin_analysis(symbol: str) -> Optional[Dict[str, Any]]:
                 elif recent[-1] < recent[0] * 0.98:
                     trend = "bearish"
             
+            # Momentum indicators over the hourly 7d sparkline
+            rsi = None
+            macd_histogram = None
+            if len(sparkline) > 26 + 9:
+                indicators = IndicatorSet(np.asarray(sparkline, dtype=np.float64))
+                rsi = round(float(indicators.rsi(14)[-1]), 2)
+                macd_histogram = float(indicators.macd()[2][-1])
+            
             # Trading suggestion based on simple analysis
             suggestion = generate_trading_suggestion(
-                price_changes, volume_to_mcap, ath_change, trend
+                price_changes, volume_to_mcap, ath_change, trend, rsi
             )
             
             return {
@@ -293,6 +652,8 @@ async def get_coin_analysis(symbol: str) -> Optional[Dict[str, Any]]:
                 "ath_change_percent": round(ath_change, 2),
                 "atl": atl,
                 "trend_7d": trend,
+                "rsi_14": rsi,
+                "macd_histogram": macd_histogram,
                 "sparkline_7d": sparkline[-48:] if sparkline else [],  # Last 2 days
                 "suggestion": suggestion,
                 "last_updated": datetime.utcnow().isoformat()
@@ -307,7 +668,8 @@ def generate_trading_suggestion(
     price_changes: Dict,
     volume_ratio: float,
     ath_change: float,
-    trend: str
+    trend: str,
+    rsi: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Generate a simple trading suggestion based on metrics.
@@ -358,6 +720,15 @@ def generate_trading_suggestion(
         signals.append("📊 Bearish short-term trend")
         score -= 10
     
+    # RSI extremes
+    if rsi is not None:
+        if rsi >= 70:
+            signals.append("🌡️ Overbought (RSI {:.0f})".format(rsi))
+            score -= 5
+        elif rsi <= 30:
+            signals.append("🧊 Oversold (RSI {:.0f})".format(rsi))
+            score += 5
+    
     # Generate action
     if score >= 70:
         action = "consider_buy"
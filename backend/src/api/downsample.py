@@ -0,0 +1,73 @@
+"""
+Chart Downsampling
+==================
+Largest-Triangle-Three-Buckets (LTTB) downsampling over NumPy arrays.
+
+LTTB keeps the first and last points and splits the rest into equal
+buckets. From each bucket it keeps the point forming the largest triangle
+with the previously kept point and the average of the next bucket, which
+preserves peaks, troughs and the overall shape of the line.
+
+Bucket averages are computed for all buckets at once from a cumulative
+sum; the per-bucket selection works on whole bucket slices, so the Python
+loop runs once per output point rather than once per input point.
+
+Usage:
+    idx = lttb_indices(timestamps, prices, 500)
+    small_ts, small_prices = timestamps[idx], prices[idx]
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select the indices of at most `max_points` points using LTTB.
+
+    Args:
+        x: Monotonic x values (e.g. timestamps)
+        y: Values to preserve the shape of (e.g. prices)
+        max_points: Maximum number of points to keep
+
+    Returns:
+        Sorted int array of selected indices (always includes first and last)
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # max_points - 2 buckets over the interior points [1, n - 1)
+    edges = np.floor(np.linspace(1, n - 1, max_points - 1)).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+    sizes = ends - starts
+
+    # Average of every bucket in one pass
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    avg_x = (cum_x[ends] - cum_x[starts]) / sizes
+    avg_y = (cum_y[ends] - cum_y[starts]) / sizes
+
+    # The "next bucket" of the last bucket is the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(len(starts)):
+        start, end = starts[i], ends[i]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs(
+            (ax - next_x[i]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[i] - ay)
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
@@ -0,0 +1,62 @@
+"""
+Conditional GET Helpers
+=======================
+ETags derived from data versions (price snapshot sequence, chart last
+timestamp, registry version) rather than from the response body, so an
+endpoint can answer If-None-Match with 304 before building or
+serializing anything.
+
+Usage:
+    etag = make_etag("prices", service.snapshot_seq, weak=True)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+"""
+
+from typing import Optional
+
+from fastapi.responses import Response
+
+# Clients may reuse a cached body but must revalidate it first
+REVALIDATE = "no-cache"
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """
+    Build an ETag from version parts, e.g. make_etag("chart", "BTC", 7, ts).
+    Weak ETags mark bodies that are equivalent but not byte-identical
+    (e.g. they carry a generation timestamp).
+    """
+    tag = '"' + "-".join(str(part) for part in parts) + '"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str, vary: Optional[str] = None) -> Response:
+    """Empty 304 response carrying the current ETag."""
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+def set_etag(response: Response, etag: str, vary: Optional[str] = None):
+    """Attach ETag (and revalidation) headers to a full response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    if vary:
+        response.headers["Vary"] = vary
@@ -0,0 +1,270 @@
+"""
+Technical Indicators
+====================
+Vectorized technical indicators over whole price arrays.
+
+Supported: SMA, EMA, RSI, MACD, Bollinger Bands, ATR.
+
+An IndicatorSet wraps one price series and memoizes every intermediate it
+computes (price differences, EMAs, SMAs, rolling deviations), so asking
+for MACD and EMA(12), or Bollinger Bands and SMA(20), computes the shared
+pieces once. The memo is a small LRU (MEMO_MAX_ENTRIES), since specs can
+name arbitrary parameters. Chart code keeps one IndicatorSet per cached
+series.
+
+Exponential averages follow the recursive (non-adjusted) definition
+    y[0] = x[0],  y[t] = (1 - a) * y[t-1] + a * x[t]
+evaluated in closed form over blocks of the array, so there is no Python
+loop per point. RSI and ATR use Wilder smoothing (a = 1 / period).
+Values before an indicator's warm-up period are NaN.
+
+Usage:
+    ind = IndicatorSet(prices)
+    rsi = ind.rsi(14)
+    macd, signal, histogram = ind.macd()
+"""
+
+import math
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+# Largest growth factor allowed inside one closed-form EMA block
+_EWM_MAX_SCALE = 1e15
+
+# Memoized results kept per IndicatorSet (least recently used evicted)
+MEMO_MAX_ENTRIES = 32
+
+# Indicators accepted in one spec
+MAX_INDICATORS = 16
+
+
+def ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Exponentially weighted moving average, seeded with the first value.
+
+    Within a block of length L following a carried value c:
+        y[k] = b^(k+1) * (c + sum_{j<=k} a * x[j] * b^-(j+1)),  b = 1 - a
+    The block length keeps b^-L below _EWM_MAX_SCALE, so the scaled sum
+    neither overflows nor loses precision.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    beta = 1.0 - alpha
+    if beta <= 0.0:
+        return x.copy()
+    block = max(1, min(n, int(math.log(_EWM_MAX_SCALE) / -math.log(beta))))
+
+    powers = beta ** np.arange(1, block + 1)   # b^(k+1)
+    inv_powers = 1.0 / powers                  # b^-(k+1)
+
+    carry = x[0]
+    out[0] = carry
+    for start in range(1, n, block):
+        chunk = x[start:start + block]
+        size = len(chunk)
+        scaled = np.cumsum(alpha * chunk * inv_powers[:size])
+        out[start:start + size] = powers[:size] * (carry + scaled)
+        carry = out[start + size - 1]
+    return out
+
+
+def _rolling_sum(x: np.ndarray, period: int) -> np.ndarray:
+    """Sum over a trailing window; NaN until the window is full."""
+    out = np.full(len(x), np.nan)
+    if period <= len(x):
+        cum = np.cumsum(np.concatenate(([0.0], x)))
+        out[period - 1:] = cum[period:] - cum[:-period]
+    return out
+
+
+class IndicatorSet:
+    """
+    Indicators over one series with shared intermediates memoized.
+
+    Args:
+        close: Closing prices
+        high: Optional highs (for ATR); defaults to close
+        low: Optional lows (for ATR); defaults to close
+    """
+
+    def __init__(
+        self,
+        close: np.ndarray,
+        high: Optional[np.ndarray] = None,
+        low: Optional[np.ndarray] = None,
+    ):
+        self.close = np.asarray(close, dtype=np.float64)
+        self.high = self.close if high is None else np.asarray(high, dtype=np.float64)
+        self.low = self.close if low is None else np.asarray(low, dtype=np.float64)
+        self._memo: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def _cached(self, key: Hashable, compute: Callable[[], object]):
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        value = compute()
+        self._memo[key] = value
+        while len(self._memo) > MEMO_MAX_ENTRIES:
+            self._memo.popitem(last=False)
+        return value
+
+    def _diff(self) -> np.ndarray:
+        """Close-to-close change, with 0 for the first point."""
+        return self._cached("diff", lambda: np.diff(self.close, prepend=self.close[:1]))
+
+    def _centered(self) -> np.ndarray:
+        """Close minus its mean, for numerically stable rolling variance."""
+        return self._cached("centered", lambda: self.close - self.close.mean())
+
+    def _ewm_close(self, period: int) -> np.ndarray:
+        """Unmasked EMA of close, shared by EMA and MACD."""
+        return self._cached(("ewm", period), lambda: ewm(self.close, 2.0 / (period + 1)))
+
+    def sma(self, period: int = 20) -> np.ndarray:
+        """Simple moving average."""
+        return self._cached(("sma", period), lambda: _rolling_sum(self.close, period) / period)
+
+    def ema(self, period: int = 20) -> np.ndarray:
+        """Exponential moving average (a = 2 / (period + 1))."""
+        def compute():
+            out = self._ewm_close(period).copy()
+            out[:period - 1] = np.nan
+            return out
+        return self._cached(("ema", period), compute)
+
+    def rsi(self, period: int = 14) -> np.ndarray:
+        """Relative Strength Index (Wilder), 0-100."""
+        def compute():
+            diff = self._diff()
+            avg_gain = ewm(np.maximum(diff, 0.0), 1.0 / period)
+            avg_loss = ewm(np.maximum(-diff, 0.0), 1.0 / period)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            out[avg_loss == 0] = 100.0
+            out[(avg_loss == 0) & (avg_gain == 0)] = 50.0
+            out[:period] = np.nan
+            return out
+        return self._cached(("rsi", period), compute)
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """MACD line, signal line and histogram."""
+        def compute():
+            line = self._ewm_close(fast) - self._ewm_close(slow)
+            signal_line = ewm(line, 2.0 / (signal + 1))
+            warmup = slow + signal - 2
+            line[:slow - 1] = np.nan
+            signal_line[:warmup] = np.nan
+            return line, signal_line, line - signal_line
+        return self._cached(("macd", fast, slow, signal), compute)
+
+    def bollinger(self, period: int = 20, width: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Bollinger Bands: (lower, middle, upper), population std."""
+        def compute():
+            middle = self.sma(period)
+            centered = self._centered()
+            mean = _rolling_sum(centered, period) / period
+            mean_sq = _rolling_sum(centered * centered, period) / period
+            std = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+            return middle - width * std, middle, middle + width * std
+        return self._cached(("bollinger", period, width), compute)
+
+    def atr(self, period: int = 14) -> np.ndarray:
+        """
+        Average True Range (Wilder). Without highs/lows the true range is
+        the absolute close-to-close change.
+        """
+        def compute():
+            prev_close = np.concatenate((self.close[:1], self.close[:-1]))
+            true_range = np.maximum.reduce([
+                self.high - self.low,
+                np.abs(self.high - prev_close),
+                np.abs(self.low - prev_close),
+            ])
+            out = ewm(true_range, 1.0 / period)
+            out[:period] = np.nan
+            return out
+        return self._cached(("atr", period), compute)
+
+
+# Indicator name -> (method name, default parameters)
+INDICATORS = {
+    "sma": ("sma", (20,)),
+    "ema": ("ema", (20,)),
+    "rsi": ("rsi", (14,)),
+    "macd": ("macd", (12, 26, 9)),
+    "bbands": ("bollinger", (20, 2.0)),
+    "atr": ("atr", (14,)),
+}
+
+
+def parse_indicator_spec(spec: str) -> list[tuple[str, tuple]]:
+    """
+    Parse a comma-separated indicator list like "sma:50,rsi,macd:12:26:9".
+
+    Raises:
+        ValueError: For unknown indicators, invalid parameters or more than
+            MAX_INDICATORS indicators
+    """
+    parsed = []
+    for item in filter(None, (part.strip() for part in spec.lower().split(","))):
+        if len(parsed) == MAX_INDICATORS:
+            raise ValueError(f"At most {MAX_INDICATORS} indicators per request")
+        name, *raw_params = item.split(":")
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}'. Use: {', '.join(INDICATORS)}")
+        defaults = INDICATORS[name][1]
+        if len(raw_params) > len(defaults):
+            raise ValueError(f"Too many parameters for '{name}'")
+        try:
+            params = tuple(
+                type(default)(raw) for default, raw in zip(defaults, raw_params)
+            ) + defaults[len(raw_params):]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for '{name}': {item}")
+        if not all(math.isfinite(p) and p > 0 for p in params):
+            raise ValueError(f"Parameters for '{name}' must be positive and finite")
+        parsed.append((name, params))
+    return parsed
+
+
+def check_periods(parsed: list[tuple[str, tuple]], length: int):
+    """
+    Check that no period in a parsed spec exceeds the series length (such
+    an indicator would be all warm-up).
+
+    Raises:
+        ValueError: For a period longer than the series
+    """
+    for name, params in parsed:
+        longest = max((p for p in params if isinstance(p, int)), default=0)
+        if longest > length:
+            raise ValueError(
+                f"Period {longest} for '{name}' exceeds the series length ({length} points)"
+            )
+
+
+def compute_indicator(indicators: IndicatorSet, name: str, params: tuple):
+    """Compute one parsed indicator; returns an array or a dict of arrays."""
+    method = getattr(indicators, INDICATORS[name][0])
+    result = method(*params)
+    if name == "macd":
+        line, signal, histogram = result
+        return {"macd": line, "signal": signal, "histogram": histogram}
+    if name == "bbands":
+        lower, middle, upper = result
+        return {"lower": lower, "middle": middle, "upper": upper}
+    return result
+
+
+def indicator_key(name: str, params: tuple) -> str:
+    """Response key for an indicator, e.g. "sma_50" or "macd_12_26_9"."""
+    return "_".join([name, *(f"{p:g}" for p in params)])
@@ -0,0 +1,349 @@
+"""
+Binance Klines Backfill
+=======================
+Fills the local candle store from Binance /api/v3/klines for every
+registry token with a Binance pair, at several intervals.
+
+- One job per (symbol, interval), run with bounded concurrency.
+- Requests are paced by a request-weight budget per minute, and the
+  weight Binance reports (X-MBX-USED-WEIGHT-1M) or a 429/418 Retry-After
+  pauses all jobs.
+- Each page of up to 1000 bars is bulk-inserted together with the job's
+  checkpoint in one transaction, so an interrupted backfill resumes where
+  it stopped.
+- Top-ups are the same run: with checkpoints in place only the new bars
+  are fetched. A scheduler repeats it every BACKFILL_TOPUP_MINUTES and
+  compacts the store once a day.
+
+The base URL is injectable (BINANCE_KLINES_URL or the base_url argument),
+so the pipeline can run against a local stub server:
+
+    python -m src.api.kline_backfill --base-url http://127.0.0.1:9000/api/v3 --symbols BTC,ETH
+
+Usage:
+    backfill = KlineBackfill()
+    summary = await backfill.run()
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from src.api.token_registry import get_token_registry
+from src.database.candles import CandleStore, INTERVAL_MS, get_candle_store
+
+# Binance REST base URL (override to point at a stub server)
+BINANCE_KLINES_URL = os.getenv("BINANCE_KLINES_URL", "https://api.binance.com/api/v3")
+
+# Days of history per interval, e.g. "5m:2,1h:90,1d:365"
+BACKFILL_HISTORY = os.getenv("BACKFILL_HISTORY", "5m:2,1h:90,1d:365")
+
+# Concurrent kline jobs and request weight budget per minute
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+BACKFILL_WEIGHT_PER_MINUTE = int(os.getenv("BACKFILL_WEIGHT_PER_MINUTE", "1200"))
+
+# Scheduled top-ups (charts serve stored bars up to one top-up interval
+# old, so this bounds how far the 1-day chart lags)
+BACKFILL_ENABLED = os.getenv("BACKFILL_ENABLED", "true").lower() == "true"
+BACKFILL_TOPUP_MINUTES = float(os.getenv("BACKFILL_TOPUP_MINUTES", "5"))
+COMPACTION_INTERVAL_HOURS = 24
+
+# Bars per request and its weight (Binance: weight 2 for limit <= 1000)
+KLINES_LIMIT = 1000
+KLINES_WEIGHT = 2
+
+
+def parse_history(spec: str) -> Dict[str, int]:
+    """
+    Parse "5m:2,1h:90" into {interval: days}.
+
+    Raises:
+        ValueError: For unsupported intervals or invalid day counts
+    """
+    history = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        interval, _, days = item.partition(":")
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unsupported interval '{interval}'")
+        history[interval] = int(days)
+        if history[interval] <= 0:
+            raise ValueError(f"Days for '{interval}' must be positive")
+    return history
+
+
+class WeightLimiter:
+    """
+    Sliding one-minute request-weight budget shared by all jobs.
+
+    Args:
+        weight_per_minute: Maximum weight spent in any 60 second window
+    """
+
+    def __init__(self, weight_per_minute: int):
+        self.weight_per_minute = weight_per_minute
+        self._spent: deque = deque()  # (monotonic time, weight)
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _used(self, now: float) -> int:
+        while self._spent and now - self._spent[0][0] >= 60:
+            self._spent.popleft()
+        return sum(weight for _, weight in self._spent)
+
+    async def acquire(self, weight: int):
+        """Wait until `weight` fits in the budget, then spend it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._used(now) + weight <= self.weight_per_minute or not self._spent:
+                    self._spent.append((now, weight))
+                    return
+                await asyncio.sleep(60 - (now - self._spent[0][0]))
+
+    def pause(self, seconds: float):
+        """Stop all requests for a while (rate limited upstream)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, used_weight: Optional[str]):
+        """
+        Check the weight Binance reports for this IP; if it is at our
+        budget (other clients share the IP), wait out the current minute.
+        """
+        if used_weight and used_weight.isdigit() and int(used_weight) >= self.weight_per_minute:
+            self.pause(60 - time.time() % 60)
+
+
+class KlineBackfill:
+    """
+    Backfill / top-up of Binance klines into the candle store.
+
+    Args:
+        base_url: Binance REST base URL (".../api/v3")
+        store: Candle store to fill
+        history: Days of history per interval
+        concurrency: Maximum concurrent jobs
+        weight_per_minute: Request weight budget
+    """
+
+    def __init__(
+        self,
+        base_url: str = BINANCE_KLINES_URL,
+        store: Optional[CandleStore] = None,
+        history: Optional[Dict[str, int]] = None,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        weight_per_minute: int = BACKFILL_WEIGHT_PER_MINUTE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.store = store or get_candle_store()
+        self.history = history if history is not None else parse_history(BACKFILL_HISTORY)
+        self.concurrency = concurrency
+        self.limiter = WeightLimiter(weight_per_minute)
+        self._stats = {"requests": 0, "bars": 0, "rate_limited": 0, "errors": 0}
+
+    async def _fetch_page(
+        self,
+        client: httpx.AsyncClient,
+        pair: str,
+        interval: str,
+        start_ms: int,
+    ) -> Optional[List[list]]:
+        """
+        Fetch one page of klines starting at start_ms.
+
+        Returns:
+            Kline rows, or None if the pair/interval is rejected (4xx)
+        """
+        while True:
+            await self.limiter.acquire(KLINES_WEIGHT)
+            self._stats["requests"] += 1
+            response = await client.get(
+                f"{self.base_url}/klines",
+                params={
+                    "symbol": pair,
+                    "interval": interval,
+                    "startTime": str(start_ms),
+                    "limit": str(KLINES_LIMIT),
+                },
+            )
+            self.limiter.observe(response.headers.get("X-MBX-USED-WEIGHT-1M"))
+
+            if response.status_code in (418, 429):
+                self._stats["rate_limited"] += 1
+                retry_after = response.headers.get("Retry-After", "60")
+                self.limiter.pause(float(retry_after) if retry_after.isdigit() else 60)
+                continue
+            if 400 <= response.status_code < 500:
+                print(f"⚠️ Backfill: {pair} {interval} rejected ({response.status_code})")
+                return None
+            response.raise_for_status()
+            return response.json()
+
+    async def backfill_series(
+        self,
+        client: httpx.AsyncClient,
+        symbol: str,
+        pair: str,
+        interval: str,
+        days: int,
+    ) -> int:
+        """
+        Fetch one (symbol, interval) from its checkpoint (or the start of
+        its history window) up to now.
+
+        Returns:
+            Number of bars written
+        """
+        now_ms = int(time.time() * 1000)
+        start_ms = self.store.get_checkpoint(symbol, interval)
+        if start_ms is None:
+            start_ms = now_ms - days * 24 * 60 * 60 * 1000
+
+        written = 0
+        while start_ms < now_ms:
+            klines = await self._fetch_page(client, pair, interval, start_ms)
+            if not klines:
+                break
+
+            # open time, open, high, low, close, quote (USDT) volume
+            rows = [
+                (int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[7]))
+                for k in klines
+            ]
+            # Resume from the last bar itself: it may still be forming
+            next_ms = rows[-1][0]
+            await asyncio.to_thread(self.store.append, symbol, interval, rows, next_ms)
+            written += len(rows)
+
+            if len(klines) < KLINES_LIMIT or next_ms <= start_ms:
+                break
+            start_ms = next_ms
+
+        self._stats["bars"] += written
+        return written
+
+    async def run(self, symbols: Optional[List[str]] = None) -> dict:
+        """
+        Backfill (or top up) every symbol with a Binance pair at every
+        configured interval.
+
+        Args:
+            symbols: Restrict to these symbols (default: whole registry)
+
+        Returns:
+            Summary with bars written, request counts and duration
+        """
+        pairs = get_token_registry().binance_pairs()
+        if symbols:
+            wanted = {s.upper() for s in symbols}
+            pairs = {s: p for s, p in pairs.items() if s in wanted}
+
+        jobs: List[Tuple[str, str, str, int]] = [
+            (symbol, pair, interval, days)
+            for symbol, pair in sorted(pairs.items())
+            for interval, days in self.history.items()
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+        bars = 0
+
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            async def run_job(job) -> int:
+                symbol, pair, interval, days = job
+                async with semaphore:
+                    try:
+                        return await self.backfill_series(client, symbol, pair, interval, days)
+                    except Exception as e:
+                        self._stats["errors"] += 1
+                        print(f"❌ Backfill error for {symbol} {interval}: {e}")
+                        return 0
+
+            for written in await asyncio.gather(*(run_job(job) for job in jobs)):
+                bars += written
+
+        return {
+            "jobs": len(jobs),
+            "bars_written": bars,
+            "duration_seconds": round(time.monotonic() - started, 2),
+            **self._stats,
+        }
+
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+async def _scheduler_loop():
+    """Top up the candle store periodically and compact it daily."""
+    backfill = KlineBackfill()
+    last_compaction = time.monotonic()
+    while True:
+        try:
+            summary = await backfill.run()
+            print(f"🕯️ Kline top-up: {summary['bars_written']} bars, {summary['requests']} requests")
+
+            if time.monotonic() - last_compaction >= COMPACTION_INTERVAL_HOURS * 3600:
+                stats = await asyncio.to_thread(backfill.store.compact)
+                last_compaction = time.monotonic()
+                print(f"🗜️ Candle store compacted: {stats}")
+
+            await asyncio.sleep(BACKFILL_TOPUP_MINUTES * 60)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            print(f"❌ Kline backfill scheduler error: {e}")
+            await asyncio.sleep(60)
+
+
+def start_backfill_scheduler():
+    """Start scheduled backfill/top-ups (no-op if BACKFILL_ENABLED is false)."""
+    global _scheduler_task
+
+    if not BACKFILL_ENABLED:
+        return False
+    if _scheduler_task is None or _scheduler_task.done():
+        _scheduler_task = asyncio.create_task(_scheduler_loop())
+        return True
+    return False
+
+
+def stop_backfill_scheduler():
+    """Stop scheduled backfill/top-ups."""
+    global _scheduler_task
+
+    if _scheduler_task and not _scheduler_task.done():
+        _scheduler_task.cancel()
+        _scheduler_task = None
+        return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Binance klines into the candle store")
+    parser.add_argument("--base-url", default=BINANCE_KLINES_URL)
+    parser.add_argument("--db", default=None, help="Candle database path")
+    parser.add_argument("--symbols", default="", help="Comma-separated symbols (default: all)")
+    parser.add_argument("--history", default=BACKFILL_HISTORY, help='e.g. "5m:2,1h:90,1d:365"')
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    parser.add_argument("--weight", type=int, default=BACKFILL_WEIGHT_PER_MINUTE)
+    args = parser.parse_args()
+
+    backfill = KlineBackfill(
+        base_url=args.base_url,
+        store=CandleStore(args.db) if args.db else None,
+        history=parse_history(args.history),
+        concurrency=args.concurrency,
+        weight_per_minute=args.weight,
+    )
+    symbols = [s for s in args.symbols.split(",") if s] or None
+    print(asyncio.run(backfill.run(symbols)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,55 +3,33 @@ Price API Module
 ================
 This module fetches real-time cryptocurrency prices from free APIs.
 Primary source: CoinGecko API (free tier, no API key required)
-Fallback: DexScreener API
+Fallback: Binance REST API, sent as a hedged request when CoinGecko is slow
+or its circuit breaker is open
 
 Usage:
     price = await get_token_price("APT")
     prices = await get_multiple_prices(["APT", "BTC", "ETH"])
 """
 
+import os
 import httpx
+from dataclasses import dataclass, asdict
 from typing import Optional, Dict
 
+from src.api.cache import SWRCache
+from src.api.resilience import CircuitOpenError, hedged, hedge_delay, upstream_call
+from src.api.token_registry import get_token_registry
+
 # CoinGecko API base URL (free tier)
 COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
 
-# Token symbol to CoinGecko ID mapping
-# CoinGecko uses specific IDs for each cryptocurrency
-TOKEN_TO_COINGECKO_ID = {
-    "APT": "aptos",
-    "BTC": "bitcoin",
-    "ETH": "ethereum",
-    "SOL": "solana",
-    "USDC": "usd-coin",
-    "USDT": "tether",
-    "BNB": "binancecoin",
-    "XRP": "ripple",
-    "ADA": "cardano",
-    "DOGE": "dogecoin",
-    "AVAX": "avalanche-2",
-    "DOT": "polkadot",
-    "MATIC": "matic-network",
-    "LINK": "chainlink",
-    "UNI": "uniswap",
-    "ATOM": "cosmos",
-    "LTC": "litecoin",
-    "NEAR": "near",
-    "ARB": "arbitrum",
-    "OP": "optimism",
-    "SUI": "sui",
-    "SEI": "sei-network",
-    "INJ": "injective-protocol",
-    "TIA": "celestia",
-    "PEPE": "pepe",
-    "SHIB": "shiba-inu",
-    "WIF": "dogwifcoin",
-    "BONK": "bonk",
-}
-
-# Reverse mapping for lookups
-COINGECKO_ID_TO_TOKEN = {v: k for k, v in TOKEN_TO_COINGECKO_ID.items()}
+# Binance REST API, used as the hedge/backup price source
+BINANCE_REST_URL = "https://api.binance.com/api/v3"
 
+# Token market info cache (seconds): served fresh until the soft TTL,
+# served stale while revalidating until the hard TTL
+TOKEN_INFO_SOFT_TTL = float(os.getenv("TOKEN_INFO_SOFT_TTL", "120"))
+TOKEN_INFO_HARD_TTL = float(os.getenv("TOKEN_INFO_HARD_TTL", "900"))
 
 def get_coingecko_id(token: str) -> Optional[str]:
     """
@@ -63,21 +41,99 @@ def get_coingecko_id(token: str) -> Optional[str]:
     Returns:
         CoinGecko ID or None if not found
     """
-    # Normalize to uppercase
-    token_upper = token.upper()
+    registry = get_token_registry()
     
     # Direct lookup
-    if token_upper in TOKEN_TO_COINGECKO_ID:
-        return TOKEN_TO_COINGECKO_ID[token_upper]
+    coingecko_id = registry.coingecko_id(token)
+    if coingecko_id:
+        return coingecko_id
     
     # Try lowercase as fallback (might be a CoinGecko ID already)
-    token_lower = token.lower()
-    if token_lower in COINGECKO_ID_TO_TOKEN:
-        return token_lower
+    if registry.symbol_for_coingecko(token):
+        return token.lower()
     
     return None
 
 
+async def _fetch_coingecko_prices(symbols: list[str]) -> Optional[Dict[str, float]]:
+    """Fetch USD prices from CoinGecko /simple/price (raises on failure)."""
+    ids = {}
+    for symbol in symbols:
+        cg_id = get_coingecko_id(symbol)
+        if cg_id:
+            ids[symbol] = cg_id
+    
+    if not ids:
+        return None
+    
+    async with upstream_call("coingecko"):
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            url = f"{COINGECKO_BASE_URL}/simple/price"
+            params = {
+                "ids": ",".join(ids.values()),
+                "vs_currencies": "usd"
+            }
+            
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+    
+    return {
+        symbol: float(data[cg_id]["usd"])
+        for symbol, cg_id in ids.items()
+        if cg_id in data and "usd" in data[cg_id]
+    }
+
+
+async def _fetch_binance_prices(symbols: list[str]) -> Optional[Dict[str, float]]:
+    """Fetch USD prices from Binance /ticker/price (raises on failure)."""
+    registry = get_token_registry()
+    pairs = {}
+    for symbol in symbols:
+        pair = registry.binance_pair(symbol)
+        if pair:
+            pairs[pair.upper()] = symbol
+    
+    if not pairs:
+        return None
+    
+    async with upstream_call("binance"):
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(f"{BINANCE_REST_URL}/ticker/price")
+            response.raise_for_status()
+            tickers = response.json()
+    
+    return {
+        pairs[t["symbol"]]: float(t["price"])
+        for t in tickers
+        if t.get("symbol") in pairs
+    }
+
+
+async def _fetch_prices(symbols: list[str]) -> Dict[str, float]:
+    """
+    Fetch prices from CoinGecko, hedged with Binance.
+    
+    If CoinGecko hasn't answered within its p95 latency (or its circuit is
+    open), the same lookup is sent to Binance and the first answer wins.
+    """
+    async def from_source(fetch, source: str):
+        try:
+            return await fetch(symbols)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"Error fetching prices from {source}: {e}")
+            raise
+    
+    result = await hedged(
+        lambda: from_source(_fetch_coingecko_prices, "CoinGecko"),
+        lambda: from_source(_fetch_binance_prices, "Binance"),
+        hedge_delay("coingecko"),
+    )
+    return result or {}
+
+
 async def get_token_price(token: str) -> Optional[float]:
     """
     Fetch real-time price for a single token in USD.
@@ -92,40 +148,18 @@ async def get_token_price(token: str) -> Optional[float]:
         price = await get_token_price("APT")
         # Returns: 8.45
     """
-    coingecko_id = get_coingecko_id(token)
-    
-    if not coingecko_id:
-        print(f"Warning: Unknown token '{token}', cannot fetch price")
-        return None
+    registry = get_token_registry()
     
     # Stablecoins - return 1.0 directly
-    if token.upper() in ["USDC", "USDT"]:
+    if registry.is_stablecoin(token):
         return 1.0
     
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            url = f"{COINGECKO_BASE_URL}/simple/price"
-            params = {
-                "ids": coingecko_id,
-                "vs_currencies": "usd"
-            }
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if coingecko_id in data and "usd" in data[coingecko_id]:
-                return float(data[coingecko_id]["usd"])
-            
-            return None
-            
-    except httpx.HTTPError as e:
-        print(f"HTTP error fetching price for {token}: {e}")
-        return None
-    except Exception as e:
-        print(f"Error fetching price for {token}: {e}")
+    if not get_coingecko_id(token) and not registry.binance_pair(token):
+        print(f"Warning: Unknown token '{token}', cannot fetch price")
         return None
+    
+    prices = await _fetch_prices([token.upper()])
+    return prices.get(token.upper())
 
 
 async def get_multiple_prices(tokens: list[str]) -> Dict[str, Optional[float]]:
@@ -144,70 +178,91 @@ async def get_multiple_prices(tokens: list[str]) -> Dict[str, Optional[float]]:
         # Returns: {"APT": 8.45, "BTC": 43250.00, "ETH": 2280.50}
     """
     result = {}
+    registry = get_token_registry()
     
-    # Handle stablecoins separately
-    stablecoins = {"USDC", "USDT"}
-    for token in tokens:
-        if token.upper() in stablecoins:
-            result[token.upper()] = 1.0
-    
-    # Filter out stablecoins and unknown tokens
+    # Handle stablecoins and unknown tokens without a network call
     tokens_to_fetch = []
-    coingecko_ids = []
-    
     for token in tokens:
         token_upper = token.upper()
-        if token_upper in stablecoins:
-            continue
-        
-        cg_id = get_coingecko_id(token)
-        if cg_id:
+        if registry.is_stablecoin(token):
+            result[token_upper] = 1.0
+        elif get_coingecko_id(token) or registry.binance_pair(token):
             tokens_to_fetch.append(token_upper)
-            coingecko_ids.append(cg_id)
         else:
             result[token_upper] = None
     
-    if not coingecko_ids:
+    if not tokens_to_fetch:
         return result
     
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            url = f"{COINGECKO_BASE_URL}/simple/price"
-            params = {
-                "ids": ",".join(coingecko_ids),
-                "vs_currencies": "usd"
-            }
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Map prices back to token symbols
-            for token, cg_id in zip(tokens_to_fetch, coingecko_ids):
-                if cg_id in data and "usd" in data[cg_id]:
-                    result[token] = float(data[cg_id]["usd"])
-                else:
-                    result[token] = None
-            
-            return result
-            
-    except httpx.HTTPError as e:
-        print(f"HTTP error fetching multiple prices: {e}")
-        # Return None for all tokens on error
-        for token in tokens_to_fetch:
-            result[token] = None
-        return result
-    except Exception as e:
-        print(f"Error fetching multiple prices: {e}")
-        for token in tokens_to_fetch:
-            result[token] = None
-        return result
+    prices = await _fetch_prices(tokens_to_fetch)
+    for token in tokens_to_fetch:
+        result[token] = prices.get(token)
+    
+    return result
+
+
+@dataclass(slots=True)
+class TokenInfo:
+    """Trimmed market info kept in the token info cache."""
+    symbol: str
+    name: Optional[str]
+    price_usd: Optional[float]
+    market_cap_usd: Optional[float]
+    volume_24h_usd: Optional[float]
+    price_change_24h_percent: Optional[float]
+    high_24h: Optional[float]
+    low_24h: Optional[float]
+
+
+async def _fetch_token_info(symbol: str) -> Optional[TokenInfo]:
+    """Fetch /coins/{id} and keep only the fields we serve."""
+    coingecko_id = get_coingecko_id(symbol)
+    
+    if not coingecko_id:
+        return None
+    
+    async with upstream_call("coingecko"), httpx.AsyncClient(timeout=10.0) as client:
+        url = f"{COINGECKO_BASE_URL}/coins/{coingecko_id}"
+        params = {
+            "localization": "false",
+            "tickers": "false",
+            "market_data": "true",
+            "community_data": "false",
+            "developer_data": "false"
+        }
+        
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        market_data = data.get("market_data", {})
+        
+        return TokenInfo(
+            symbol=symbol,
+            name=data.get("name"),
+            price_usd=market_data.get("current_price", {}).get("usd"),
+            market_cap_usd=market_data.get("market_cap", {}).get("usd"),
+            volume_24h_usd=market_data.get("total_volume", {}).get("usd"),
+            price_change_24h_percent=market_data.get("price_change_percentage_24h"),
+            high_24h=market_data.get("high_24h", {}).get("usd"),
+            low_24h=market_data.get("low_24h", {}).get("usd"),
+        )
+
+
+# Shared cache for /coins/{id} market info, keyed by upper-case symbol
+token_info_cache = SWRCache(
+    "token_info",
+    loader=_fetch_token_info,
+    soft_ttl=TOKEN_INFO_SOFT_TTL,
+    hard_ttl=TOKEN_INFO_HARD_TTL,
+)
 
 
 async def get_token_info(token: str) -> Optional[dict]:
     """
     Fetch detailed token information including price, market cap, volume.
+    Served from the token info cache; popular tokens are refreshed in the
+    background before they go stale.
     
     Args:
         token: Token symbol (e.g., "APT", "BTC")
@@ -215,42 +270,8 @@ async def get_token_info(token: str) -> Optional[dict]:
     Returns:
         Dictionary with token info or None if fetch fails
     """
-    coingecko_id = get_coingecko_id(token)
-    
-    if not coingecko_id:
-        return None
-    
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            url = f"{COINGECKO_BASE_URL}/coins/{coingecko_id}"
-            params = {
-                "localization": "false",
-                "tickers": "false",
-                "market_data": "true",
-                "community_data": "false",
-                "developer_data": "false"
-            }
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            market_data = data.get("market_data", {})
-            
-            return {
-                "symbol": token.upper(),
-                "name": data.get("name"),
-                "price_usd": market_data.get("current_price", {}).get("usd"),
-                "market_cap_usd": market_data.get("market_cap", {}).get("usd"),
-                "volume_24h_usd": market_data.get("total_volume", {}).get("usd"),
-                "price_change_24h_percent": market_data.get("price_change_percentage_24h"),
-                "high_24h": market_data.get("high_24h", {}).get("usd"),
-                "low_24h": market_data.get("low_24h", {}).get("usd"),
-            }
-            
-    except Exception as e:
-        print(f"Error fetching token info for {token}: {e}")
-        return None
+    info = await token_info_cache.get(token.upper())
+    return asdict(info) if info else None
 
 
 def get_supported_tokens() -> list[str]:
@@ -260,4 +281,4 @@ def get_supported_tokens() -> list[str]:
     Returns:
         List of token symbols that can be used with price APIs
     """
-    return list(TOKEN_TO_COINGECKO_ID.keys())
+    return get_token_registry().symbols()
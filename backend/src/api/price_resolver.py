@@ -0,0 +1,185 @@
+"""
+Price Resolver
+==============
+Single entry point for current token prices. Every engine and endpoint
+resolves prices through this module instead of calling a feed directly.
+
+Sources are checked in order:
+1. Live tick   - RealTimePriceService (Binance WebSocket) in-memory cache
+2. Local cache - prices this process recently fetched over REST
+3. Batched REST - one CoinGecko /simple/price call for all remaining misses
+
+Concurrent lookups for the same symbol share a single in-flight REST request,
+so the process never fetches a price it is already holding or waiting on.
+
+Usage:
+    price = await resolve_price("APT")
+    prices = await resolve_prices(["APT", "BTC", "ETH"], max_age=30)
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional, Dict, Iterable
+
+from src.api.price import get_multiple_prices
+from src.api.websocket_price import get_price_service
+
+# Default maximum age (seconds) of a price before it is considered stale
+DEFAULT_MAX_AGE = float(os.getenv("PRICE_MAX_AGE", "30"))
+
+# Local cache of REST results: symbol -> (price, monotonic fetch time)
+_rest_cache: Dict[str, tuple[float, float]] = {}
+
+# In-flight REST lookups: symbol -> future resolving to the price (or None)
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Counters per source, exposed for diagnostics
+_stats = {"live": 0, "cache": 0, "rest": 0, "inflight": 0, "miss": 0}
+
+
+def _live_price(symbol: str, max_age: float) -> Optional[float]:
+    """Return the live WebSocket price if it is fresh enough."""
+    price_data = get_price_service().get_price_data(symbol)
+    if price_data is None:
+        return None
+    # Fixed-price entries (stablecoins) never go stale
+    if price_data.source != "fixed":
+        age = (datetime.utcnow() - price_data.last_update).total_seconds()
+        if age > max_age:
+            return None
+    return price_data.price
+
+
+def _cached_price(symbol: str, max_age: float) -> Optional[float]:
+    """Return a locally cached REST price if it is fresh enough."""
+    entry = _rest_cache.get(symbol)
+    if entry is None:
+        return None
+    price, fetched_at = entry
+    if time.monotonic() - fetched_at > max_age:
+        return None
+    return price
+
+
+def peek_price(symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+    """
+    Resolve a price from in-process sources only (no network).
+
+    Args:
+        symbol: Token symbol (e.g., "APT")
+        max_age: Maximum allowed staleness in seconds
+
+    Returns:
+        Price in USD or None if the process does not hold a fresh price
+    """
+    symbol = symbol.upper()
+    max_age = DEFAULT_MAX_AGE if max_age is None else max_age
+
+    price = _live_price(symbol, max_age)
+    if price is not None:
+        _stats["live"] += 1
+        return price
+
+    price = _cached_price(symbol, max_age)
+    if price is not None:
+        _stats["cache"] += 1
+        return price
+
+    return None
+
+
+async def _fetch_batch(symbols: list[str]):
+    """Fetch a batch of symbols over REST and settle their in-flight futures."""
+    prices: Dict[str, Optional[float]] = {}
+    try:
+        prices = await get_multiple_prices(symbols)
+    except Exception as e:
+        print(f"Price resolver REST error: {e}")
+    finally:
+        # Always settle waiters, even if this fetch was cancelled
+        now = time.monotonic()
+        for symbol in symbols:
+            price = prices.get(symbol)
+            if price is not None:
+                _rest_cache[symbol] = (price, now)
+            future = _inflight.pop(symbol, None)
+            if future is not None and not future.done():
+                future.set_result(price)
+
+
+async def resolve_prices(
+    tokens: Iterable[str],
+    max_age: Optional[float] = None
+) -> Dict[str, Optional[float]]:
+    """
+    Resolve current prices for several tokens at once.
+
+    Args:
+        tokens: Token symbols (e.g., ["APT", "BTC"])
+        max_age: Maximum allowed staleness in seconds (default PRICE_MAX_AGE)
+
+    Returns:
+        Dictionary mapping upper-cased symbols to prices (None if unavailable)
+    """
+    result: Dict[str, Optional[float]] = {}
+    waiting: Dict[str, asyncio.Future] = {}
+    to_fetch: list[str] = []
+    loop = asyncio.get_running_loop()
+
+    for token in tokens:
+        symbol = token.upper()
+        if symbol in result or symbol in waiting:
+            continue
+
+        price = peek_price(symbol, max_age)
+        if price is not None:
+            result[symbol] = price
+            continue
+
+        # Share an existing in-flight request for this symbol
+        future = _inflight.get(symbol)
+        if future is not None:
+            _stats["inflight"] += 1
+        else:
+            future = loop.create_future()
+            _inflight[symbol] = future
+            to_fetch.append(symbol)
+        waiting[symbol] = future
+
+    if to_fetch:
+        _stats["rest"] += len(to_fetch)
+        await _fetch_batch(to_fetch)
+
+    for symbol, future in waiting.items():
+        price = await future
+        if price is None:
+            _stats["miss"] += 1
+        result[symbol] = price
+
+    return result
+
+
+async def resolve_price(token: str, max_age: Optional[float] = None) -> Optional[float]:
+    """
+    Resolve the current price for a single token.
+
+    Args:
+        token: Token symbol (e.g., "APT")
+        max_age: Maximum allowed staleness in seconds (default PRICE_MAX_AGE)
+
+    Returns:
+        Price in USD or None if no source could provide one
+    """
+    prices = await resolve_prices([token], max_age)
+    return prices.get(token.upper())
+
+
+def get_resolver_stats() -> dict:
+    """Get per-source lookup counters."""
+    return {
+        **_stats,
+        "cached_symbols": len(_rest_cache),
+        "inflight_symbols": len(_inflight),
+    }
@@ -0,0 +1,264 @@
+"""
+Upstream Resilience
+===================
+Circuit breakers, latency tracking and hedged requests for the external
+price sources (CoinGecko, Binance REST).
+
+- Circuit breaker: after CIRCUIT_FAILURE_THRESHOLD consecutive failures an
+  upstream is "open" and calls fail immediately instead of waiting for a
+  timeout. After CIRCUIT_RESET_SECONDS one trial call is let through
+  ("half-open"); success closes the circuit again. Calls slower than
+  UPSTREAM_SLOW_SECONDS count as failures, so a hanging upstream opens
+  the circuit too.
+- Latency tracker: rolling window of call durations per upstream, used to
+  derive a p95 latency. A call cancelled before answering (the losing
+  side of a hedge) records how long it had run, a lower bound on its
+  latency, so the p95 of a slow upstream doesn't shrink.
+- Hedged request: start the primary call, and if it hasn't answered within
+  the primary's p95 latency, also start a backup call on another source.
+  Whichever answers first wins.
+
+Usage:
+    async with upstream_call("coingecko"):
+        response = await client.get(url)
+
+    price = await hedged(fetch_coingecko, fetch_binance, hedge_delay("coingecko"))
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+# Circuit breaker configuration
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Calls taking longer than this (seconds) count as breaker failures
+UPSTREAM_SLOW_SECONDS = float(os.getenv("UPSTREAM_SLOW_SECONDS", "3"))
+
+# Bounds for the p95-based hedge delay (seconds)
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_DELAY = 1.0
+HEDGE_DEFAULT_DELAY = 0.5
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half_open"."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Check whether a call may be made now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        """Record a successful call and close the circuit."""
+        if self._opened_at is not None:
+            print(f"✅ Circuit '{self.name}' closed")
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit past the threshold."""
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                print(f"⚡ Circuit '{self.name}' opened after {self._failures} failures")
+            self._opened_at = time.monotonic()
+
+    def release(self):
+        """Release a half-open trial slot without recording an outcome."""
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of call latencies for one upstream."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Get a latency percentile in seconds, or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """Get (or create) the circuit breaker for an upstream."""
+    if upstream not in _breakers:
+        _breakers[upstream] = CircuitBreaker(upstream)
+    return _breakers[upstream]
+
+
+def get_latency_tracker(upstream: str) -> LatencyTracker:
+    """Get (or create) the latency tracker for an upstream."""
+    if upstream not in _latencies:
+        _latencies[upstream] = LatencyTracker()
+    return _latencies[upstream]
+
+
+@asynccontextmanager
+async def upstream_call(upstream: str):
+    """
+    Guard one call to an upstream.
+
+    Raises CircuitOpenError if the circuit is open. Records latency and
+    success on normal exit, and a failure if the body raises (client
+    errors other than 429 don't count) or took longer than
+    UPSTREAM_SLOW_SECONDS. Cancelled calls (e.g. the losing side of a
+    hedge) record their elapsed time as a censored latency sample, and a
+    failure only if they had already run past the slow threshold.
+    """
+    breaker = get_breaker(upstream)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit '{upstream}' is open")
+
+    started = time.monotonic()
+    try:
+        yield
+    except asyncio.CancelledError:
+        elapsed = time.monotonic() - started
+        get_latency_tracker(upstream).record(elapsed)
+        if elapsed > UPSTREAM_SLOW_SECONDS:
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise
+    except httpx.HTTPStatusError as e:
+        # 4xx (other than rate limiting) means the upstream is healthy
+        status = e.response.status_code
+        if 400 <= status < 500 and status != 429:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    elapsed = time.monotonic() - started
+    get_latency_tracker(upstream).record(elapsed)
+    if elapsed > UPSTREAM_SLOW_SECONDS:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def hedge_delay(upstream: str) -> float:
+    """Delay before hedging a call to an upstream: its p95, clamped."""
+    p95 = get_latency_tracker(upstream).percentile(95)
+    if p95 is None:
+        return HEDGE_DEFAULT_DELAY
+    return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[Optional[T]]],
+    backup: Optional[Callable[[], Awaitable[Optional[T]]]],
+    delay: float,
+) -> Optional[T]:
+    """
+    Run primary, starting backup if primary hasn't succeeded after `delay`.
+
+    A call "succeeds" when it returns something other than None without
+    raising. If primary fails early, backup starts immediately.
+
+    Returns:
+        The first successful result, or None if both sides fail
+    """
+    primary_task = asyncio.create_task(primary())
+    tasks = {primary_task}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if primary_task in done and not primary_task.exception():
+            result = primary_task.result()
+            if result is not None or backup is None:
+                return result
+
+        if backup is not None:
+            tasks.add(asyncio.create_task(backup()))
+
+        pending = {t for t in tasks if not t.done()}
+        finished = [t for t in tasks if t.done()]
+        while True:
+            for task in finished:
+                if not task.exception() and task.result() is not None:
+                    return task.result()
+            if not pending:
+                return None
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished = list(done)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Mark failures as retrieved; callers see None instead
+                task.exception()
+
+
+def get_upstream_stats() -> dict:
+    """Get breaker state and latency percentiles for every upstream."""
+    stats = {}
+    for name in sorted(set(_breakers) | set(_latencies)):
+        tracker = get_latency_tracker(name)
+        p50 = tracker.percentile(50)
+        p95 = tracker.percentile(95)
+        stats[name] = {
+            "circuit": get_breaker(name).state,
+            "samples": len(tracker),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    return stats
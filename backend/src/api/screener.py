@@ -0,0 +1,408 @@
+"""
+Market Screener
+===============
+Background analysis of the whole token universe.
+
+A background task refreshes market data for every registry token with a
+CoinGecko id (stablecoins excluded) from CoinGecko /coins/markets, a page
+of ids per request with a pause between pages, so the universe costs a
+handful of requests per refresh instead of one /coins/{id} call per coin.
+
+Each refresh builds one column per metric and scores all tokens at once
+with vectorized versions of the generate_trading_suggestion rules, so a
+ranked, filtered view is a few array operations per request.
+
+Usage:
+    start_screener()
+    results = query_screener(action="consider_buy", sort="score", limit=10)
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from src.api.indicators import IndicatorSet
+from src.api.resilience import upstream_call
+from src.api.token_registry import get_token_registry
+
+# CoinGecko API
+COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
+
+# Seconds between full universe refreshes
+SCREENER_REFRESH_SECONDS = float(os.getenv("SCREENER_REFRESH_SECONDS", "300"))
+
+# CoinGecko ids per /coins/markets request, and pause between requests
+SCREENER_PAGE_SIZE = int(os.getenv("SCREENER_PAGE_SIZE", "100"))
+SCREENER_REQUEST_DELAY = float(os.getenv("SCREENER_REQUEST_DELAY", "2.0"))
+
+# Action codes (index into ACTIONS)
+ACTIONS = ("hold", "consider_buy", "consider_sell")
+ACTION_TEXTS = (
+    "🟡 Neutral - consider holding",
+    "🟢 Conditions favor buying",
+    "🔴 Conditions suggest caution",
+)
+HOLD, BUY, SELL = range(3)
+
+# Trend codes
+TRENDS = {-1: "bearish", 0: "neutral", 1: "bullish"}
+
+# Columns that can be sorted on
+SORT_KEYS = (
+    "score", "price", "change_1h", "change_24h", "change_7d",
+    "market_cap", "volume_24h", "volume_ratio", "ath_change", "rsi",
+)
+
+
+@dataclass
+class ScreenerSnapshot:
+    """Scored metrics for the whole universe, one array per column."""
+    symbols: List[str]
+    names: List[str]
+    columns: Dict[str, np.ndarray]
+    signals: List[List[str]]
+    built_at: float = field(default_factory=time.time)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+def _trend_code(sparkline: np.ndarray) -> int:
+    """24h trend from an hourly 7d sparkline, as in get_coin_analysis."""
+    if len(sparkline) < 2:
+        return 0
+    recent = sparkline[-24:]
+    if recent[-1] > recent[0] * 1.02:
+        return 1
+    if recent[-1] < recent[0] * 0.98:
+        return -1
+    return 0
+
+
+def _last_rsi(sparkline: np.ndarray) -> float:
+    """RSI(14) at the end of the sparkline, NaN if it is too short."""
+    if len(sparkline) > 26 + 9:
+        return round(float(IndicatorSet(sparkline).rsi(14)[-1]), 2)
+    return np.nan
+
+
+def score_universe(
+    change_24h: np.ndarray,
+    change_7d: np.ndarray,
+    volume_ratio: np.ndarray,
+    ath_change: np.ndarray,
+    trend: np.ndarray,
+    rsi: np.ndarray,
+):
+    """
+    Score every token at once with the generate_trading_suggestion rules.
+
+    Missing changes count as 0 and a missing RSI (NaN) adds nothing,
+    matching the scalar version.
+
+    Returns:
+        (scores, action codes, per-token signal lists)
+    """
+    change_24h = np.nan_to_num(change_24h)
+    change_7d = np.nan_to_num(change_7d)
+    n = len(change_24h)
+
+    # (mask, score delta, signal template, value column)
+    rules = [
+        (change_24h > 5, 10, "📈 Strong 24h momentum (+{:.1f}%)", change_24h),
+        (change_24h < -5, -10, "📉 24h pullback ({:.1f}%)", change_24h),
+        (change_7d > 10, 15, "🚀 Strong weekly trend (+{:.1f}%)", change_7d),
+        (change_7d < -10, -15, "⚠️ Weak weekly performance ({:.1f}%)", change_7d),
+        (volume_ratio > 10, 5, "🔥 High trading volume", None),
+        (volume_ratio < 2, -5, "😴 Low trading activity", None),
+        (ath_change > -20, 0, "💎 Near all-time high", None),
+        (ath_change < -80, 5, "💰 Far from ATH - potential value", None),
+        (trend == 1, 10, "📊 Bullish short-term trend", None),
+        (trend == -1, -10, "📊 Bearish short-term trend", None),
+        (rsi >= 70, -5, "🌡️ Overbought (RSI {:.0f})", rsi),
+        (rsi <= 30, 5, "🧊 Oversold (RSI {:.0f})", rsi),
+    ]
+
+    scores = np.full(n, 50, dtype=np.int64)
+    signals: List[List[str]] = [[] for _ in range(n)]
+    for mask, delta, template, values in rules:
+        scores += delta * mask
+        for i in np.flatnonzero(mask):
+            signals[i].append(template.format(values[i]) if values is not None else template)
+
+    actions = np.full(n, HOLD, dtype=np.int8)
+    actions[scores >= 70] = BUY
+    actions[scores <= 30] = SELL
+    return scores, actions, signals
+
+
+def build_snapshot(markets: List[dict]) -> ScreenerSnapshot:
+    """Build a scored snapshot from CoinGecko /coins/markets rows."""
+    registry = get_token_registry()
+    rows = []
+    for row in markets:
+        symbol = registry.symbol_for_coingecko(row.get("id", ""))
+        if symbol and row.get("current_price") is not None:
+            rows.append((symbol, row))
+
+    def column(key: str) -> np.ndarray:
+        return np.array(
+            [np.nan if row.get(key) is None else row[key] for _, row in rows],
+            dtype=np.float64,
+        )
+
+    sparklines = [
+        np.asarray((row.get("sparkline_in_7d") or {}).get("price") or [], dtype=np.float64)
+        for _, row in rows
+    ]
+
+    market_cap = column("market_cap")
+    volume_24h = column("total_volume")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volume_ratio = np.where(market_cap > 0, volume_24h / market_cap * 100, 0.0)
+
+    columns = {
+        "price": column("current_price"),
+        "change_1h": column("price_change_percentage_1h_in_currency"),
+        "change_24h": column("price_change_percentage_24h"),
+        "change_7d": column("price_change_percentage_7d_in_currency"),
+        "market_cap": market_cap,
+        "volume_24h": volume_24h,
+        "volume_ratio": volume_ratio,
+        "ath_change": np.nan_to_num(column("ath_change_percentage")),
+        "trend": np.array([_trend_code(s) for s in sparklines], dtype=np.int8),
+        "rsi": np.array([_last_rsi(s) for s in sparklines], dtype=np.float64),
+    }
+
+    scores, actions, signals = score_universe(
+        columns["change_24h"],
+        columns["change_7d"],
+        columns["volume_ratio"],
+        columns["ath_change"],
+        columns["trend"],
+        columns["rsi"],
+    )
+    columns["score"] = scores
+    columns["action"] = actions
+
+    return ScreenerSnapshot(
+        symbols=[symbol for symbol, _ in rows],
+        names=[row.get("name") for _, row in rows],
+        columns=columns,
+        signals=signals,
+    )
+
+
+async def _fetch_markets(ids: List[str]) -> List[dict]:
+    """Fetch one page of /coins/markets for the given CoinGecko ids."""
+    async with upstream_call("coingecko"), httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.get(
+            f"{COINGECKO_BASE_URL}/coins/markets",
+            params={
+                "vs_currency": "usd",
+                "ids": ",".join(ids),
+                "per_page": str(len(ids)),
+                "page": "1",
+                "sparkline": "true",
+                "price_change_percentage": "1h,24h,7d",
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+_snapshot: Optional[ScreenerSnapshot] = None
+_refresh_task: Optional[asyncio.Task] = None
+_inflight: Optional[asyncio.Task] = None
+
+
+def get_screener_snapshot() -> Optional[ScreenerSnapshot]:
+    """Get the latest snapshot, or None before the first refresh."""
+    return _snapshot
+
+
+async def _refresh() -> Optional[ScreenerSnapshot]:
+    global _snapshot
+    registry = get_token_registry()
+    ids = [
+        registry.coingecko_id(symbol)
+        for symbol in registry.symbols()
+        if registry.coingecko_id(symbol) and not registry.is_stablecoin(symbol)
+    ]
+
+    markets = []
+    for start in range(0, len(ids), SCREENER_PAGE_SIZE):
+        if start:
+            await asyncio.sleep(SCREENER_REQUEST_DELAY)
+        try:
+            markets.extend(await _fetch_markets(ids[start:start + SCREENER_PAGE_SIZE]))
+        except Exception as e:
+            print(f"⚠️ Screener: market page {start // SCREENER_PAGE_SIZE} failed: {e}")
+
+    if not markets:
+        return _snapshot
+
+    _snapshot = build_snapshot(markets)
+    print(f"🔎 Screener refreshed: {len(_snapshot)} tokens scored")
+    return _snapshot
+
+
+async def refresh_screener() -> Optional[ScreenerSnapshot]:
+    """
+    Refresh and rescore the universe (concurrent callers share one refresh).
+
+    Returns:
+        The snapshot in effect afterwards (the previous one if every
+        request failed)
+    """
+    global _inflight
+    if _inflight is None or _inflight.done():
+        _inflight = asyncio.create_task(_refresh())
+    return await asyncio.shield(_inflight)
+
+
+async def ensure_screener() -> Optional[ScreenerSnapshot]:
+    """Get the snapshot, refreshing first if there is none yet."""
+    return _snapshot if _snapshot is not None else await refresh_screener()
+
+
+async def _refresh_loop():
+    """Refresh the screener every SCREENER_REFRESH_SECONDS."""
+    while True:
+        try:
+            await refresh_screener()
+            await asyncio.sleep(SCREENER_REFRESH_SECONDS)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            print(f"❌ Screener refresh error: {e}")
+            await asyncio.sleep(60)
+
+
+def start_screener():
+    """Start the background screener refresh task."""
+    global _refresh_task
+
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_loop())
+        return True
+    return False
+
+
+def stop_screener():
+    """Stop the background screener refresh task."""
+    global _refresh_task
+
+    if _refresh_task and not _refresh_task.done():
+        _refresh_task.cancel()
+        _refresh_task = None
+        return True
+    return False
+
+
+def _clean(value) -> Optional[float]:
+    """JSON-safe float (NaN -> None)."""
+    value = float(value)
+    return None if value != value else value
+
+
+def _row(snapshot: ScreenerSnapshot, i: int) -> Dict[str, Any]:
+    c = snapshot.columns
+    action = int(c["action"][i])
+    return {
+        "symbol": snapshot.symbols[i],
+        "name": snapshot.names[i],
+        "price": _clean(c["price"][i]),
+        "price_changes": {
+            "1h": _clean(c["change_1h"][i]),
+            "24h": _clean(c["change_24h"][i]),
+            "7d": _clean(c["change_7d"][i]),
+        },
+        "market_cap": _clean(c["market_cap"][i]),
+        "volume_24h": _clean(c["volume_24h"][i]),
+        "volume_to_mcap_ratio": round(float(c["volume_ratio"][i]), 2),
+        "ath_change_percent": round(float(c["ath_change"][i]), 2),
+        "trend_7d": TRENDS[int(c["trend"][i])],
+        "rsi_14": _clean(c["rsi"][i]),
+        "score": int(c["score"][i]),
+        "action": ACTIONS[action],
+        "action_text": ACTION_TEXTS[action],
+        "signals": snapshot.signals[i],
+    }
+
+
+def query_screener(
+    action: Optional[str] = None,
+    trend: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    min_volume_ratio: Optional[float] = None,
+    min_market_cap: Optional[float] = None,
+    rsi_below: Optional[float] = None,
+    rsi_above: Optional[float] = None,
+    symbols: Optional[List[str]] = None,
+    sort: str = "score",
+    descending: bool = True,
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """
+    Filter and rank the latest snapshot.
+
+    Raises:
+        ValueError: For an unknown action, trend or sort key
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key '{sort}'. Use: {', '.join(SORT_KEYS)}")
+    if action is not None and action not in ACTIONS:
+        raise ValueError(f"Unknown action '{action}'. Use: {', '.join(ACTIONS)}")
+    trend_codes = {name: code for code, name in TRENDS.items()}
+    if trend is not None and trend not in trend_codes:
+        raise ValueError(f"Unknown trend '{trend}'. Use: {', '.join(trend_codes)}")
+
+    snapshot = _snapshot
+    if snapshot is None:
+        return {"ready": False, "total": 0, "count": 0, "results": []}
+
+    c = snapshot.columns
+    mask = np.ones(len(snapshot), dtype=bool)
+    if action is not None:
+        mask &= c["action"] == ACTIONS.index(action)
+    if trend is not None:
+        mask &= c["trend"] == trend_codes[trend]
+    if min_score is not None:
+        mask &= c["score"] >= min_score
+    if max_score is not None:
+        mask &= c["score"] <= max_score
+    if min_volume_ratio is not None:
+        mask &= c["volume_ratio"] >= min_volume_ratio
+    if min_market_cap is not None:
+        mask &= c["market_cap"] >= min_market_cap
+    if rsi_below is not None:
+        mask &= c["rsi"] < rsi_below
+    if rsi_above is not None:
+        mask &= c["rsi"] > rsi_above
+    if symbols:
+        mask &= np.isin(np.array(snapshot.symbols), [s.upper() for s in symbols])
+
+    # Rank matching rows; missing values sort last either way
+    idx = np.flatnonzero(mask)
+    values = c[sort][idx].astype(np.float64)
+    if descending:
+        values = -values
+    values[np.isnan(values)] = np.inf
+    ranked = idx[np.argsort(values, kind="stable")][:max(limit, 0)]
+
+    return {
+        "ready": True,
+        "built_at": datetime.utcfromtimestamp(snapshot.built_at).isoformat(),
+        "age_seconds": round(time.time() - snapshot.built_at, 1),
+        "total": len(idx),
+        "count": len(ranked),
+        "results": [_row(snapshot, int(i)) for i in ranked],
+    }
@@ -0,0 +1,463 @@
+"""
+Token Registry
+==============
+Single source of truth for token symbol metadata.
+
+Every supported token has:
+- a dense integer ID (0..N-1) engines can use for array indexing
+- its CoinGecko ID (REST prices, market data, charts)
+- its Binance USDT pair (live WebSocket feed)
+
+The registry is seeded from the curated list below and validated against
+CoinGecko's /coins/list and Binance's /exchangeInfo. The merged result is
+written to a compact indexed file that is read and decoded once at
+startup, so a restart does not refetch either list. IDs are append-only: a refresh never
+renumbers an existing token.
+
+File layout (little-endian):
+    header:  magic "TAPTREG1" | version u32 | count u32 | built_at f64
+    index:   count x (symbol_off u32, symbol_len u16, cg_off u32, cg_len u16,
+                      binance_off u32, binance_len u16, flags u16)
+    strings: UTF-8 blob referenced by the index
+
+Usage:
+    registry = get_token_registry()
+    token_id = registry.get_id("APT")
+    cg_id = registry.coingecko_id("APT")
+"""
+
+import asyncio
+import os
+import struct
+import time
+from dataclasses import dataclass, replace
+from typing import Optional, Dict, List
+
+import httpx
+
+COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
+BINANCE_REST_URL = "https://api.binance.com/api/v3"
+
+# Registry file location and background refresh interval
+REGISTRY_PATH = os.getenv("TOKEN_REGISTRY_PATH", "data/token_registry.bin")
+REGISTRY_REFRESH_HOURS = float(os.getenv("TOKEN_REGISTRY_REFRESH_HOURS", "24"))
+
+_MAGIC = b"TAPTREG1"
+_HEADER = struct.Struct("<8sIId")
+_RECORD = struct.Struct("<IHIHIHH")
+
+# Entry flags
+FLAG_STABLECOIN = 1
+
+# Curated token list: (symbol, CoinGecko ID, Binance pair)
+# Order defines the initial integer IDs - append new tokens at the end.
+_SEED_TOKENS = [
+    # Major coins
+    ("BTC", "bitcoin", "btcusdt"),
+    ("ETH", "ethereum", "ethusdt"),
+    ("BNB", "binancecoin", "bnbusdt"),
+    ("XRP", "ripple", "xrpusdt"),
+    ("SOL", "solana", "solusdt"),
+    ("ADA", "cardano", "adausdt"),
+    ("DOGE", "dogecoin", "dogeusdt"),
+    ("DOT", "polkadot", "dotusdt"),
+    ("AVAX", "avalanche-2", "avaxusdt"),
+    ("MATIC", "matic-network", "maticusdt"),
+    ("LTC", "litecoin", "ltcusdt"),
+    ("LINK", "chainlink", "linkusdt"),
+    ("UNI", "uniswap", "uniusdt"),
+    ("ATOM", "cosmos", "atomusdt"),
+    ("ETC", "ethereum-classic", "etcusdt"),  # Ethereum Classic
+    ("XLM", "stellar", "xlmusdt"),  # Stellar
+    ("ALGO", "algorand", "algousdt"),  # Algorand
+    ("VET", "vechain", "vetusdt"),  # VeChain
+    ("FIL", "filecoin", "filusdt"),  # Filecoin
+    ("AAVE", "aave", "aaveusdt"),  # Aave
+    ("EOS", "eos", "eosusdt"),  # EOS
+    ("XTZ", "tezos", "xtzusdt"),  # Tezos
+    ("THETA", "theta-token", "thetausdt"),  # Theta
+    ("FTM", "fantom", "ftmusdt"),  # Fantom
+    ("HBAR", "hedera-hashgraph", "hbarusdt"),  # Hedera
+    ("EGLD", "elrond-erd-2", "egldusdt"),  # MultiversX
+    ("FLOW", "flow", "flowusdt"),  # Flow
+    ("AXS", "axie-infinity", "axsusdt"),  # Axie Infinity
+    ("SAND", "the-sandbox", "sandusdt"),  # Sandbox
+    ("MANA", "decentraland", "manausdt"),  # Decentraland
+    ("GRT", "the-graph", "grtusdt"),  # The Graph
+    ("CHZ", "chiliz", "chzusdt"),  # Chiliz
+    ("ENJ", "enjincoin", "enjusdt"),  # Enjin
+    ("BAT", "basic-attention-token", "batusdt"),  # Basic Attention Token
+    ("ZEC", "zcash", "zecusdt"),  # Zcash
+    ("DASH", "dash", "dashusdt"),  # Dash
+    ("NEO", "neo", "neousdt"),  # NEO
+    ("WAVES", "waves", "wavesusdt"),  # Waves
+    ("KSM", "kusama", "ksmusdt"),  # Kusama
+    ("CAKE", "pancakeswap-token", "cakeusdt"),  # PancakeSwap
+    ("CRV", "curve-dao-token", "crvusdt"),  # Curve
+    ("SNX", "havven", "snxusdt"),  # Synthetix
+    ("COMP", "compound-governance-token", "compusdt"),  # Compound
+    ("MKR", "maker", "mkrusdt"),  # Maker
+    ("YFI", "yearn-finance", "yfiusdt"),  # Yearn Finance
+    ("SUSHI", "sushi", "sushiusdt"),  # SushiSwap
+    ("1INCH", "1inch", "1inchusdt"),  # 1inch
+    ("ENS", "ethereum-name-service", "ensusdt"),  # Ethereum Name Service
+    ("LDO", "lido-dao", "ldousdt"),  # Lido DAO
+    ("APE", "apecoin", "apeusdt"),  # ApeCoin
+    ("GMX", "gmx", "gmxusdt"),  # GMX
+    ("RNDR", "render-token", "rndrusdt"),  # Render
+    ("IMX", "immutable-x", "imxusdt"),  # Immutable X
+    ("FET", "fetch-ai", "fetusdt"),  # Fetch.ai
+    ("AGIX", "singularitynet", "agixusdt"),  # SingularityNET
+    ("OCEAN", "ocean-protocol", "oceanusdt"),  # Ocean Protocol
+    ("WLD", "worldcoin-wld", "wldusdt"),  # Worldcoin
+    # Layer 2 & New chains
+    ("APT", "aptos", "aptusdt"),
+    ("SUI", "sui", "suiusdt"),
+    ("SEI", "sei-network", "seiusdt"),
+    ("ARB", "arbitrum", "arbusdt"),
+    ("OP", "optimism", "opusdt"),
+    ("NEAR", "near", "nearusdt"),
+    ("INJ", "injective-protocol", "injusdt"),
+    ("TIA", "celestia", "tiausdt"),
+    ("STX", "blockstack", "stxusdt"),  # Stacks
+    ("MINA", "mina-protocol", "minausdt"),  # Mina
+    ("KAVA", "kava", "kavausdt"),  # Kava
+    ("ROSE", "oasis-network", "roseusdt"),  # Oasis
+    # Memecoins
+    ("PEPE", "pepe", "pepeusdt"),
+    ("SHIB", "shiba-inu", "shibusdt"),
+    ("WIF", "dogwifcoin", "wifusdt"),
+    ("BONK", "bonk", "bonkusdt"),
+    ("FLOKI", "floki", "flokiusdt"),
+    ("MEME", None, "memeusdt"),
+    # Stablecoins (priced at $1, no Binance USDT pair)
+    ("USDC", "usd-coin", None),
+    ("USDT", "tether", None),
+]
+
+_STABLECOINS = {"USDC", "USDT"}
+
+
+@dataclass(frozen=True)
+class TokenEntry:
+    """Metadata for one registered token."""
+    symbol: str
+    coingecko_id: Optional[str]
+    binance_pair: Optional[str]
+    flags: int = 0
+
+
+def _seed_entries() -> List[TokenEntry]:
+    """Build registry entries from the curated seed list."""
+    return [
+        TokenEntry(
+            symbol=symbol,
+            coingecko_id=cg_id,
+            binance_pair=pair,
+            flags=FLAG_STABLECOIN if symbol in _STABLECOINS else 0,
+        )
+        for symbol, cg_id, pair in _SEED_TOKENS
+    ]
+
+
+def _encode(entries: List[TokenEntry], version: int, built_at: float) -> bytes:
+    """Serialize entries to the indexed registry file format."""
+    index = bytearray()
+    strings = bytearray()
+    
+    def add(value: Optional[str]) -> tuple[int, int]:
+        if not value:
+            return 0, 0
+        data = value.encode("utf-8")
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+    
+    for entry in entries:
+        sym_off, sym_len = add(entry.symbol)
+        cg_off, cg_len = add(entry.coingecko_id)
+        bn_off, bn_len = add(entry.binance_pair)
+        index.extend(_RECORD.pack(sym_off, sym_len, cg_off, cg_len, bn_off, bn_len, entry.flags))
+    
+    header = _HEADER.pack(_MAGIC, version, len(entries), built_at)
+    return header + bytes(index) + bytes(strings)
+
+
+def _decode(buf) -> tuple[int, float, List[TokenEntry]]:
+    """Parse a registry file buffer into (version, built_at, entries)."""
+    magic, version, count, built_at = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC:
+        raise ValueError("Not a token registry file")
+    
+    strings_base = _HEADER.size + count * _RECORD.size
+    
+    def read(offset: int, length: int) -> Optional[str]:
+        if not length:
+            return None
+        start = strings_base + offset
+        return bytes(buf[start:start + length]).decode("utf-8")
+    
+    entries = []
+    for i in range(count):
+        sym_off, sym_len, cg_off, cg_len, bn_off, bn_len, flags = _RECORD.unpack_from(
+            buf, _HEADER.size + i * _RECORD.size
+        )
+        entries.append(TokenEntry(
+            symbol=read(sym_off, sym_len),
+            coingecko_id=read(cg_off, cg_len),
+            binance_pair=read(bn_off, bn_len),
+            flags=flags,
+        ))
+    return version, built_at, entries
+
+
+def _load_file(path: str) -> Optional[tuple[int, float, List[TokenEntry]]]:
+    """Read and parse the registry file, or None if unusable."""
+    try:
+        with open(path, "rb") as f:
+            return _decode(f.read())
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def _write_file(path: str, data: bytes):
+    """Atomically replace the registry file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class TokenRegistry:
+    """
+    Immutable view of the registered tokens.
+    
+    A refresh builds a new TokenRegistry and swaps it in, so readers never
+    see a partially updated registry.
+    """
+    
+    def __init__(self, entries: List[TokenEntry], version: int = 1, built_at: float = 0.0):
+        self.version = version
+        self.built_at = built_at
+        self._entries = entries
+        self._by_symbol: Dict[str, int] = {e.symbol: i for i, e in enumerate(entries)}
+        self._by_binance: Dict[str, int] = {
+            e.binance_pair: i for i, e in enumerate(entries) if e.binance_pair
+        }
+        self._by_coingecko: Dict[str, int] = {
+            e.coingecko_id: i for i, e in enumerate(entries) if e.coingecko_id
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._by_symbol
+    
+    @property
+    def entries(self) -> List[TokenEntry]:
+        return list(self._entries)
+    
+    def get_id(self, symbol: str) -> Optional[int]:
+        """Get the dense integer ID for a symbol."""
+        return self._by_symbol.get(symbol.upper())
+    
+    def get_entry(self, symbol: str) -> Optional[TokenEntry]:
+        """Get the full entry for a symbol."""
+        token_id = self._by_symbol.get(symbol.upper())
+        return self._entries[token_id] if token_id is not None else None
+    
+    def symbol(self, token_id: int) -> str:
+        """Get the symbol for an integer ID."""
+        return self._entries[token_id].symbol
+    
+    def symbols(self) -> List[str]:
+        """Get all symbols, ordered by ID."""
+        return [e.symbol for e in self._entries]
+    
+    def coingecko_id(self, symbol: str) -> Optional[str]:
+        """Get the CoinGecko ID for a symbol."""
+        entry = self.get_entry(symbol)
+        return entry.coingecko_id if entry else None
+    
+    def binance_pair(self, symbol: str) -> Optional[str]:
+        """Get the lowercase Binance USDT pair for a symbol."""
+        entry = self.get_entry(symbol)
+        return entry.binance_pair if entry else None
+    
+    def binance_pairs(self) -> Dict[str, str]:
+        """Get symbol -> Binance pair for every token with a live feed."""
+        return {e.symbol: e.binance_pair for e in self._entries if e.binance_pair}
+    
+    def symbol_for_binance(self, pair: str) -> Optional[str]:
+        """Map a Binance pair (any case) back to our symbol."""
+        token_id = self._by_binance.get(pair.lower())
+        return self._entries[token_id].symbol if token_id is not None else None
+    
+    def symbol_for_coingecko(self, coingecko_id: str) -> Optional[str]:
+        """Map a CoinGecko ID back to our symbol."""
+        token_id = self._by_coingecko.get(coingecko_id.lower())
+        return self._entries[token_id].symbol if token_id is not None else None
+    
+    def is_stablecoin(self, symbol: str) -> bool:
+        """Check whether a token is a USD stablecoin."""
+        entry = self.get_entry(symbol)
+        return bool(entry and entry.flags & FLAG_STABLECOIN)
+
+
+def _merge(
+    entries: List[TokenEntry],
+    coins: Optional[list],
+    binance_symbols: Optional[list],
+) -> List[TokenEntry]:
+    """
+    Merge upstream metadata into registry entries.
+    
+    Existing entries keep their position (and therefore their ID); seed
+    tokens missing from the file are appended. CoinGecko IDs that no longer
+    exist are replaced when the symbol matches exactly one coin. Binance
+    pairs are kept only while the USDT pair is trading.
+    """
+    merged = list(entries)
+    known = {e.symbol for e in merged}
+    merged.extend(e for e in _seed_entries() if e.symbol not in known)
+    
+    if coins:
+        coin_ids = set()
+        ids_by_symbol: Dict[str, List[str]] = {}
+        for coin in coins:
+            coin_ids.add(coin["id"])
+            ids_by_symbol.setdefault(coin["symbol"].upper(), []).append(coin["id"])
+        
+        for i, entry in enumerate(merged):
+            if entry.coingecko_id in coin_ids:
+                continue
+            candidates = ids_by_symbol.get(entry.symbol, [])
+            if len(candidates) == 1:
+                merged[i] = replace(entry, coingecko_id=candidates[0])
+    
+    if binance_symbols:
+        trading = {
+            s["symbol"].lower()
+            for s in binance_symbols
+            if s.get("status") == "TRADING" and s.get("quoteAsset") == "USDT"
+        }
+        for i, entry in enumerate(merged):
+            if entry.flags & FLAG_STABLECOIN:
+                continue
+            pair = entry.binance_pair or f"{entry.symbol.lower()}usdt"
+            merged[i] = replace(entry, binance_pair=pair if pair in trading else None)
+    
+    return merged
+
+
+# Global registry instance and refresh task
+_registry: Optional[TokenRegistry] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def get_token_registry() -> TokenRegistry:
+    """Get the global registry, loading it from disk (or seeds) on first use."""
+    global _registry
+    if _registry is None:
+        loaded = _load_file(REGISTRY_PATH)
+        if loaded:
+            version, built_at, entries = loaded
+            known = {e.symbol for e in entries}
+            entries.extend(e for e in _seed_entries() if e.symbol not in known)
+            _registry = TokenRegistry(entries, version, built_at)
+        else:
+            _registry = TokenRegistry(_seed_entries())
+            try:
+                _write_file(REGISTRY_PATH, _encode(_registry.entries, 1, 0.0))
+            except OSError as e:
+                print(f"⚠️ Could not write token registry: {e}")
+    return _registry
+
+
+async def refresh_token_registry() -> TokenRegistry:
+    """
+    Reload CoinGecko's coin list and Binance's exchangeInfo, merge them
+    into the registry, persist it and swap it in.
+    
+    Returns:
+        The registry in effect after the refresh
+    """
+    global _registry
+    current = get_token_registry()
+    coins = None
+    binance_symbols = None
+    
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        try:
+            response = await client.get(f"{COINGECKO_BASE_URL}/coins/list")
+            response.raise_for_status()
+            coins = response.json()
+        except Exception as e:
+            print(f"⚠️ Token registry: CoinGecko coin list unavailable: {e}")
+        
+        try:
+            response = await client.get(f"{BINANCE_REST_URL}/exchangeInfo")
+            response.raise_for_status()
+            binance_symbols = response.json().get("symbols", [])
+        except Exception as e:
+            print(f"⚠️ Token registry: Binance exchangeInfo unavailable: {e}")
+    
+    if coins is None and binance_symbols is None:
+        return current
+    
+    entries = _merge(current.entries, coins, binance_symbols)
+    built_at = time.time()
+    version = current.version + 1
+    
+    try:
+        _write_file(REGISTRY_PATH, _encode(entries, version, built_at))
+    except OSError as e:
+        print(f"⚠️ Could not write token registry: {e}")
+    
+    _registry = TokenRegistry(entries, version, built_at)
+    print(f"📇 Token registry refreshed: {len(_registry)} tokens (v{version})")
+    return _registry
+
+
+async def _refresh_loop():
+    """Refresh the registry whenever it is older than the refresh interval."""
+    interval = REGISTRY_REFRESH_HOURS * 3600
+    while True:
+        try:
+            age = time.time() - get_token_registry().built_at
+            if age >= interval:
+                await refresh_token_registry()
+                age = 0
+            await asyncio.sleep(max(interval - age, 60))
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            print(f"❌ Token registry refresh error: {e}")
+            await asyncio.sleep(300)
+
+
+def start_registry_refresh():
+    """Start the background registry refresh task."""
+    global _refresh_task
+    
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_loop())
+        return True
+    return False
+
+
+def stop_registry_refresh():
+    """Stop the background registry refresh task."""
+    global _refresh_task
+    
+    if _refresh_task and not _refresh_task.done():
+        _refresh_task.cancel()
+        _refresh_task = None
+        return True
+    return False
@@ -14,103 +14,21 @@ Features:
 
 import asyncio
 import json
+import secrets
 import time
 from datetime import datetime
-from typing import Dict, Optional, Callable, List, Set
+from typing import Dict, Optional, Callable, List
 from dataclasses import dataclass, field
 import websockets
 from websockets.exceptions import ConnectionClosed
 import httpx
 
+from src.api.token_registry import get_token_registry
+
 # Binance WebSocket endpoint (free, no API key needed)
 BINANCE_WS_URL = "wss://stream.binance.com:9443/ws"
 BINANCE_REST_URL = "https://api.binance.com/api/v3"
 
-# Token symbol mappings (our symbols -> Binance symbols)
-TOKEN_TO_BINANCE = {
-    # Major coins
-    "BTC": "btcusdt",
-    "ETH": "ethusdt",
-    "BNB": "bnbusdt",
-    "XRP": "xrpusdt",
-    "SOL": "solusdt",
-    "ADA": "adausdt",
-    "DOGE": "dogeusdt",
-    "DOT": "dotusdt",
-    "AVAX": "avaxusdt",
-    "MATIC": "maticusdt",
-    "LTC": "ltcusdt",
-    "LINK": "linkusdt",
-    "UNI": "uniusdt",
-    "ATOM": "atomusdt",
-    "ETC": "etcusdt",  # Ethereum Classic - ADDED
-    "XLM": "xlmusdt",  # Stellar
-    "ALGO": "algousdt",  # Algorand
-    "VET": "vetusdt",  # VeChain
-    "FIL": "filusdt",  # Filecoin
-    "AAVE": "aaveusdt",  # Aave
-    "EOS": "eosusdt",  # EOS
-    "XTZ": "xtzusdt",  # Tezos
-    "THETA": "thetausdt",  # Theta
-    "FTM": "ftmusdt",  # Fantom
-    "HBAR": "hbarusdt",  # Hedera
-    "EGLD": "egldusdt",  # MultiversX
-    "FLOW": "flowusdt",  # Flow
-    "AXS": "axsusdt",  # Axie Infinity
-    "SAND": "sandusdt",  # Sandbox
-    "MANA": "manausdt",  # Decentraland
-    "GRT": "grtusdt",  # The Graph
-    "CHZ": "chzusdt",  # Chiliz
-    "ENJ": "enjusdt",  # Enjin
-    "BAT": "batusdt",  # Basic Attention Token
-    "ZEC": "zecusdt",  # Zcash
-    "DASH": "dashusdt",  # Dash
-    "NEO": "neousdt",  # NEO
-    "WAVES": "wavesusdt",  # Waves
-    "KSM": "ksmusdt",  # Kusama
-    "CAKE": "cakeusdt",  # PancakeSwap
-    "CRV": "crvusdt",  # Curve
-    "SNX": "snxusdt",  # Synthetix
-    "COMP": "compusdt",  # Compound
-    "MKR": "mkrusdt",  # Maker
-    "YFI": "yfiusdt",  # Yearn Finance
-    "SUSHI": "sushiusdt",  # SushiSwap
-    "1INCH": "1inchusdt",  # 1inch
-    "ENS": "ensusdt",  # Ethereum Name Service
-    "LDO": "ldousdt",  # Lido DAO
-    "APE": "apeusdt",  # ApeCoin
-    "GMX": "gmxusdt",  # GMX
-    "RNDR": "rndrusdt",  # Render
-    "IMX": "imxusdt",  # Immutable X
-    "FET": "fetusdt",  # Fetch.ai
-    "AGIX": "agixusdt",  # SingularityNET
-    "OCEAN": "oceanusdt",  # Ocean Protocol
-    "WLD": "wldusdt",  # Worldcoin
-    # Layer 2 & New chains
-    "APT": "aptusdt",
-    "SUI": "suiusdt",
-    "SEI": "seiusdt",
-    "ARB": "arbusdt",
-    "OP": "opusdt",
-    "NEAR": "nearusdt",
-    "INJ": "injusdt",
-    "TIA": "tiausdt",
-    "STX": "stxusdt",  # Stacks
-    "MINA": "minausdt",  # Mina
-    "KAVA": "kavausdt",  # Kava
-    "ROSE": "roseusdt",  # Oasis
-    # Memecoins
-    "PEPE": "pepeusdt",
-    "SHIB": "shibusdt",
-    "WIF": "wifusdt",
-    "BONK": "bonkusdt",
-    "FLOKI": "flokiusdt",
-    "MEME": "memeusdt",
-}
-
-BINANCE_TO_TOKEN = {v: k for k, v in TOKEN_TO_BINANCE.items()}
-
-
 @dataclass
 class PriceData:
     """Real-time price data for a token."""
@@ -165,8 +83,17 @@ class RealTimePriceService:
         self._reconnect_delay = 1
         self._max_reconnect_delay = 60
         self._callbacks: List[Callable[[str, PriceData], None]] = []
-        self._subscribed_symbols: Set[str] = set(TOKEN_TO_BINANCE.keys())
+        # Called on every ticker message, unfiltered
+        self._tick_callbacks: List[Callable[[str, PriceData], None]] = []
         self._lock = asyncio.Lock()
+        # Incremented when a price changes (same >0.01% rule as callbacks);
+        # identifies a snapshot of _prices for the /prices/live ETag. The
+        # epoch tells snapshots of different processes apart (seq restarts)
+        self._seq = 0
+        self._epoch = secrets.token_hex(4)
+        # Price each symbol had at its last bump; moves are measured from it
+        # so a slow drift of sub-0.01% ticks still bumps once it adds up
+        self._published: Dict[str, float] = {}
         
         # Stablecoins always $1
         self._prices["USDC"] = PriceData(symbol="USDC", price=1.0, source="fixed")
@@ -192,18 +119,48 @@ class RealTimePriceService:
         """Get all price data objects."""
         return self._prices.copy()
     
+    @property
+    def snapshot_seq(self) -> int:
+        """
+        Sequence number of the current price snapshot. Bumped when a price
+        moves by more than 0.01% from where it stood at its last bump, not
+        on every ticker message, so the snapshot ETag stays valid while
+        prices are flat.
+        """
+        return self._seq
+    
+    @property
+    def snapshot_epoch(self) -> str:
+        """Random token for this process; snapshot_seq is only meaningful within it."""
+        return self._epoch
+    
+    def stale_count(self, max_age_seconds: int = 30) -> int:
+        """Number of prices that are currently stale."""
+        return sum(1 for p in self._prices.values() if p.is_stale(max_age_seconds))
+    
     def on_price_update(self, callback: Callable[[str, PriceData], None]):
         """Register callback for price updates."""
         self._callbacks.append(callback)
     
+    def on_tick(self, callback: Callable[[str, PriceData], None]):
+        """
+        Register callback for every ticker message, including those that
+        move the price by less than 0.01% (for consumers that must not miss
+        a slow drift, like alert evaluation).
+        """
+        self._tick_callbacks.append(callback)
+    
     def remove_callback(self, callback: Callable):
         """Remove a registered callback."""
         if callback in self._callbacks:
             self._callbacks.remove(callback)
+        if callback in self._tick_callbacks:
+            self._tick_callbacks.remove(callback)
     
-    async def _notify_callbacks(self, symbol: str, price_data: PriceData):
-        """Notify all registered callbacks of a price update."""
-        for callback in self._callbacks:
+    async def _notify_callbacks(self, symbol: str, price_data: PriceData,
+                                callbacks: Optional[List[Callable]] = None):
+        """Notify registered callbacks (default: price update callbacks) of a price."""
+        for callback in self._callbacks if callbacks is None else callbacks:
             try:
                 if asyncio.iscoroutinefunction(callback):
                     await callback(symbol, price_data)
@@ -220,10 +177,10 @@ class RealTimePriceService:
                 response = await client.get(f"{BINANCE_REST_URL}/ticker/24hr")
                 if response.status_code == 200:
                     tickers = response.json()
+                    registry = get_token_registry()
                     for ticker in tickers:
-                        binance_symbol = ticker["symbol"].lower()
-                        if binance_symbol in BINANCE_TO_TOKEN:
-                            our_symbol = BINANCE_TO_TOKEN[binance_symbol]
+                        our_symbol = registry.symbol_for_binance(ticker["symbol"])
+                        if our_symbol:
                             self._prices[our_symbol] = PriceData(
                                 symbol=our_symbol,
                                 price=float(ticker["lastPrice"]),
@@ -235,14 +192,21 @@ class RealTimePriceService:
                                 last_update=datetime.utcnow(),
                                 source="binance"
                             )
+                            self._published[our_symbol] = float(ticker["lastPrice"])
+                            self._seq += 1
                     print(f"📊 Loaded initial prices for {len(self._prices)} tokens")
         except Exception as e:
             print(f"⚠️ Failed to fetch initial prices: {e}")
     
     async def _connect_websocket(self):
-        """Connect to Binance WebSocket and subscribe to price streams."""
-        # Build subscription for all tokens
-        streams = [f"{TOKEN_TO_BINANCE[s]}@ticker" for s in self._subscribed_symbols if s in TOKEN_TO_BINANCE]
+        """
+        Connect to Binance WebSocket and subscribe to price streams.
+        Returns (to reconnect) when the token registry's Binance pairs change.
+        """
+        # Build subscription for every registered token with a Binance pair
+        registry = get_token_registry()
+        pairs = set(registry.binance_pairs().values())
+        streams = [f"{pair}@ticker" for pair in sorted(pairs)]
         
         # Combined stream URL
         stream_url = f"{BINANCE_WS_URL}/{'/'.join(streams[:20])}"  # Binance limits streams
@@ -257,6 +221,13 @@ class RealTimePriceService:
                 print("🔌 Connected to Binance WebSocket")
                 
                 while self._running:
+                    # A registry refresh swaps in a new registry; resubscribe
+                    # if it added or dropped pairs
+                    if get_token_registry() is not registry:
+                        registry = get_token_registry()
+                        if set(registry.binance_pairs().values()) != pairs:
+                            print("🔌 Token registry changed, resubscribing to Binance streams")
+                            break
                     try:
                         message = await asyncio.wait_for(ws.recv(), timeout=30)
                         await self._handle_message(message)
@@ -283,9 +254,8 @@ class RealTimePriceService:
             
             # Extract symbol and price
             if "s" in ticker:  # Symbol field
-                binance_symbol = ticker["s"].lower()
-                if binance_symbol in BINANCE_TO_TOKEN:
-                    our_symbol = BINANCE_TO_TOKEN[binance_symbol]
+                our_symbol = get_token_registry().symbol_for_binance(ticker["s"])
+                if our_symbol:
                     
                     price_data = PriceData(
                         symbol=our_symbol,
@@ -300,11 +270,19 @@ class RealTimePriceService:
                     )
                     
                     async with self._lock:
-                        old_price = self._prices.get(our_symbol)
                         self._prices[our_symbol] = price_data
+                        # Changed significantly (>0.01%) since the last bump?
+                        published = self._published.get(our_symbol)
+                        changed = (
+                            not published
+                            or abs(price_data.price - published) / published > 0.0001
+                        )
+                        if changed:
+                            self._published[our_symbol] = price_data.price
+                            self._seq += 1
                     
-                    # Notify callbacks if price changed significantly (>0.01%)
-                    if old_price is None or abs(price_data.price - old_price.price) / old_price.price > 0.0001:
+                    await self._notify_callbacks(our_symbol, price_data, self._tick_callbacks)
+                    if changed:
                         await self._notify_callbacks(our_symbol, price_data)
                         
         except json.JSONDecodeError:
@@ -21,6 +21,11 @@ from src.database.models import (
     update_trade_status,
     get_user_trades,
 )
+from src.database.candles import (
+    Candles,
+    CandleStore,
+    get_candle_store,
+)
 
 __all__ = [
     "User",
@@ -43,4 +48,7 @@ __all__ = [
     "record_trade",
     "update_trade_status",
     "get_user_trades",
+    "Candles",
+    "CandleStore",
+    "get_candle_store",
 ]
@@ -0,0 +1,275 @@
+"""
+Alert Store for Trade.apt
+=========================
+Durable storage for price alerts, so they survive restarts and crashes.
+
+- SQLite in WAL mode with its own connection (readers never block the
+  writer).
+- New alerts are written immediately; status changes (triggered,
+  cancelled) and deletions are queued and written in batches by the alert
+  engine's flusher, so a burst of triggers costs one transaction.
+- Startup reads active alerts as plain tuples for bulk loading into the
+  threshold index.
+- Alert type parameters (percent-move windows, cross hysteresis, repeat
+  cooldowns...) are stored as JSON in `params`.
+- Alerts belong to a user and carry a monotonic `seq` for cursor
+  pagination; triggered/cancelled alerts dropped from memory after the
+  retention window are flagged `archived` and listed from here.
+
+Usage:
+    store = get_alert_store()
+    store.insert(alert_id, "BTC", ">", 100000.0, created_at, None)
+    store.insert(alert_id, "APT", None, None, created_at, None,
+                 "percent_move", {"percent": 5, "window_seconds": 3600})
+    store.queue_status(alert_id, "triggered", triggered_at, price)
+    store.flush()
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+# Alert database path
+ALERT_DB_PATH = os.environ.get("ALERT_DB_PATH", "data/alerts.db")
+
+# Row layout returned by load_active() and get()
+AlertRow = Tuple[
+    str, str, Optional[str], Optional[float], str, Optional[str], Optional[str], Optional[float],
+    Optional[str], str, Optional[str], Optional[int], int,
+]
+ALERT_COLUMNS = (
+    "id, token, operator, target_price, status, created_at, triggered_at, triggered_price, message, "
+    "alert_type, params, user_id, seq"
+)
+
+_CREATE_ALERTS = """
+    CREATE TABLE IF NOT EXISTS alerts (
+        id TEXT PRIMARY KEY,
+        token TEXT NOT NULL,
+        operator TEXT,
+        target_price REAL,
+        status TEXT NOT NULL DEFAULT 'active',
+        created_at TEXT NOT NULL,
+        triggered_at TEXT,
+        triggered_price REAL,
+        message TEXT,
+        alert_type TEXT NOT NULL DEFAULT 'threshold',
+        params TEXT,
+        user_id INTEGER,
+        seq INTEGER,
+        archived INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+
+class AlertStore:
+    """
+    SQLite-backed alert storage with batched status writes.
+
+    Args:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = ALERT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._pending_status: List[tuple] = []
+        self._pending_deletes: List[tuple] = []
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_CREATE_ALERTS)
+        self._migrate()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_status_token ON alerts(status, token)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_alerts_owner ON alerts(user_id, status, token, seq)"
+        )
+        self._seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM alerts").fetchone()[0]
+
+    def _migrate(self):
+        """
+        Upgrade older tables: a threshold-only table (operator and
+        target_price NOT NULL, no alert_type/params) is rebuilt; ownership
+        columns are added, with seq backfilled in insertion order.
+        """
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(alerts)")}
+        if "alert_type" in columns:
+            if "seq" not in columns:
+                self._conn.execute("ALTER TABLE alerts ADD COLUMN user_id INTEGER")
+                self._conn.execute("ALTER TABLE alerts ADD COLUMN seq INTEGER")
+                self._conn.execute("ALTER TABLE alerts ADD COLUMN archived INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE alerts SET seq = rowid")
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DROP INDEX IF EXISTS idx_alerts_status_token")
+            self._conn.execute("ALTER TABLE alerts RENAME TO alerts_old")
+            self._conn.execute(_CREATE_ALERTS)
+            self._conn.execute(
+                "INSERT INTO alerts (id, token, operator, target_price, status, created_at, "
+                "triggered_at, triggered_price, message) "
+                "SELECT id, token, operator, target_price, status, created_at, "
+                "triggered_at, triggered_price, message FROM alerts_old"
+            )
+            self._conn.execute("UPDATE alerts SET seq = rowid")
+            self._conn.execute("DROP TABLE alerts_old")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def insert(
+        self,
+        alert_id: str,
+        token: str,
+        operator: Optional[str],
+        target_price: Optional[float],
+        created_at: str,
+        message: Optional[str],
+        alert_type: str = "threshold",
+        params: Optional[dict] = None,
+        user_id: Optional[int] = None,
+    ) -> int:
+        """
+        Write a new active alert (committed before returning).
+
+        Returns:
+            The alert's sequence number
+        """
+        with self._lock:
+            self._seq += 1
+            self._conn.execute(
+                "INSERT INTO alerts (id, token, operator, target_price, status, created_at, message, "
+                "alert_type, params, user_id, seq) VALUES (?, ?, ?, ?, 'active', ?, ?, ?, ?, ?, ?)",
+                (alert_id, token, operator, target_price, created_at, message,
+                 alert_type, json.dumps(params) if params else None, user_id, self._seq),
+            )
+            return self._seq
+
+    def queue_status(
+        self,
+        alert_id: str,
+        status: str,
+        triggered_at: Optional[str] = None,
+        triggered_price: Optional[float] = None,
+    ):
+        """Queue a status change for the next flush."""
+        self._pending_status.append((status, triggered_at, triggered_price, alert_id))
+
+    def queue_delete(self, alert_id: str):
+        """Queue a deletion for the next flush."""
+        self._pending_deletes.append((alert_id,))
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_status) + len(self._pending_deletes)
+
+    def flush(self) -> int:
+        """
+        Write all queued status changes and deletions in one transaction.
+
+        Returns:
+            Number of queued operations written
+        """
+        # Swap the queues first so writes queued meanwhile go to the next batch
+        status, self._pending_status = self._pending_status, []
+        deletes, self._pending_deletes = self._pending_deletes, []
+        if not status and not deletes:
+            return 0
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if status:
+                    self._conn.executemany(
+                        "UPDATE alerts SET status = ?, triggered_at = ?, triggered_price = ? WHERE id = ?",
+                        status,
+                    )
+                if deletes:
+                    self._conn.executemany("DELETE FROM alerts WHERE id = ?", deletes)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Put the batch back so it is retried
+                self._pending_status[:0] = status
+                self._pending_deletes[:0] = deletes
+                raise
+        return len(status) + len(deletes)
+
+    def load_active(self) -> List[AlertRow]:
+        """All active alerts as plain rows (ALERT_COLUMNS order)."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {ALERT_COLUMNS} FROM alerts WHERE status = 'active'"
+            ).fetchall()
+
+    def archive(self, alert_ids: List[str]):
+        """Flag alerts as archived (no longer held in memory)."""
+        with self._lock:
+            self._conn.executemany("UPDATE alerts SET archived = 1 WHERE id = ?", [(i,) for i in alert_ids])
+
+    def archive_finished(self) -> int:
+        """Flag every triggered/cancelled alert archived (at startup nothing finished is in memory)."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE alerts SET archived = 1 WHERE status != 'active' AND archived = 0"
+            ).rowcount
+
+    def list_archived(
+        self,
+        user_id: Optional[int],
+        statuses: List[str],
+        token: Optional[str] = None,
+        before: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[AlertRow]:
+        """One page of a user's archived alerts, newest (highest seq) first."""
+        sql = (
+            f"SELECT {ALERT_COLUMNS} FROM alerts WHERE user_id IS ? AND archived = 1 "
+            f"AND status IN ({', '.join('?' * len(statuses))})"
+        )
+        args: list = [user_id, *statuses]
+        if token is not None:
+            sql += " AND token = ?"
+            args.append(token)
+        if before is not None:
+            sql += " AND seq < ?"
+            args.append(before)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def get(self, alert_id: str) -> Optional[AlertRow]:
+        """One alert row by id, or None."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {ALERT_COLUMNS} FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM alerts GROUP BY status"
+            ).fetchall())
+        return {"path": self.path, "rows": counts, "pending_writes": self.pending}
+
+
+_store: Optional[AlertStore] = None
+
+
+def get_alert_store() -> AlertStore:
+    """Get the global alert store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = AlertStore(ALERT_DB_PATH)
+    return _store
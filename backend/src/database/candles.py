@@ -0,0 +1,392 @@
+"""
+Candle Store for Trade.apt
+==========================
+Local on-disk store of OHLCV bars, so historical queries (charts, coin
+analysis) don't depend on upstream latency or rate limits.
+
+Bars live in their own SQLite file in a WITHOUT ROWID table keyed by
+(symbol, interval, ts), so the table itself is clustered on that key and
+a (symbol, interval, time window) read is one contiguous range scan.
+
+- Writes are append-only: a bar that is already stored is never rewritten,
+  except the latest bar of a series (it may still be forming).
+- Reads return NumPy columns.
+- Compaction rolls bars older than a retention window up into the next
+  coarser interval, deletes them and reclaims the space.
+
+Usage:
+    store = get_candle_store()
+    store.append("BTC", "1h", rows)   # rows: (ts, open, high, low, close, volume)
+    candles = store.read_range("BTC", "1h", start_ms, end_ms)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Candle database path (separate from the main app database)
+CANDLE_DB_PATH = os.environ.get("CANDLE_DB_PATH", "data/candles.db")
+
+# Supported bar intervals (Binance naming) in milliseconds
+INTERVAL_MS = {
+    "1m": 60 * 1000,
+    "5m": 5 * 60 * 1000,
+    "15m": 15 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+}
+
+# Default compaction: fine bars older than this (ms) are rolled up into
+# the given coarser interval
+DEFAULT_RETENTION = {
+    "1m": (2 * 24 * 60 * 60 * 1000, "5m"),
+    "5m": (14 * 24 * 60 * 60 * 1000, "1h"),
+    "15m": (30 * 24 * 60 * 60 * 1000, "1h"),
+    "1h": (400 * 24 * 60 * 60 * 1000, "1d"),
+}
+
+Row = Tuple[int, float, float, float, float, float]
+
+
+@dataclass
+class Candles:
+    """OHLCV bars for one (symbol, interval) as NumPy columns."""
+    symbol: str
+    interval: str
+    timestamps: np.ndarray  # int64, bar open time in ms
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray      # quote (USD) volume per bar
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_rows(cls, symbol: str, interval: str, rows: Sequence[Row]) -> "Candles":
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        return cls(
+            symbol=symbol,
+            interval=interval,
+            timestamps=data[:, 0].astype(np.int64),
+            open=data[:, 1].copy(),
+            high=data[:, 2].copy(),
+            low=data[:, 3].copy(),
+            close=data[:, 4].copy(),
+            volume=data[:, 5].copy(),
+        )
+
+
+def aggregate_candles(candles: Candles, interval: str) -> Candles:
+    """
+    Roll bars up into a coarser interval (bars aligned to epoch multiples).
+    Open is the first bar's open, close the last bar's close, high/low the
+    extremes and volume the sum.
+    """
+    step = INTERVAL_MS[interval]
+    if not len(candles):
+        return Candles.from_rows(candles.symbol, interval, [])
+
+    buckets = candles.timestamps // step * step
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets)) - 1
+
+    return Candles(
+        symbol=candles.symbol,
+        interval=interval,
+        timestamps=buckets[starts],
+        open=candles.open[starts],
+        high=np.maximum.reduceat(candles.high, starts),
+        low=np.minimum.reduceat(candles.low, starts),
+        close=candles.close[ends],
+        volume=np.add.reduceat(candles.volume, starts),
+    )
+
+
+class CandleStore:
+    """
+    SQLite-backed OHLCV store.
+
+    Args:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = CANDLE_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        # auto_vacuum only applies if set before the file is first written
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candles (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                volume REAL NOT NULL,
+                PRIMARY KEY (symbol, interval, ts)
+            ) WITHOUT ROWID
+        """)
+        # Resume points for jobs filling the store (e.g. kline backfill)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                next_ts INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (symbol, interval)
+            ) WITHOUT ROWID
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        """Open time of the latest stored bar, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(ts) FROM candles WHERE symbol = ? AND interval = ?",
+                (symbol.upper(), interval),
+            ).fetchone()
+        return row[0]
+
+    def first_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        """Open time of the earliest stored bar, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(ts) FROM candles WHERE symbol = ? AND interval = ?",
+                (symbol.upper(), interval),
+            ).fetchone()
+        return row[0]
+
+    def get_checkpoint(self, symbol: str, interval: str) -> Optional[int]:
+        """Saved resume point (ms) for a series, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT next_ts FROM checkpoints WHERE symbol = ? AND interval = ?",
+                (symbol.upper(), interval),
+            ).fetchone()
+        return row[0] if row else None
+
+    def append(
+        self,
+        symbol: str,
+        interval: str,
+        rows: Iterable[Row],
+        checkpoint: Optional[int] = None,
+    ) -> int:
+        """
+        Append bars for one series in a single transaction.
+
+        Bars already stored are left untouched, except the latest stored
+        bar, which is replaced (it may have been written while still open).
+
+        Args:
+            symbol: Token symbol
+            interval: Bar interval (see INTERVAL_MS)
+            rows: (ts, open, high, low, close, volume) tuples
+            checkpoint: Resume point to save in the same transaction
+
+        Returns:
+            Number of rows written
+        """
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unsupported interval '{interval}'")
+        symbol = symbol.upper()
+        rows = list(rows)
+        if not rows and checkpoint is None:
+            return 0
+
+        with self._lock:
+            last = self._conn.execute(
+                "SELECT MAX(ts) FROM candles WHERE symbol = ? AND interval = ?",
+                (symbol, interval),
+            ).fetchone()[0]
+            last = -1 if last is None else last
+            self._conn.execute("BEGIN")
+            try:
+                cursor = self._conn.executemany(
+                    """
+                    INSERT INTO candles (symbol, interval, ts, open, high, low, close, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (symbol, interval, ts) DO UPDATE SET
+                        open = excluded.open, high = excluded.high, low = excluded.low,
+                        close = excluded.close, volume = excluded.volume
+                    WHERE excluded.ts >= ?
+                    """,
+                    ((symbol, interval, int(r[0]), *map(float, r[1:6]), last) for r in rows),
+                )
+                if checkpoint is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+                        (symbol, interval, int(checkpoint), time.time()),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def read_range(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> Candles:
+        """
+        Read bars with start_ms <= ts <= end_ms (either bound optional).
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT ts, open, high, low, close, volume FROM candles
+                WHERE symbol = ? AND interval = ? AND ts >= ? AND ts <= ?
+                ORDER BY ts
+                """,
+                (
+                    symbol,
+                    interval,
+                    start_ms if start_ms is not None else -(2 ** 63),
+                    end_ms if end_ms is not None else 2 ** 63 - 1,
+                ),
+            ).fetchall()
+        return Candles.from_rows(symbol, interval, rows)
+
+    def read_window(
+        self,
+        symbol: str,
+        interval: str,
+        window_ms: int,
+        now_ms: Optional[int] = None,
+        max_age_ms: Optional[int] = None,
+    ) -> Optional[Candles]:
+        """
+        Read the trailing window if the store fully covers it: the first
+        bar is at or before the window start and the latest bar is no more
+        than max_age_ms (default two intervals) old. Otherwise None (the
+        caller should go upstream).
+        """
+        if interval not in INTERVAL_MS:
+            return None
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        step = INTERVAL_MS[interval]
+        start_ms = now_ms - window_ms
+        max_age_ms = max_age_ms if max_age_ms is not None else 2 * step
+
+        first = self.first_timestamp(symbol, interval)
+        last = self.last_timestamp(symbol, interval)
+        if first is None or first > start_ms + step or last < now_ms - max_age_ms:
+            return None
+        return self.read_range(symbol, interval, start_ms, now_ms)
+
+    def series_keys(self) -> List[Tuple[str, str]]:
+        """All stored (symbol, interval) pairs."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT DISTINCT symbol, interval FROM candles ORDER BY symbol, interval"
+            ).fetchall()
+
+    def compact(
+        self,
+        retention: Optional[Dict[str, Tuple[int, str]]] = None,
+        now_ms: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Roll old fine-grained bars up into coarser intervals and reclaim space.
+
+        For each interval with a retention (max age ms, target interval),
+        bars older than the cutoff are aggregated into the target interval
+        (filling only buckets that aren't stored yet) and deleted. Only
+        whole target buckets are rolled up.
+
+        Returns:
+            Counts of rows rolled up and deleted
+        """
+        retention = DEFAULT_RETENTION if retention is None else retention
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        stats = {"rolled_up": 0, "deleted": 0}
+
+        for symbol, interval in self.series_keys():
+            if interval not in retention:
+                continue
+            max_age, target = retention[interval]
+            target_step = INTERVAL_MS[target]
+            cutoff = (now_ms - max_age) // target_step * target_step
+
+            old = self.read_range(symbol, interval, end_ms=cutoff - 1)
+            if not len(old):
+                continue
+            rolled = aggregate_candles(old, target)
+
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    cursor = self._conn.executemany(
+                        """
+                        INSERT OR IGNORE INTO candles
+                            (symbol, interval, ts, open, high, low, close, volume)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        zip(
+                            [symbol] * len(rolled), [target] * len(rolled),
+                            rolled.timestamps.tolist(), rolled.open.tolist(),
+                            rolled.high.tolist(), rolled.low.tolist(),
+                            rolled.close.tolist(), rolled.volume.tolist(),
+                        ),
+                    )
+                    stats["rolled_up"] += cursor.rowcount
+                    cursor = self._conn.execute(
+                        "DELETE FROM candles WHERE symbol = ? AND interval = ? AND ts < ?",
+                        (symbol, interval, cutoff),
+                    )
+                    stats["deleted"] += cursor.rowcount
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+        with self._lock:
+            self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return stats
+
+    def get_stats(self) -> dict:
+        """Get bar counts per interval and the file size."""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT interval, COUNT(*) FROM candles GROUP BY interval"
+            ).fetchall())
+        return {
+            "path": self.path,
+            "series": len(self.series_keys()),
+            "bars": counts,
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+
+_store: Optional[CandleStore] = None
+
+
+def get_candle_store() -> CandleStore:
+    """Get the global candle store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = CandleStore(CANDLE_DB_PATH)
+    return _store
@@ -0,0 +1,503 @@
+"""
+Alert Delivery Pipeline
+=======================
+Decouples triggering an alert from notifying anyone about it.
+
+Triggering only appends to a bounded queue (never blocks, never awaits).
+A dispatcher task turns queued triggers into events and fans them out to:
+- subscribers (SSE / WebSocket connections of the alert's owner), each
+  with its own bounded queue - a slow subscriber loses its oldest events instead of slowing
+  anyone else down
+- webhook destinations, each with its own bounded queue and sender task
+  that batches events per destination and POSTs them through a pooled
+  HTTP client, retrying with exponential backoff. Webhooks belong to a
+  user and only receive that user's alerts (those in ALERT_WEBHOOK_URLS
+  are operator-configured and receive all alerts); user webhooks must
+  resolve to public addresses, which is enforced again on every
+  connection (so a host re-pointed after the check can't be reached)
+- callbacks, each with its own bounded queue and task, so a slow callback
+  only delays itself
+
+Latency from trigger to delivery is tracked per channel.
+
+Usage:
+    delivery = get_alert_delivery()
+    delivery.publish(alert, price)          # from the trigger path
+    queue = delivery.subscribe()            # from an SSE/WebSocket handler
+    event = await queue.get()
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+from src.api.resilience import LatencyTracker
+
+# Pending triggers waiting for the dispatcher
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "10000"))
+
+# Buffered events per subscriber / per webhook destination
+ALERT_SUBSCRIBER_BUFFER = int(os.getenv("ALERT_SUBSCRIBER_BUFFER", "100"))
+ALERT_WEBHOOK_BUFFER = int(os.getenv("ALERT_WEBHOOK_BUFFER", "1000"))
+
+# Webhook destinations (comma-separated URLs), batching and retries
+ALERT_WEBHOOK_URLS = [u.strip() for u in os.getenv("ALERT_WEBHOOK_URLS", "").split(",") if u.strip()]
+ALERT_WEBHOOK_BATCH_SIZE = int(os.getenv("ALERT_WEBHOOK_BATCH_SIZE", "50"))
+ALERT_WEBHOOK_BATCH_WINDOW = float(os.getenv("ALERT_WEBHOOK_BATCH_WINDOW", "0.2"))
+ALERT_WEBHOOK_RETRIES = int(os.getenv("ALERT_WEBHOOK_RETRIES", "3"))
+
+# Webhook destinations one user may register
+ALERT_WEBHOOKS_PER_USER = int(os.getenv("ALERT_WEBHOOKS_PER_USER", "5"))
+
+
+def _put_dropping_oldest(queue: asyncio.Queue, item) -> bool:
+    """
+    Put without waiting; if the queue is full, drop its oldest item.
+
+    Returns:
+        True if an item had to be dropped
+    """
+    dropped = False
+    while True:
+        try:
+            queue.put_nowait(item)
+            return dropped
+        except asyncio.QueueFull:
+            try:
+                queue.get_nowait()
+                dropped = True
+            except asyncio.QueueEmpty:
+                pass
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def _resolve_public(host: str, port: int) -> List[str]:
+    """
+    Resolve a host, requiring every address to be public.
+
+    Raises:
+        ValueError: Unresolvable host or non-public address
+    """
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Cannot resolve webhook host {host}")
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    if not addresses or not all(_is_public_address(a) for a in addresses):
+        raise ValueError("Webhook host must resolve to public addresses only")
+    return addresses
+
+
+async def check_webhook_url(url: str):
+    """
+    Check that a user webhook is an http(s) URL whose host resolves only to
+    public addresses (no loopback, private, link-local or reserved ranges).
+
+    Raises:
+        ValueError: Invalid URL, unresolvable host or non-public address
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise ValueError("Invalid webhook URL")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("Webhook URL must be http(s) with a host")
+    await _resolve_public(parts.hostname, port or (443 if parts.scheme == "https" else 80))
+
+
+class _PublicOnlyBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend for user webhooks: resolves the host itself and only
+    connects to the public addresses it validated, so DNS can't be
+    re-pointed between the check and the connection. TLS still runs
+    against the URL's hostname (SNI and certificate), and the Host header
+    is unchanged.
+    """
+
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await _resolve_public(host, port)
+        except ValueError as e:
+            raise httpcore.ConnectError(str(e))
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise httpcore.ConnectError("Webhooks cannot use unix sockets")
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+def _public_only_transport(limits: httpx.Limits) -> httpx.AsyncHTTPTransport:
+    """An httpx transport whose connections go through _PublicOnlyBackend."""
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    # httpx (pinned) has no network backend option: rebuild its pool with one
+    pool = transport._pool
+    transport._pool = httpcore.AsyncConnectionPool(
+        ssl_context=pool._ssl_context,
+        max_connections=limits.max_connections,
+        max_keepalive_connections=limits.max_keepalive_connections,
+        keepalive_expiry=limits.keepalive_expiry,
+        network_backend=_PublicOnlyBackend(),
+    )
+    return transport
+
+
+class WebhookDestination:
+    """
+    One webhook URL with its own buffer and sender task.
+
+    Args:
+        url: Destination URL
+        user_id: Owner whose alerts it receives (ignored if all_users)
+        all_users: Operator-configured destination receiving every alert
+    """
+
+    def __init__(self, url: str, user_id: Optional[int] = None, all_users: bool = False):
+        self.url = url
+        self.user_id = user_id
+        self.all_users = all_users
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=ALERT_WEBHOOK_BUFFER)
+        self.task: Optional[asyncio.Task] = None
+        self.latency = LatencyTracker()
+        self.stats = {"delivered": 0, "batches": 0, "retries": 0, "failed": 0, "dropped": 0}
+
+    def accepts(self, owner: Optional[int]) -> bool:
+        return self.all_users or self.user_id == owner
+
+
+class CallbackConsumer:
+    """One callback with its own buffer and task."""
+
+    def __init__(self, callback: Callable[[Any, float], Any]):
+        self.callback = callback
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=ALERT_QUEUE_SIZE)
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {"called": 0, "failed": 0, "dropped": 0}
+
+
+# Webhook key: (owner, url); operator destinations use owner None
+WebhookKey = Tuple[Optional[int], str]
+
+
+class AlertDelivery:
+    """Queue-based fan-out of triggered alerts."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=ALERT_QUEUE_SIZE)
+        self._subscribers: Dict[asyncio.Queue, Optional[int]] = {}  # queue -> user id
+        self._webhooks: Dict[WebhookKey, WebhookDestination] = {}
+        self._callbacks: List[CallbackConsumer] = []
+        self._client: Optional[httpx.AsyncClient] = None       # operator webhooks
+        self._user_client: Optional[httpx.AsyncClient] = None  # user webhooks (public only)
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._subscriber_latency = LatencyTracker()
+        self._stats = {"published": 0, "dropped": 0, "subscriber_dropped": 0, "dispatched": 0}
+        for url in ALERT_WEBHOOK_URLS:
+            self._webhooks[(None, url)] = WebhookDestination(url, all_users=True)
+
+    # -- Producers ---------------------------------------------------------
+
+    def publish(self, alert, price: float):
+        """
+        Queue a triggered alert for delivery. Never blocks: when the queue
+        is full the oldest pending trigger is dropped.
+        """
+        self._stats["published"] += 1
+        if _put_dropping_oldest(self._queue, (alert, price, time.monotonic())):
+            self._stats["dropped"] += 1
+
+    # -- Consumers ---------------------------------------------------------
+
+    def subscribe(self, user_id: Optional[int] = None) -> asyncio.Queue:
+        """
+        Register a subscriber for one user's alerts (None: alerts created
+        without a session); events arrive on the returned queue.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=ALERT_SUBSCRIBER_BUFFER)
+        self._subscribers[queue] = user_id
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def record_delivered(self, event: dict):
+        """Record trigger-to-client latency for a subscriber event."""
+        self._subscriber_latency.record(time.monotonic() - event["_queued_at"])
+
+    def add_callback(self, callback: Callable[[Any, float], Any]):
+        """
+        Register a function called per alert (sync or async). Each callback
+        runs in its own task, off the dispatch path.
+        """
+        if any(consumer.callback == callback for consumer in self._callbacks):
+            return
+        consumer = CallbackConsumer(callback)
+        self._callbacks.append(consumer)
+        if self._dispatcher is not None:
+            consumer.task = asyncio.create_task(self._callback_runner(consumer))
+
+    async def add_webhook(self, url: str, user_id: int) -> bool:
+        """
+        Add a webhook destination for one user's alerts.
+
+        Returns:
+            False if the user already has this URL
+
+        Raises:
+            ValueError: Non-public or invalid URL, or too many webhooks
+        """
+        if (user_id, url) in self._webhooks:
+            return False
+        await check_webhook_url(url)
+        if len(self.webhooks(user_id)) >= ALERT_WEBHOOKS_PER_USER:
+            raise ValueError(f"At most {ALERT_WEBHOOKS_PER_USER} webhooks per user")
+        destination = WebhookDestination(url, user_id)
+        self._webhooks[(user_id, url)] = destination
+        if self._dispatcher is not None:
+            destination.task = asyncio.create_task(self._webhook_sender(destination))
+        return True
+
+    def remove_webhook(self, url: str, user_id: int) -> bool:
+        """Remove one of a user's webhooks (its undelivered events are dropped)."""
+        destination = self._webhooks.pop((user_id, url), None)
+        if destination is None:
+            return False
+        if destination.task:
+            destination.task.cancel()
+        return True
+
+    def webhooks(self, user_id: int) -> List[str]:
+        """A user's webhook URLs."""
+        return [d.url for d in self._webhooks.values() if not d.all_users and d.user_id == user_id]
+
+    def webhook_stats(self, user_id: int) -> Dict[str, dict]:
+        """Delivery counters and latency of a user's webhooks."""
+        return {
+            d.url: self._webhook_stats(d)
+            for d in self._webhooks.values()
+            if not d.all_users and d.user_id == user_id
+        }
+
+    # -- Tasks -------------------------------------------------------------
+
+    @staticmethod
+    def _event(alert, price: float, queued_at: float) -> dict:
+        return {
+            "type": "alert_triggered",
+            "alert": alert.model_dump(mode="json"),
+            "price": price,
+            "_queued_at": queued_at,
+        }
+
+    async def _dispatch_loop(self):
+        """Fan queued triggers out to subscribers, webhooks and callbacks (never awaits them)."""
+        while True:
+            alert, price, queued_at = await self._queue.get()
+            try:
+                event = self._event(alert, price, queued_at)
+                self._stats["dispatched"] += 1
+
+                owner = getattr(alert, "user_id", None)
+                for queue, user_id in list(self._subscribers.items()):
+                    if user_id != owner:
+                        continue
+                    if _put_dropping_oldest(queue, event):
+                        self._stats["subscriber_dropped"] += 1
+
+                for destination in self._webhooks.values():
+                    if not destination.accepts(owner):
+                        continue
+                    if _put_dropping_oldest(destination.queue, event):
+                        destination.stats["dropped"] += 1
+
+                for consumer in self._callbacks:
+                    if _put_dropping_oldest(consumer.queue, (alert, price)):
+                        consumer.stats["dropped"] += 1
+            except Exception as e:
+                print(f"❌ Alert dispatch error: {e}")
+
+    async def _callback_runner(self, consumer: CallbackConsumer):
+        """Call one callback per queued alert; errors are logged, never fatal."""
+        while True:
+            alert, price = await consumer.queue.get()
+            try:
+                result = consumer.callback(alert, price)
+                if asyncio.iscoroutine(result):
+                    await result
+                consumer.stats["called"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                consumer.stats["failed"] += 1
+                print(f"❌ Alert callback error: {e}")
+
+    async def _next_batch(self, destination: WebhookDestination) -> List[dict]:
+        """Wait for one event, then gather more for up to the batch window."""
+        batch = [await destination.queue.get()]
+        deadline = time.monotonic() + ALERT_WEBHOOK_BATCH_WINDOW
+        while len(batch) < ALERT_WEBHOOK_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(destination.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _webhook_sender(self, destination: WebhookDestination):
+        """Deliver batches to one webhook; a failed batch never stops the sender."""
+        while True:
+            batch = await self._next_batch(destination)
+            try:
+                await self._deliver(destination, batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                destination.stats["failed"] += len(batch)
+                print(f"❌ Webhook {destination.url} delivery error: {type(e).__name__}: {e}")
+
+    async def _deliver(self, destination: WebhookDestination, batch: List[dict]):
+        """POST one batch with retries and backoff."""
+        client = self._client if destination.all_users else self._user_client
+        body = {"alerts": [{k: v for k, v in e.items() if k != "_queued_at"} for e in batch]}
+
+        for attempt in range(ALERT_WEBHOOK_RETRIES + 1):
+            try:
+                response = await client.post(destination.url, json=body)
+                if response.status_code < 500 and response.status_code != 429:
+                    response.raise_for_status()
+                    now = time.monotonic()
+                    for event in batch:
+                        destination.latency.record(now - event["_queued_at"])
+                    destination.stats["delivered"] += len(batch)
+                    destination.stats["batches"] += 1
+                    break
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPStatusError as e:
+                # Other client errors won't succeed on retry
+                print(f"⚠️ Webhook {destination.url} rejected batch: {e.response.status_code}")
+                destination.stats["failed"] += len(batch)
+                break
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+
+            if attempt < ALERT_WEBHOOK_RETRIES:
+                destination.stats["retries"] += 1
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            else:
+                print(f"❌ Webhook {destination.url} failed after retries: {error}")
+                destination.stats["failed"] += len(batch)
+
+    def start(self) -> bool:
+        """Start the dispatcher, webhook senders and callback tasks."""
+        if self._dispatcher is not None and not self._dispatcher.done():
+            return False
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        self._client = httpx.AsyncClient(timeout=10.0, limits=limits)
+        self._user_client = httpx.AsyncClient(timeout=10.0, transport=_public_only_transport(limits))
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        for destination in self._webhooks.values():
+            destination.task = asyncio.create_task(self._webhook_sender(destination))
+        for consumer in self._callbacks:
+            consumer.task = asyncio.create_task(self._callback_runner(consumer))
+        return True
+
+    async def stop(self):
+        """Stop all delivery tasks and close the HTTP clients."""
+        tasks = (
+            [self._dispatcher]
+            + [d.task for d in self._webhooks.values()]
+            + [c.task for c in self._callbacks]
+        )
+        for task in tasks:
+            if task and not task.done():
+                task.cancel()
+        await asyncio.gather(*(t for t in tasks if t), return_exceptions=True)
+        self._dispatcher = None
+        for destination in self._webhooks.values():
+            destination.task = None
+        for consumer in self._callbacks:
+            consumer.task = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+        if self._user_client:
+            await self._user_client.aclose()
+            self._user_client = None
+
+    # -- Metrics -----------------------------------------------------------
+
+    @staticmethod
+    def _latency(tracker: LatencyTracker) -> dict:
+        p50 = tracker.percentile(50)
+        p95 = tracker.percentile(95)
+        return {
+            "samples": len(tracker),
+            "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        }
+
+    def _webhook_stats(self, destination: WebhookDestination) -> dict:
+        return {
+            **destination.stats,
+            "queued": destination.queue.qsize(),
+            "latency": self._latency(destination.latency),
+        }
+
+    def get_stats(self) -> dict:
+        """
+        Queue depths, counters and delivery latency per channel. User
+        webhooks are only counted in aggregate (see webhook_stats()).
+        """
+        user_webhooks = [d for d in self._webhooks.values() if not d.all_users]
+        return {
+            **self._stats,
+            "queued": self._queue.qsize(),
+            "subscribers": len(self._subscribers),
+            "subscriber_latency": self._latency(self._subscriber_latency),
+            "callbacks": [{"name": getattr(c.callback, "__name__", "callback"), **c.stats,
+                           "queued": c.queue.qsize()} for c in self._callbacks],
+            "webhooks": {d.url: self._webhook_stats(d) for d in self._webhooks.values() if d.all_users},
+            "user_webhooks": {
+                "count": len(user_webhooks),
+                **{key: sum(d.stats[key] for d in user_webhooks)
+                   for key in ("delivered", "batches", "retries", "failed", "dropped")},
+                "queued": sum(d.queue.qsize() for d in user_webhooks),
+            },
+        }
+
+
+_delivery: Optional[AlertDelivery] = None
+
+
+def get_alert_delivery() -> AlertDelivery:
+    """Get the global alert delivery pipeline."""
+    global _delivery
+    if _delivery is None:
+        _delivery = AlertDelivery()
+    return _delivery
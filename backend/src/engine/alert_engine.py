@@ -2,17 +2,38 @@
 Alert Engine Module
 ===================
 This module handles price alerts - users can register alerts that trigger
-when a token reaches a specific price. A background worker checks prices
-periodically and fires alerts when conditions are met.
+when a token reaches a specific price.
+
+Alerts are evaluated as live Binance ticks arrive (RealTimePriceService
+updates) for the tokens that have active alerts. The background worker
+polls REST prices only for tokens without a live feed.
 
 Features:
-- In-memory alert storage
-- Background price checking loop
-- Console notifications when alerts trigger
+- In-memory alert storage, persisted to SQLite (see database/alert_store.py)
+  and bulk-loaded into the threshold index at startup
+- Per-token sorted threshold index (a tick only touches crossed alerts)
+- Tick-driven evaluation, with a REST polling fallback
+- Alert types beyond static thresholds (engine/alert_rules.py): crossing
+  with hysteresis/debounce, percent move within a window, volume spike,
+  and repeating alerts with a cooldown - each keeps O(1) state updated
+  per tick
+- Alerts owned by the session user, listed per user with cursor
+  pagination (engine/alert_owners.py); triggered/cancelled alerts are
+  archived out of memory after ALERT_RETENTION_SECONDS
+- Optional sharding of evaluation across worker processes by token hash
+  (ALERT_SHARDS, engine/alert_shards.py)
+- Vectorized sweep over all active alerts (REST fallback and catch-up
+  after a feed outage or restart)
+- Triggers are handed to the delivery pipeline (engine/alert_delivery.py)
+  for console, SSE/WebSocket and webhook notification, so a slow consumer
+  never delays evaluation
 """
 
 import asyncio
-from datetime import datetime
+import json
+import time
+from collections import deque
+from datetime import datetime, timezone
 from typing import Optional, Callable
 from pydantic import BaseModel
 from enum import Enum
@@ -20,14 +41,37 @@ import uuid
 import os
 from dotenv import load_dotenv
 
-from src.api.price import get_token_price
-from src.engine.trade_engine import check_pending_trades
+from src.api.price_resolver import resolve_prices
+from src.api.websocket_price import PriceData, get_price_service
+from src.database.alert_store import AlertRow, get_alert_store
+from src.engine.alert_delivery import get_alert_delivery
+from src.engine.alert_index import AlertIndex
+from src.engine.alert_owners import OwnerIndex
+from src.engine.alert_rules import AlertRule, build_rule, validate_params
+from src.engine.alert_shards import ALERT_SHARDS, ShardPool, shard_of
+from src.engine.alert_sweep import AlertColumns
+from src.engine.trade_engine import (
+    check_pending_trades,
+    close_trade_journal,
+    load_pending_trades,
+    on_price_tick as on_trade_tick,
+)
 
 load_dotenv()
 
 # Get check interval from environment or default to 10 seconds
 ALERT_CHECK_INTERVAL = int(os.getenv("ALERT_CHECK_INTERVAL", "10"))
 
+# A live price older than this (seconds) no longer counts as a live feed
+LIVE_FEED_MAX_AGE = int(os.getenv("LIVE_FEED_MAX_AGE", "30"))
+
+# Seconds between batched writes of alert status changes
+ALERT_FLUSH_INTERVAL = float(os.getenv("ALERT_FLUSH_INTERVAL", "0.5"))
+
+# Triggered/cancelled alerts stay in memory this long (seconds), then are
+# only kept in storage
+ALERT_RETENTION_SECONDS = float(os.getenv("ALERT_RETENTION_SECONDS", "3600"))
+
 
 class AlertOperator(str, Enum):
     """Operators for price comparison."""
@@ -37,6 +81,14 @@ class AlertOperator(str, Enum):
     GREATER_EQUAL = ">="
 
 
+class AlertType(str, Enum):
+    """Kinds of alert condition."""
+    THRESHOLD = "threshold"
+    CROSS = "cross"
+    PERCENT_MOVE = "percent_move"
+    VOLUME_SPIKE = "volume_spike"
+
+
 class AlertStatus(str, Enum):
     """Status of an alert."""
     ACTIVE = "active"
@@ -48,26 +100,85 @@ class Alert(BaseModel):
     """Price alert model."""
     id: str
     token: str
-    operator: AlertOperator
-    target_price: float
+    user_id: Optional[int] = None  # owner (None: created without a session)
+    seq: int = 0  # creation order, used as the listing cursor
+    alert_type: AlertType = AlertType.THRESHOLD
+    operator: Optional[AlertOperator] = None  # threshold alerts
+    target_price: Optional[float] = None  # threshold and cross alerts
+    params: dict = {}  # type parameters (direction, percent, window_seconds, ...)
+    repeat: bool = False
+    cooldown_seconds: float = 0.0
     status: AlertStatus = AlertStatus.ACTIVE
     created_at: datetime
-    triggered_at: Optional[datetime] = None
+    triggered_at: Optional[datetime] = None  # last trigger, for repeating alerts
     triggered_price: Optional[float] = None
     message: Optional[str] = None
 
 
 class AlertRequest(BaseModel):
-    """Request to create a new alert."""
+    """
+    Request to create a new alert.
+    
+    threshold:    operator ("<", ">", "<=", ">=") and target_price
+    cross:        target_price, direction ("up"/"down"), optional
+                  hysteresis_percent and debounce_seconds
+    percent_move: percent and window_seconds, optional direction
+                  ("up"/"down"/"any")
+    volume_spike: multiplier and window_seconds
+    Any type can set repeat (with cooldown_seconds).
+    """
     token: str
-    operator: str  # "<", ">", "<=", ">="
-    target_price: float
+    alert_type: str = "threshold"
+    operator: Optional[str] = None
+    target_price: Optional[float] = None
+    direction: Optional[str] = None
+    percent: Optional[float] = None
+    window_seconds: Optional[float] = None
+    hysteresis_percent: Optional[float] = None
+    debounce_seconds: Optional[float] = None
+    multiplier: Optional[float] = None
+    repeat: bool = False
+    cooldown_seconds: float = 0.0
     message: Optional[str] = None
 
 
+# Request fields that are type parameters (stored in Alert.params)
+_PARAM_FIELDS = ("direction", "percent", "window_seconds", "hysteresis_percent", "debounce_seconds", "multiplier")
+
+
 # In-memory storage for alerts
 alerts: dict[str, Alert] = {}
 
+# Active alerts only, and their thresholds indexed per token
+active_alerts: dict[str, Alert] = {}
+alert_index = AlertIndex()
+
+# The same active alerts as NumPy columns, for bulk sweeps
+alert_columns = AlertColumns()
+
+# Stateful rules (non-threshold and repeating alerts) per token:
+# token -> alert id -> rule
+alert_rules: dict[str, dict[str, AlertRule]] = {}
+
+# Active alerts loaded from storage but not yet turned into Alert objects
+# (they are indexed; the model is built the first time one is needed)
+_unloaded: dict[str, AlertRow] = {}
+_loaded = False
+
+# Worker processes evaluating alerts when ALERT_SHARDS > 0 (the index,
+# columns and rules above then stay empty)
+alert_shards: Optional[ShardPool] = None
+
+# Alert ids per (user, status[, token]), for listing
+alert_owners = OwnerIndex()
+
+# (finish time, alert id) of triggered/cancelled alerts, oldest first,
+# for archiving after the retention window
+_finished: deque = deque()
+
+# Background flush task for batched status writes
+flush_task: Optional[asyncio.Task] = None
+
 # Background task reference
 background_task: Optional[asyncio.Task] = None
 
@@ -75,15 +186,19 @@ background_task: Optional[asyncio.Task] = None
 alert_callback: Optional[Callable[[Alert, float], None]] = None
 
 
-def create_alert(request: AlertRequest) -> Alert:
+def create_alert(request: AlertRequest, user_id: Optional[int] = None) -> Alert:
     """
     Create a new price alert.
     
     Args:
-        request: Alert request with token, operator, target_price
+        request: Alert request with token, alert type and its parameters
+        user_id: Owner of the alert (None without a session)
     
     Returns:
         Created Alert object
+    
+    Raises:
+        ValueError: Invalid type, operator or parameters
     """
     alert_id = str(uuid.uuid4())[:8]
     
@@ -95,39 +210,299 @@ def create_alert(request: AlertRequest) -> Alert:
         ">=": AlertOperator.GREATER_EQUAL,
     }
     
-    operator = operator_map.get(request.operator)
-    if operator is None:
-        raise ValueError(f"Invalid operator: {request.operator}. Use <, >, <=, or >=")
+    params = {f: getattr(request, f) for f in _PARAM_FIELDS if getattr(request, f) is not None}
+    validate_params(request.alert_type, {
+        **params,
+        "target_price": request.target_price,
+        "cooldown_seconds": request.cooldown_seconds,
+    })
+    alert_type = AlertType(request.alert_type)
+    
+    operator = None
+    if alert_type == AlertType.THRESHOLD:
+        operator = operator_map.get(request.operator)
+        if operator is None:
+            raise ValueError(f"Invalid operator: {request.operator}. Use <, >, <=, or >=")
+        if request.target_price is None:
+            raise ValueError("threshold alerts need a target_price")
     
     alert = Alert(
         id=alert_id,
         token=request.token.upper(),
+        user_id=user_id,
+        alert_type=alert_type,
         operator=operator,
-        target_price=request.target_price,
+        target_price=request.target_price if alert_type in (AlertType.THRESHOLD, AlertType.CROSS) else None,
+        params=params,
+        repeat=request.repeat,
+        cooldown_seconds=request.cooldown_seconds,
         status=AlertStatus.ACTIVE,
         created_at=datetime.utcnow(),
         message=request.message
     )
     
+    alert.seq = get_alert_store().insert(
+        alert.id, alert.token, operator.value if operator else None, alert.target_price,
+        alert.created_at.isoformat(), alert.message, alert.alert_type.value, _stored_params(alert),
+        user_id,
+    )
     alerts[alert_id] = alert
-    print(f"🔔 Alert created: {alert.token} {alert.operator.value} ${alert.target_price}")
+    alert_owners.add(alert.seq, alert.id, user_id, alert.status.value, alert.token)
+    _activate(alert)
+    print(f"🔔 Alert created: {describe_alert(alert)}")
     
     return alert
 
 
+def describe_alert(alert: Alert) -> str:
+    """Human-readable alert condition, e.g. "APT moves 5% within 3600s"."""
+    p = alert.params
+    if alert.alert_type == AlertType.CROSS:
+        text = f"{alert.token} crosses {p['direction']} ${alert.target_price}"
+    elif alert.alert_type == AlertType.PERCENT_MOVE:
+        direction = p.get("direction", "any")
+        text = f"{alert.token} moves {'' if direction == 'any' else direction + ' '}{p['percent']}% within {p['window_seconds']:g}s"
+    elif alert.alert_type == AlertType.VOLUME_SPIKE:
+        text = f"{alert.token} volume {p['multiplier']}x baseline over {p['window_seconds']:g}s"
+    else:
+        text = f"{alert.token} {alert.operator.value} ${alert.target_price}"
+    if alert.repeat:
+        text += f" (repeats, cooldown {alert.cooldown_seconds:g}s)"
+    return text
+
+
+def _stored_params(alert: Alert) -> Optional[dict]:
+    """Type parameters plus repeat settings, as stored in the params column."""
+    params = dict(alert.params)
+    if alert.repeat:
+        params["repeat"] = True
+        params["cooldown_seconds"] = alert.cooldown_seconds
+    return params or None
+
+
+def _uses_rule(alert: Alert) -> bool:
+    """Whether an alert is evaluated by a stateful rule instead of the threshold index."""
+    return alert.alert_type != AlertType.THRESHOLD or alert.repeat
+
+
+def _rule_args(alert: Alert) -> tuple[str, dict, Optional[float]]:
+    """(kind, params, last_fired) for build_rule."""
+    last_fired = None
+    if alert.repeat and alert.triggered_at is not None:
+        last_fired = alert.triggered_at.replace(tzinfo=timezone.utc).timestamp()
+    return alert.alert_type.value, {
+        **alert.params,
+        "operator": alert.operator.value if alert.operator else None,
+        "target_price": alert.target_price,
+        "repeat": alert.repeat,
+        "cooldown_seconds": alert.cooldown_seconds,
+    }, last_fired
+
+
+def _activate(alert: Alert):
+    """Add an active alert to the active set and threshold index (or rules, or its shard)."""
+    active_alerts[alert.id] = alert
+    if alert_shards is not None:
+        if _uses_rule(alert):
+            alert_shards.add_rule(alert.id, alert.token, *_rule_args(alert))
+        else:
+            alert_shards.add(alert.id, alert.token, alert.operator.value, alert.target_price)
+        return
+    if _uses_rule(alert):
+        alert_rules.setdefault(alert.token, {})[alert.id] = build_rule(*_rule_args(alert))
+        return
+    alert_index.add(alert.id, alert.token, alert.operator.value, alert.target_price)
+    alert_columns.add(alert.id, alert.token, alert.operator.value, alert.target_price)
+
+
+def _remove_rule(alert: Alert):
+    rules = alert_rules.get(alert.token)
+    if rules is not None and rules.pop(alert.id, None) is not None and not rules:
+        del alert_rules[alert.token]
+
+
+def _deactivate(alert: Alert):
+    """Remove an alert from the active set and threshold index (or rules)."""
+    active_alerts.pop(alert.id, None)
+    if alert_shards is not None:
+        alert_shards.remove(alert.id)
+    alert_index.remove(alert.id)
+    alert_columns.remove(alert.id)
+    _remove_rule(alert)
+
+
+def _alert_from_row(row: AlertRow) -> Alert:
+    """Build an Alert from a trusted storage row without re-validating it."""
+    (alert_id, token, operator, target_price, status, created_at, triggered_at, triggered_price,
+     message, alert_type, params, user_id, seq) = row
+    params = json.loads(params) if params else {}
+    repeat = params.pop("repeat", False)
+    cooldown_seconds = params.pop("cooldown_seconds", 0.0)
+    return Alert.model_construct(
+        id=alert_id,
+        token=token,
+        user_id=user_id,
+        seq=seq,
+        alert_type=AlertType(alert_type),
+        operator=AlertOperator(operator) if operator else None,
+        target_price=target_price,
+        params=params,
+        repeat=repeat,
+        cooldown_seconds=cooldown_seconds,
+        status=AlertStatus(status),
+        created_at=datetime.fromisoformat(created_at),
+        triggered_at=datetime.fromisoformat(triggered_at) if triggered_at else None,
+        triggered_price=triggered_price,
+        message=message,
+    )
+
+
+def _materialize(alert_id: str) -> Optional[Alert]:
+    """Get an in-memory alert, building it first if it was only loaded as a row."""
+    alert = alerts.get(alert_id)
+    if alert is None:
+        row = _unloaded.pop(alert_id, None)
+        if row is not None:
+            alert = _alert_from_row(row)
+            alerts[alert_id] = alert
+            active_alerts[alert_id] = alert
+    return alert
+
+
+def _materialize_all():
+    for alert_id in list(_unloaded):
+        _materialize(alert_id)
+
+
+def load_alerts() -> int:
+    """
+    Load active alerts from storage into the threshold index (once).
+    Rows are grouped per token and heapified in bulk; Alert objects are
+    only built when an alert is read, cancelled or triggered. Rule-based
+    alerts are built right away (with fresh rule state). Finished alerts
+    are left in storage, flagged archived.
+    
+    Returns:
+        Number of active alerts loaded
+    """
+    global _loaded
+    if _loaded:
+        return 0
+    _loaded = True
+    
+    by_token: dict[str, list] = {}
+    store = get_alert_store()
+    store.archive_finished()
+    loaded = 0
+    for row in store.load_active():
+        if row[0] in alerts:
+            continue
+        loaded += 1
+        alert_owners.add(row[12], row[0], row[11], AlertStatus.ACTIVE.value, row[1])
+        if row[9] != AlertType.THRESHOLD.value or row[10]:
+            alert = _alert_from_row(row)
+            if _uses_rule(alert):
+                alerts[alert.id] = alert
+                _activate(alert)
+                continue
+        _unloaded[row[0]] = row
+        by_token.setdefault(row[1], []).append((row[0], row[2], row[3]))
+    
+    for token, entries in by_token.items():
+        if alert_shards is not None:
+            alert_shards.add_many(token, entries)
+        else:
+            alert_index.add_many(token, entries)
+            alert_columns.add_many(token, entries)
+    return loaded
+
+
+def _seed_shards(shard_id: Optional[int] = None):
+    """
+    Send every in-memory active alert to a newly started shard pool, or
+    only the alerts owned by one (restarted) shard.
+    """
+    def owned(token: str) -> bool:
+        return shard_id is None or shard_of(token, alert_shards.shards) == shard_id
+    
+    by_token: dict[str, list] = {}
+    for alert in active_alerts.values():
+        if not owned(alert.token):
+            continue
+        if _uses_rule(alert):
+            alert_shards.add_rule(alert.id, alert.token, *_rule_args(alert))
+        else:
+            by_token.setdefault(alert.token, []).append((alert.id, alert.operator.value, alert.target_price))
+    for row in _unloaded.values():
+        if owned(row[1]):
+            by_token.setdefault(row[1], []).append((row[0], row[2], row[3]))
+    for token, entries in by_token.items():
+        alert_shards.add_many(token, entries)
+
+
 def get_all_alerts() -> list[Alert]:
-    """Get all alerts (active, triggered, and cancelled)."""
+    """Get all in-memory alerts (active, and recently triggered/cancelled)."""
+    _materialize_all()
     return list(alerts.values())
 
 
+def list_alerts(
+    user_id: Optional[int],
+    status: Optional[str] = None,
+    token: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+) -> tuple[list[Alert], Optional[int]]:
+    """
+    List one user's alerts, newest first, a page at a time.
+    
+    In-memory alerts come from the owner index; archived ones are read from
+    storage and merged in by sequence number.
+    
+    Args:
+        user_id: Owner (None for alerts created without a session)
+        status: Only this status ("active", "triggered", "cancelled")
+        token: Only this token
+        cursor: next_cursor of the previous page
+        limit: Page size
+    
+    Returns:
+        (alerts, next_cursor) - next_cursor is None on the last page
+    
+    Raises:
+        ValueError: Unknown status
+    """
+    statuses = [s.value for s in AlertStatus] if status is None else [AlertStatus(status).value]
+    token = token.upper() if token else None
+    
+    page = [(seq, _materialize(alert_id)) for seq, alert_id in
+            alert_owners.page(user_id, statuses, token, cursor, limit + 1)]
+    finished = [s for s in statuses if s != AlertStatus.ACTIVE.value]
+    if finished:
+        rows = get_alert_store().list_archived(user_id, finished, token, cursor, limit + 1)
+        page += [(row[12], _alert_from_row(row)) for row in rows]
+        page.sort(key=lambda item: item[0], reverse=True)
+    
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = page[-1][0] if has_more else None
+    return [alert for _, alert in page], next_cursor
+
+
 def get_active_alerts() -> list[Alert]:
     """Get only active (not yet triggered) alerts."""
-    return [a for a in alerts.values() if a.status == AlertStatus.ACTIVE]
+    _materialize_all()
+    return list(active_alerts.values())
 
 
 def get_alert(alert_id: str) -> Optional[Alert]:
-    """Get a specific alert by ID."""
-    return alerts.get(alert_id)
+    """Get a specific alert by ID (from storage if it isn't in memory)."""
+    alert = _materialize(alert_id)
+    if alert is None:
+        row = get_alert_store().get(alert_id)
+        if row is not None:
+            alert = _alert_from_row(row)
+    return alert
 
 
 def cancel_alert(alert_id: str) -> bool:
@@ -140,10 +515,13 @@ def cancel_alert(alert_id: str) -> bool:
     Returns:
         True if alert was cancelled, False if not found or already triggered
     """
-    if alert_id in alerts:
-        alert = alerts[alert_id]
+    alert = _materialize(alert_id)
+    if alert is not None:
         if alert.status == AlertStatus.ACTIVE:
             alert.status = AlertStatus.CANCELLED
+            _deactivate(alert)
+            _finish(alert, AlertStatus.ACTIVE)
+            get_alert_store().queue_status(alert_id, AlertStatus.CANCELLED.value)
             print(f"🔕 Alert {alert_id} cancelled")
             return True
     return False
@@ -159,8 +537,14 @@ def delete_alert(alert_id: str) -> bool:
     Returns:
         True if alert was deleted, False if not found
     """
-    if alert_id in alerts:
-        del alerts[alert_id]
+    alert = _materialize(alert_id)
+    if alert is not None:
+        _deactivate(alerts.pop(alert_id))
+        alert_owners.remove(alert.seq, alert.user_id, alert.status.value, alert.token)
+        get_alert_store().queue_delete(alert_id)
+        return True
+    if get_alert_store().get(alert_id) is not None:
+        get_alert_store().queue_delete(alert_id)
         return True
     return False
 
@@ -176,6 +560,8 @@ def check_alert_condition(alert: Alert, current_price: float) -> bool:
     Returns:
         True if condition is met
     """
+    if alert.alert_type != AlertType.THRESHOLD:
+        return False
     if alert.operator == AlertOperator.LESS_THAN:
         return current_price < alert.target_price
     elif alert.operator == AlertOperator.GREATER_THAN:
@@ -187,70 +573,300 @@ def check_alert_condition(alert: Alert, current_price: float) -> bool:
     return False
 
 
-async def check_alerts():
+def _trigger_alert(alert: Alert, current_price: float):
     """
-    Check all active alerts against current prices.
-    Triggers alerts whose conditions are met.
+    Mark an alert triggered and queue it for delivery. Repeating alerts
+    stay active and only record the trigger.
+    """
+    alert.triggered_at = datetime.utcnow()
+    alert.triggered_price = current_price
+    if not alert.repeat:
+        alert.status = AlertStatus.TRIGGERED
+        active_alerts.pop(alert.id, None)
+        alert_columns.remove(alert.id)
+        _remove_rule(alert)
+        if alert_shards is not None:
+            alert_shards.forget(alert.id)
+        _finish(alert, AlertStatus.ACTIVE)
+    get_alert_store().queue_status(
+        alert.id, alert.status.value, alert.triggered_at.isoformat(), current_price
+    )
+    get_alert_delivery().publish(alert, current_price)
+
+
+def _finish(alert: Alert, old_status: AlertStatus):
+    """Re-file a triggered/cancelled alert and schedule it for archiving."""
+    alert_owners.move(alert.seq, alert.user_id, alert.token, old_status.value, alert.status.value)
+    _finished.append((time.time(), alert.id))
+
+
+def archive_alerts(now: Optional[float] = None) -> int:
+    """
+    Drop triggered/cancelled alerts older than ALERT_RETENTION_SECONDS
+    from memory; they stay in storage, flagged archived.
+    
+    Returns:
+        Number of alerts archived
+    """
+    cutoff = (time.time() if now is None else now) - ALERT_RETENTION_SECONDS
+    expired = []
+    while _finished and _finished[0][0] <= cutoff:
+        _, alert_id = _finished.popleft()
+        alert = alerts.get(alert_id)
+        if alert is not None and alert.status != AlertStatus.ACTIVE:
+            expired.append(alert)
+    if not expired:
+        return 0
+    
+    # Status writes must land before the rows are listed from storage
+    store = get_alert_store()
+    store.flush()
+    store.archive([alert.id for alert in expired])
+    for alert in expired:
+        del alerts[alert.id]
+        alert_owners.remove(alert.seq, alert.user_id, alert.status.value, alert.token)
+    return len(expired)
+
+
+def _notify(alert: Alert, current_price: float):
+    """Console notification and user callback (run by the delivery dispatcher)."""
+    print(f"\n🚨 ALERT TRIGGERED! 🚨")
+    print(f"   Condition: {describe_alert(alert)}")
+    print(f"   Current Price: ${current_price:.4f}")
+    if alert.message:
+        print(f"   Message: {alert.message}")
+    print()
+    
+    if alert_callback:
+        return alert_callback(alert, current_price)
+
+
+def evaluate_token(token: str, current_price: float) -> list[Alert]:
+    """
+    Trigger the alerts of one token whose condition is met at a price.
+    Only the crossed thresholds are visited (O(log n + k)).
     
     Returns:
         List of triggered alerts
     """
     triggered = []
-    active = get_active_alerts()
+    for alert_id in alert_index.pop_crossed(token, current_price):
+        alert = _materialize(alert_id)
+        _trigger_alert(alert, current_price)
+        triggered.append(alert)
+    return triggered
+
+
+def has_live_feed(token: str) -> bool:
+    """Whether a token has a fresh price from the real-time feed."""
+    price_data = get_price_service().get_price_data(token)
+    return price_data is not None and not price_data.is_stale(LIVE_FEED_MAX_AGE)
+
+
+def evaluate_rules(token: str, price: float, volume: Optional[float] = None,
+                   ts: Optional[float] = None) -> list[Alert]:
+    """
+    Feed one price (and rolling 24h volume, if known) to the stateful
+    rules of a token and trigger those that fire. O(1) per rule.
     
-    if not active:
-        return triggered
+    Returns:
+        List of triggered alerts
+    """
+    rules = alert_rules.get(token)
+    if not rules:
+        return []
+    ts = time.time() if ts is None else ts
+    fired = [alert_id for alert_id, rule in rules.items() if rule.update(price, volume, ts)]
+    triggered = []
+    for alert_id in fired:
+        alert = alerts[alert_id]
+        _trigger_alert(alert, price)
+        triggered.append(alert)
+    return triggered
+
+
+def _alert_tokens() -> set[str]:
+    """Tokens with at least one active alert (indexed or rule-based)."""
+    if alert_shards is not None:
+        return set(alert_shards.tokens())
+    return set(alert_index.tokens()) | set(alert_rules)
+
+
+def _on_shard_triggers(fired: list[tuple[str, float]]):
+    """Trigger alerts reported by the shard workers."""
+    triggered = 0
+    for alert_id, price in fired:
+        alert = _materialize(alert_id)
+        # Skip alerts cancelled or deleted while the trigger was in flight
+        if alert is None or alert.status != AlertStatus.ACTIVE:
+            continue
+        _trigger_alert(alert, price)
+        triggered += 1
+    if triggered:
+        print(f"   {triggered} alert(s) triggered by shard workers")
+
+
+async def on_price_tick(symbol: str, price_data: PriceData):
+    """RealTimePriceService callback: evaluate alerts for the ticked token."""
+    if alert_shards is not None:
+        alert_shards.tick(symbol, price_data.price, price_data.volume_24h)
+        return
+    triggered = []
+    if alert_index.has_token(symbol):
+        triggered = evaluate_token(symbol, price_data.price)
+    if symbol in alert_rules:
+        triggered += evaluate_rules(symbol, price_data.price, price_data.volume_24h)
+    if triggered:
+        print(f"   {len(triggered)} alert(s) triggered on {symbol} tick")
+
+
+def sweep_alerts(prices: dict[str, Optional[float]]) -> list[Alert]:
+    """
+    Evaluate every active alert at once against a set of token prices
+    (vectorized) and trigger those whose condition is met.
     
-    # Get unique tokens to check
-    tokens = list(set(a.token for a in active))
+    Args:
+        prices: Token -> price; tokens without a price are skipped
     
-    # Fetch prices for all tokens
-    for token in tokens:
-        current_price = await get_token_price(token)
-        
-        if current_price is None:
-            continue
-        
-        # Check alerts for this token
-        for alert in active:
-            if alert.token != token:
-                continue
-            
-            if check_alert_condition(alert, current_price):
-                # Trigger the alert
-                alert.status = AlertStatus.TRIGGERED
-                alert.triggered_at = datetime.utcnow()
-                alert.triggered_price = current_price
-                
-                triggered.append(alert)
-                
-                # Console notification
-                print(f"\n🚨 ALERT TRIGGERED! 🚨")
-                print(f"   Token: {alert.token}")
-                print(f"   Condition: {alert.operator.value} ${alert.target_price}")
-                print(f"   Current Price: ${current_price:.4f}")
-                if alert.message:
-                    print(f"   Message: {alert.message}")
-                print()
-                
-                # Call callback if set
-                if alert_callback:
-                    alert_callback(alert, current_price)
+    Returns:
+        List of triggered alerts
+    """
+    triggered = []
+    for alert_id in alert_columns.sweep(prices):
+        alert_index.remove(alert_id)
+        alert = _materialize(alert_id)
+        _trigger_alert(alert, prices[alert.token])
+        triggered.append(alert)
+    return triggered
+
+
+async def check_alerts(tokens: Optional[list[str]] = None):
+    """
+    Check active alerts against REST-resolved prices.
+    Triggers alerts whose conditions are met.
+    
+    Args:
+        tokens: Tokens to check (default: every token with active alerts)
+    
+    Returns:
+        List of triggered alerts
+    """
+    active_tokens = _alert_tokens()
+    tokens = list(active_tokens) if tokens is None else [t for t in tokens if t in active_tokens]
+    
+    if not tokens:
+        return []
     
+    # Resolve prices for all tokens in one batch, then sweep once
+    prices = await resolve_prices(tokens)
+    if alert_shards is not None:
+        # Shards report triggers asynchronously
+        for token, price in prices.items():
+            if price is not None:
+                alert_shards.tick(token, price)
+        return []
+    triggered = sweep_alerts(prices)
+    
+    # Stateful rules get the REST price as a tick (no volume)
+    for token, price in prices.items():
+        if price is not None and token in alert_rules:
+            triggered += evaluate_rules(token, price)
     return triggered
 
 
+def catch_up_alerts(tokens: Optional[list[str]] = None) -> list[Alert]:
+    """
+    Sweep alerts against the current live prices, for ticks that were
+    missed (feed outage, or alerts loaded at startup).
+    
+    Args:
+        tokens: Tokens to catch up (default: every token with active alerts)
+    
+    Returns:
+        List of triggered alerts
+    """
+    service = get_price_service()
+    if alert_shards is not None:
+        for token in _alert_tokens() if tokens is None else tokens:
+            if has_live_feed(token):
+                alert_shards.tick(token, service.get_price(token))
+        return []
+    tokens = alert_index.tokens() if tokens is None else tokens
+    prices = {t: service.get_price(t) for t in tokens if has_live_feed(t)}
+    return sweep_alerts(prices)
+
+
+def refresh_rules() -> list[Alert]:
+    """
+    Feed the current live price to the stateful rules of live-feed tokens,
+    so cross debounce, percent-move windows and cooldowns progress on time
+    even while no ticks arrive (REST fallback tokens get theirs from
+    check_alerts).
+    
+    Returns:
+        List of triggered alerts (empty with shards, which report
+        asynchronously)
+    """
+    if alert_shards is not None:
+        # Shards evaluate thresholds and rules on the same tick
+        return catch_up_alerts()
+    service = get_price_service()
+    triggered = []
+    for token in list(alert_rules):
+        if has_live_feed(token):
+            triggered += evaluate_rules(token, service.get_price(token))
+    return triggered
+
+
+def supervise_shards() -> int:
+    """
+    Restart shard workers that died, re-send their alerts and catch them
+    up on the live prices they missed.
+    
+    Returns:
+        Number of shards restarted
+    """
+    if alert_shards is None:
+        return 0
+    dead = alert_shards.dead_shards()
+    for shard_id in dead:
+        print(f"⚠️ Alert shard {shard_id} died, restarting it")
+        alert_shards.restart_shard(shard_id)
+        _seed_shards(shard_id)
+        catch_up_alerts([t for t in alert_shards.tokens() if shard_of(t, alert_shards.shards) == shard_id])
+    return len(dead)
+
+
 async def background_worker():
     """
-    Background worker that periodically checks prices for alerts and pending trades.
-    Runs every ALERT_CHECK_INTERVAL seconds.
+    Background worker that periodically checks pending trades, and alerts
+    for tokens without a live price feed (the rest are evaluated per tick),
+    re-evaluates stateful rules against live prices, and restarts dead
+    alert shards. Runs every ALERT_CHECK_INTERVAL seconds.
     """
     print(f"🔄 Background worker started (checking every {ALERT_CHECK_INTERVAL}s)")
     
+    # Tokens served by REST last cycle; None until the first (full) catch-up
+    previous_fallback: Optional[set[str]] = None
+    
     while True:
         try:
-            # Check alerts
-            triggered_alerts = await check_alerts()
+            supervise_shards()
+            fallback_tokens = {t for t in _alert_tokens() if not has_live_feed(t)}
+            
+            # Catch up on live prices once at startup, and for tokens whose
+            # feed just came back (their ticks were missed meanwhile)
+            if previous_fallback is None:
+                triggered_alerts = catch_up_alerts()
+            else:
+                triggered_alerts = catch_up_alerts(list(previous_fallback - fallback_tokens))
+            previous_fallback = fallback_tokens
+            
+            # Stateful rules of live tokens also run on the clock, not only per tick
+            triggered_alerts += refresh_rules()
+            
+            # REST fallback for alerts on tokens without live ticks
+            triggered_alerts += await check_alerts(list(fallback_tokens))
             if triggered_alerts:
                 print(f"   {len(triggered_alerts)} alert(s) triggered")
             
@@ -270,27 +886,93 @@ async def background_worker():
             await asyncio.sleep(ALERT_CHECK_INTERVAL)
 
 
+async def flush_worker():
+    """
+    Write queued alert status changes in batches every ALERT_FLUSH_INTERVAL,
+    and archive finished alerts past the retention window.
+    """
+    store = get_alert_store()
+    while True:
+        try:
+            await asyncio.sleep(ALERT_FLUSH_INTERVAL)
+            if store.pending:
+                await asyncio.to_thread(store.flush)
+            archive_alerts()
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            print(f"❌ Alert flush error: {e}")
+
+
 def start_background_worker():
-    """Start the background worker task."""
-    global background_task
+    """
+    Start the alert shard workers (if ALERT_SHARDS > 0), load stored alerts
+    and start the background worker, flush tasks and alert delivery.
+    """
+    global background_task, flush_task, alert_shards
     
     if background_task is None or background_task.done():
+        if ALERT_SHARDS > 0 and alert_shards is None:
+            alert_shards = ShardPool(ALERT_SHARDS)
+            alert_shards.start(_on_shard_triggers)
+            print(f"🧩 Alert evaluation sharded across {ALERT_SHARDS} worker process(es)")
+            if _loaded:
+                # Restart: storage was loaded before, re-send what's in memory
+                _seed_shards()
+        loaded = load_alerts()
+        if loaded:
+            print(f"📂 Loaded {loaded} active alert(s) from storage")
+        restored = load_pending_trades()
+        if restored:
+            print(f"📂 Restored {restored} pending trade(s) from the journal")
+        delivery = get_alert_delivery()
+        delivery.add_callback(_notify)
+        delivery.start()
+        # Every tick, not only >0.01% moves: a slow drift must still cross
+        get_price_service().on_tick(on_price_tick)
+        get_price_service().on_price_update(on_trade_tick)
         background_task = asyncio.create_task(background_worker())
+        flush_task = asyncio.create_task(flush_worker())
         return True
     return False
 
 
 def stop_background_worker():
-    """Stop the background worker task."""
-    global background_task
+    """
+    Stop the background worker and write any queued alert changes.
+    Alert delivery is stopped separately (await get_alert_delivery().stop()).
+    """
+    global background_task, flush_task, alert_shards
     
     if background_task and not background_task.done():
+        get_price_service().remove_callback(on_price_tick)
+        get_price_service().remove_callback(on_trade_tick)
         background_task.cancel()
         background_task = None
+        if flush_task:
+            flush_task.cancel()
+            flush_task = None
+        if alert_shards is not None:
+            alert_shards.stop()
+            alert_shards = None
+        get_alert_store().flush()
+        close_trade_journal()
         return True
     return False
 
 
+def get_alert_engine_stats() -> dict:
+    """Alert counts in memory, evaluation structures and storage."""
+    return {
+        "in_memory": len(alerts) + len(_unloaded),
+        "active": len(active_alerts) + len(_unloaded),
+        "indexed": len(alert_index),
+        "rules": sum(len(rules) for rules in alert_rules.values()),
+        "shards": alert_shards.get_stats() if alert_shards is not None else None,
+        "store": get_alert_store().get_stats(),
+    }
+
+
 def set_alert_callback(callback: Callable[[Alert, float], None]):
     """
     Set a callback function to be called when an alert triggers.
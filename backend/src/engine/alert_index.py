@@ -0,0 +1,200 @@
+"""
+Alert Threshold Index
+=====================
+Per-token sorted index of price alert thresholds, so a price tick only
+touches the alerts it actually crosses.
+
+Each token keeps two heaps:
+- "above" alerts (>, >=) in a min-heap by threshold: a rising price pops
+  from the lowest threshold up
+- "below" alerts (<, <=) in a max-heap by threshold: a falling price pops
+  from the highest threshold down
+
+At equal thresholds inclusive operators sort first, so popping stops at
+the first alert the price doesn't satisfy. A tick costs O(log n + k) for
+k triggered alerts. Removal is lazy (entries are skipped when popped) and
+a heap is rebuilt once most of it is dead.
+
+Usage:
+    index = AlertIndex()
+    index.add("a1b2c3d4", "BTC", ">=", 100000.0)
+    for alert_id in index.pop_crossed("BTC", 100250.0):
+        ...
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Operator -> (side, strict)
+OPERATORS = {
+    ">": ("above", True),
+    ">=": ("above", False),
+    "<": ("below", True),
+    "<=": ("below", False),
+}
+
+# Heap entry: (sort key, strict, generation, alert id). Sort key is the
+# threshold for "above" and the negated threshold for "below"; the
+# generation tells a live entry from a dead one left by an earlier add of
+# the same id.
+_Entry = Tuple[float, bool, int, str]
+
+
+class TokenThresholds:
+    """Above/below threshold heaps for one token."""
+
+    __slots__ = ("above", "below", "live", "dead", "generation")
+
+    def __init__(self):
+        self.above: List[_Entry] = []
+        self.below: List[_Entry] = []
+        self.live: Dict[str, int] = {}  # alert id -> generation
+        self.dead = 0
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def _entry(self, alert_id: str, operator: str, threshold: float) -> Tuple[str, _Entry]:
+        side, strict = OPERATORS[operator]
+        self.generation += 1
+        self.live[alert_id] = self.generation
+        key = threshold if side == "above" else -threshold
+        return side, (key, strict, self.generation, alert_id)
+
+    def push(self, alert_id: str, operator: str, threshold: float):
+        side, entry = self._entry(alert_id, operator, threshold)
+        heapq.heappush(self.above if side == "above" else self.below, entry)
+
+    def extend(self, entries: Iterable[Tuple[str, str, float]]):
+        """Add many (alert id, operator, threshold) entries and heapify once."""
+        for alert_id, operator, threshold in entries:
+            side, entry = self._entry(alert_id, operator, threshold)
+            (self.above if side == "above" else self.below).append(entry)
+        heapq.heapify(self.above)
+        heapq.heapify(self.below)
+
+    def discard(self, alert_id: str) -> bool:
+        if self.live.pop(alert_id, None) is None:
+            return False
+        self.dead += 1
+        if self.dead > len(self.live) and self.dead > 64:
+            self._compact()
+        return True
+
+    def _compact(self):
+        """Drop dead entries from both heaps."""
+        self.above = [e for e in self.above if self.live.get(e[3]) == e[2]]
+        self.below = [e for e in self.below if self.live.get(e[3]) == e[2]]
+        heapq.heapify(self.above)
+        heapq.heapify(self.below)
+        self.dead = 0
+
+    def pop_crossed(self, price: float) -> List[str]:
+        """Pop every live alert whose condition holds at `price`."""
+        crossed = []
+        live = self.live
+
+        above = self.above
+        while above:
+            threshold, strict, generation, alert_id = above[0]
+            if price > threshold or (not strict and price == threshold):
+                heapq.heappop(above)
+                if live.get(alert_id) == generation:
+                    del live[alert_id]
+                    crossed.append(alert_id)
+                else:
+                    self.dead -= 1
+            else:
+                break
+
+        below = self.below
+        while below:
+            neg_threshold, strict, generation, alert_id = below[0]
+            threshold = -neg_threshold
+            if price < threshold or (not strict and price == threshold):
+                heapq.heappop(below)
+                if live.get(alert_id) == generation:
+                    del live[alert_id]
+                    crossed.append(alert_id)
+                else:
+                    self.dead -= 1
+            else:
+                break
+
+        return crossed
+
+
+class AlertIndex:
+    """Threshold index over all tokens' active alerts."""
+
+    def __init__(self):
+        self._tokens: Dict[str, TokenThresholds] = {}
+        self._token_of: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._token_of)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return alert_id in self._token_of
+
+    def tokens(self) -> List[str]:
+        """Tokens with at least one indexed alert."""
+        return list(self._tokens)
+
+    def has_token(self, token: str) -> bool:
+        return token in self._tokens
+
+    def count(self, token: str) -> int:
+        thresholds = self._tokens.get(token)
+        return len(thresholds) if thresholds else 0
+
+    def add(self, alert_id: str, token: str, operator: str, threshold: float):
+        """Index an active alert."""
+        if operator not in OPERATORS:
+            raise ValueError(f"Invalid operator: {operator}")
+        if alert_id in self._token_of:
+            self.remove(alert_id)
+        self._tokens.setdefault(token, TokenThresholds()).push(alert_id, operator, float(threshold))
+        self._token_of[alert_id] = token
+
+    def add_many(self, token: str, entries: Iterable[Tuple[str, str, float]]):
+        """
+        Bulk-index (alert id, operator, threshold) entries for one token
+        with a single heapify (e.g. when loading from storage).
+        """
+        entries = [(alert_id, op, float(t)) for alert_id, op, t in entries if alert_id not in self._token_of]
+        if not entries:
+            return
+        self._tokens.setdefault(token, TokenThresholds()).extend(entries)
+        for alert_id, _, _ in entries:
+            self._token_of[alert_id] = token
+
+    def remove(self, alert_id: str) -> bool:
+        """Drop an alert from the index (e.g. cancelled)."""
+        token = self._token_of.pop(alert_id, None)
+        if token is None:
+            return False
+        thresholds = self._tokens[token]
+        thresholds.discard(alert_id)
+        if not thresholds.live:
+            del self._tokens[token]
+        return True
+
+    def pop_crossed(self, token: str, price: float) -> List[str]:
+        """
+        Remove and return the ids of every alert on `token` triggered at
+        `price`.
+        """
+        thresholds = self._tokens.get(token)
+        if thresholds is None:
+            return []
+        crossed = thresholds.pop_crossed(price)
+        for alert_id in crossed:
+            del self._token_of[alert_id]
+        if not thresholds.live:
+            del self._tokens[token]
+        return crossed
+
+    def token_of(self, alert_id: str) -> Optional[str]:
+        return self._token_of.get(alert_id)
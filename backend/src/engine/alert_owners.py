@@ -0,0 +1,108 @@
+"""
+Alert Owner Index
+=================
+In-memory index of alerts by (user, status) and (user, status, token),
+for listing one user's alerts page by page without touching anyone
+else's.
+
+Every alert gets a monotonic sequence number at creation. Each index key
+holds a sorted list of sequence numbers; since new alerts always get the
+highest number, adding one is an append. A page is read newest first from
+a cursor (the last sequence number of the previous page) with a bisect,
+merging the lists of the requested statuses: O(log n + page size).
+
+Usage:
+    owners = OwnerIndex()
+    owners.add(seq, "a1b2c3d4", user_id, "active", "BTC")
+    page = owners.page(user_id, ["active"], token=None, before=None, limit=50)
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (user, status) or (user, status, token)
+Key = Tuple
+
+
+class OwnerIndex:
+    """Sequence-ordered alert ids per (user, status[, token])."""
+
+    def __init__(self):
+        self._seqs: Dict[Key, List[int]] = {}
+        self._ids: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _keys(self, user_id: Optional[int], status: str, token: str) -> Tuple[Key, Key]:
+        return (user_id, status), (user_id, status, token)
+
+    def add(self, seq: int, alert_id: str, user_id: Optional[int], status: str, token: str):
+        """Index an alert under its owner, status and token."""
+        self._ids[seq] = alert_id
+        for key in self._keys(user_id, status, token):
+            seqs = self._seqs.setdefault(key, [])
+            if not seqs or seq > seqs[-1]:
+                seqs.append(seq)
+            else:
+                insort(seqs, seq)
+
+    def remove(self, seq: int, user_id: Optional[int], status: str, token: str) -> bool:
+        """Drop an alert from the index (deleted or archived)."""
+        if self._ids.pop(seq, None) is None:
+            return False
+        self._discard(seq, user_id, status, token)
+        return True
+
+    def _discard(self, seq: int, user_id: Optional[int], status: str, token: str):
+        for key in self._keys(user_id, status, token):
+            seqs = self._seqs.get(key)
+            if seqs is None:
+                continue
+            i = bisect_left(seqs, seq)
+            if i < len(seqs) and seqs[i] == seq:
+                del seqs[i]
+            if not seqs:
+                del self._seqs[key]
+
+    def move(self, seq: int, user_id: Optional[int], token: str, old_status: str, new_status: str):
+        """Re-file an alert after a status change."""
+        if seq not in self._ids:
+            return
+        self._discard(seq, user_id, old_status, token)
+        alert_id = self._ids[seq]
+        self.add(seq, alert_id, user_id, new_status, token)
+
+    def page(
+        self,
+        user_id: Optional[int],
+        statuses: Iterable[str],
+        token: Optional[str] = None,
+        before: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Tuple[int, str]]:
+        """
+        One page of a user's alerts, newest first.
+
+        Args:
+            user_id: Owner (None for alerts created without a session)
+            statuses: Statuses to include
+            token: Only this token, if given
+            before: Cursor - only sequence numbers below this
+            limit: Page size
+
+        Returns:
+            (seq, alert id) pairs in descending seq order
+        """
+        runs = []
+        for status in statuses:
+            key = (user_id, status) if token is None else (user_id, status, token)
+            seqs = self._seqs.get(key)
+            if not seqs:
+                continue
+            end = len(seqs) if before is None else bisect_left(seqs, before)
+            runs.append(map(seqs.__getitem__, range(end - 1, -1, -1)))
+        merged = heapq.merge(*runs, reverse=True)
+        return [(seq, self._ids[seq]) for seq in islice(merged, limit)]
@@ -0,0 +1,297 @@
+"""
+Stateful Alert Rules
+====================
+Alert types whose condition depends on more than the current price.
+Each rule keeps a small, fixed amount of state and is updated once per
+price tick - no rule ever scans price history.
+
+Rule types:
+- threshold:     price </>/<=/>= a target (used for repeating threshold
+                 alerts; one-shot ones live in the threshold index)
+- cross:         price crosses a level, with hysteresis (must move back
+                 past a band before it can fire again) and debounce (must
+                 stay past the level for N seconds)
+- percent_move:  price moves N% within a time window, tracked with a
+                 fixed ring of min/max buckets
+- volume_spike:  recent volume rate exceeds a multiple of its baseline,
+                 tracked with a fast and a slow exponential moving average
+
+Any rule can repeat: it stays active after firing and can fire again once
+its cooldown has passed.
+
+Usage:
+    rule = build_rule("percent_move", {"percent": 5, "window_seconds": 3600})
+    if rule.update(price, volume_24h, time.time()):
+        ...
+"""
+
+import math
+from typing import Optional
+
+# Buckets per percent-move window (window resolution is 1/WINDOW_BUCKETS)
+WINDOW_BUCKETS = 12
+
+# Volume spike baseline spans this many short windows
+BASELINE_WINDOWS = 12
+
+RULE_TYPES = ("threshold", "cross", "percent_move", "volume_spike")
+DIRECTIONS = ("up", "down", "any")
+
+
+class AlertRule:
+    """
+    Base class: cooldown and repeat handling around a rule's own state.
+
+    Args:
+        repeat: Stay active after firing
+        cooldown_seconds: Minimum time between two firings
+        last_fired: Time of the previous firing (e.g. restored from storage)
+    """
+
+    __slots__ = ("repeat", "cooldown", "last_fired")
+
+    def __init__(self, repeat: bool = False, cooldown_seconds: float = 0.0, last_fired: Optional[float] = None):
+        self.repeat = repeat
+        self.cooldown = cooldown_seconds
+        self.last_fired = last_fired
+
+    def update(self, price: float, volume: Optional[float], ts: float) -> bool:
+        """
+        Feed one tick.
+
+        Args:
+            price: Current price
+            volume: Rolling 24h volume, or None if unknown (REST prices)
+            ts: Tick time (epoch seconds)
+
+        Returns:
+            True if the alert fires on this tick
+        """
+        can_fire = self.last_fired is None or ts - self.last_fired >= self.cooldown
+        if self._update(price, volume, ts, can_fire) and can_fire:
+            self.last_fired = ts
+            return True
+        return False
+
+    def _update(self, price: float, volume: Optional[float], ts: float, can_fire: bool) -> bool:
+        raise NotImplementedError
+
+
+class ThresholdRule(AlertRule):
+    """Static threshold, for repeating alerts."""
+
+    __slots__ = ("operator", "target")
+
+    def __init__(self, operator: str, target_price: float, **kwargs):
+        super().__init__(**kwargs)
+        self.operator = operator
+        self.target = target_price
+
+    def _update(self, price, volume, ts, can_fire) -> bool:
+        op, target = self.operator, self.target
+        return (
+            (op == ">" and price > target)
+            or (op == ">=" and price >= target)
+            or (op == "<" and price < target)
+            or (op == "<=" and price <= target)
+        )
+
+
+class CrossRule(AlertRule):
+    """
+    Price crossing a level. An "up" cross is armed while the price is at
+    or below level * (1 - hysteresis) and fires once the price has stayed
+    above the level for `debounce_seconds`; firing disarms it until the
+    price falls back through the band ("down" mirrors this).
+    """
+
+    __slots__ = ("direction", "level", "rearm_level", "debounce", "armed", "beyond_since")
+
+    def __init__(self, direction: str, level: float, hysteresis_percent: float = 0.0,
+                 debounce_seconds: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.direction = direction
+        self.level = level
+        band = level * hysteresis_percent / 100
+        self.rearm_level = level - band if direction == "up" else level + band
+        self.debounce = debounce_seconds
+        self.armed = False
+        self.beyond_since: Optional[float] = None
+
+    def _update(self, price, volume, ts, can_fire) -> bool:
+        up = self.direction == "up"
+        if (price <= self.rearm_level) if up else (price >= self.rearm_level):
+            self.armed = True
+
+        beyond = price > self.level if up else price < self.level
+        if not beyond:
+            self.beyond_since = None
+            return False
+        if self.beyond_since is None:
+            self.beyond_since = ts
+        if self.armed and can_fire and ts - self.beyond_since >= self.debounce:
+            self.armed = False
+            return True
+        return False
+
+
+class PercentMoveRule(AlertRule):
+    """
+    Price moving `percent` within `window_seconds`, measured from the
+    window's low (up) or high (down). The window is a ring of
+    WINDOW_BUCKETS min/max buckets, so it spans between
+    (WINDOW_BUCKETS - 1) / WINDOW_BUCKETS of the window and the full window.
+    """
+
+    __slots__ = ("percent", "direction", "width", "slots", "lows", "highs")
+
+    def __init__(self, percent: float, window_seconds: float, direction: str = "any", **kwargs):
+        super().__init__(**kwargs)
+        self.percent = percent
+        self.direction = direction
+        self.width = window_seconds / WINDOW_BUCKETS
+        self._reset()
+
+    def _reset(self):
+        self.slots = [-1] * WINDOW_BUCKETS
+        self.lows = [math.inf] * WINDOW_BUCKETS
+        self.highs = [-math.inf] * WINDOW_BUCKETS
+
+    def _update(self, price, volume, ts, can_fire) -> bool:
+        bucket = int(ts // self.width)
+        i = bucket % WINDOW_BUCKETS
+        if self.slots[i] != bucket:
+            self.slots[i] = bucket
+            self.lows[i] = self.highs[i] = price
+        else:
+            if price < self.lows[i]:
+                self.lows[i] = price
+            if price > self.highs[i]:
+                self.highs[i] = price
+
+        oldest = bucket - WINDOW_BUCKETS
+        low, high = math.inf, -math.inf
+        for j in range(WINDOW_BUCKETS):
+            if self.slots[j] > oldest:
+                low = min(low, self.lows[j])
+                high = max(high, self.highs[j])
+
+        move = self.percent / 100
+        fired = (
+            (self.direction != "down" and low > 0 and price >= low * (1 + move))
+            or (self.direction != "up" and price <= high * (1 - move))
+        )
+        if fired and can_fire:
+            # Measure the next move from here
+            self._reset()
+            self.slots[i] = bucket
+            self.lows[i] = self.highs[i] = price
+        return fired
+
+
+class VolumeSpikeRule(AlertRule):
+    """
+    Volume rate over the last `window_seconds` reaching `multiplier` times
+    its baseline (BASELINE_WINDOWS windows). The rate is taken from
+    increases of the rolling 24h volume between ticks, so it is an
+    approximation of traded volume; ticks without volume are ignored.
+    """
+
+    __slots__ = ("multiplier", "window", "last_volume", "last_ts", "started", "fast", "slow")
+
+    def __init__(self, multiplier: float, window_seconds: float = 300.0, **kwargs):
+        super().__init__(**kwargs)
+        self.multiplier = multiplier
+        self.window = window_seconds
+        self.last_volume: Optional[float] = None
+        self.last_ts = 0.0
+        self.started = 0.0
+        self.fast = 0.0
+        self.slow = 0.0
+
+    def _update(self, price, volume, ts, can_fire) -> bool:
+        if volume is None:
+            return False
+        if self.last_volume is None:
+            self.last_volume, self.last_ts, self.started = volume, ts, ts
+            return False
+        dt = ts - self.last_ts
+        if dt <= 0:
+            return False
+
+        rate = max(volume - self.last_volume, 0.0) / dt
+        first_rate = self.last_ts == self.started
+        self.last_volume, self.last_ts = volume, ts
+        if first_rate:
+            # Seed both averages so the baseline doesn't start from zero
+            self.fast = self.slow = rate
+            return False
+        self.fast += (rate - self.fast) * (1 - math.exp(-dt / self.window))
+        self.slow += (rate - self.slow) * (1 - math.exp(-dt / (self.window * BASELINE_WINDOWS)))
+
+        warmed_up = ts - self.started >= self.window
+        return warmed_up and self.slow > 0 and self.fast >= self.multiplier * self.slow
+
+
+def validate_params(kind: str, params: dict):
+    """
+    Check a rule's parameters.
+
+    Raises:
+        ValueError: Unknown type, or missing/invalid parameters
+    """
+    if kind not in RULE_TYPES:
+        raise ValueError(f"Invalid alert type: {kind}. Use one of {', '.join(RULE_TYPES)}")
+
+    def positive(name: str):
+        value = params.get(name)
+        if value is None or value <= 0:
+            raise ValueError(f"{kind} alerts need a positive {name}")
+
+    if params.get("cooldown_seconds", 0) < 0:
+        raise ValueError("cooldown_seconds must not be negative")
+    if kind == "cross":
+        positive("target_price")
+        if params.get("direction") not in ("up", "down"):
+            raise ValueError("cross alerts need a direction: up or down")
+        if params.get("hysteresis_percent", 0) < 0 or params.get("debounce_seconds", 0) < 0:
+            raise ValueError("hysteresis_percent and debounce_seconds must not be negative")
+    elif kind == "percent_move":
+        positive("percent")
+        positive("window_seconds")
+        if params.get("direction", "any") not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+    elif kind == "volume_spike":
+        positive("multiplier")
+        positive("window_seconds")
+
+
+def build_rule(kind: str, params: dict, last_fired: Optional[float] = None) -> AlertRule:
+    """
+    Create the rule for an alert type from its parameters.
+
+    Args:
+        kind: One of RULE_TYPES
+        params: Type parameters plus optional repeat / cooldown_seconds
+        last_fired: Time the alert last fired, for the cooldown
+
+    Returns:
+        A fresh rule (window/EMA state starts empty)
+    """
+    common = {
+        "repeat": bool(params.get("repeat", False)),
+        "cooldown_seconds": float(params.get("cooldown_seconds", 0.0)),
+        "last_fired": last_fired,
+    }
+    if kind == "threshold":
+        return ThresholdRule(params["operator"], params["target_price"], **common)
+    if kind == "cross":
+        return CrossRule(
+            params["direction"], params["target_price"],
+            params.get("hysteresis_percent", 0.0), params.get("debounce_seconds", 0.0), **common,
+        )
+    if kind == "percent_move":
+        return PercentMoveRule(params["percent"], params["window_seconds"], params.get("direction", "any"), **common)
+    if kind == "volume_spike":
+        return VolumeSpikeRule(params["multiplier"], params["window_seconds"], **common)
+    raise ValueError(f"Invalid alert type: {kind}")
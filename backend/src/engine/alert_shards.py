@@ -0,0 +1,291 @@
+"""
+Sharded Alert Evaluation
+========================
+Spreads alert evaluation over worker processes, so very large alert
+populations aren't limited to the one core running the event loop.
+
+Alerts are partitioned by a stable hash of their token (crc32 modulo the
+shard count). Each worker process holds its own threshold index and
+stateful rules for its tokens and only receives those tokens' ticks.
+Triggered alert ids flow back on a shared result queue; the API process
+keeps the alert records, storage and delivery, and routes create/cancel
+calls to the owning shard.
+
+Enabled with ALERT_SHARDS=<number of workers> (0 keeps evaluation in
+process). The engine's background worker restarts workers that died and
+re-sends their alerts (dead_shards / restart_shard).
+
+Usage:
+    pool = ShardPool(4)
+    pool.start(on_triggered)              # on_triggered([(alert_id, price), ...])
+    pool.add("a1b2c3d4", "BTC", ">=", 100000.0)
+    pool.tick("BTC", 100250.0)
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.engine.alert_index import AlertIndex
+from src.engine.alert_rules import AlertRule, build_rule
+
+# Worker processes for alert evaluation (0 = evaluate in the API process)
+ALERT_SHARDS = int(os.getenv("ALERT_SHARDS", "0"))
+
+Triggered = List[Tuple[str, float]]
+
+
+def shard_of(token: str, shards: int) -> int:
+    """Owning shard of a token (stable across restarts and processes)."""
+    return zlib.crc32(token.encode()) % shards
+
+
+def _shard_main(shard_id: int, inbox, results):
+    """
+    Worker process loop. Messages:
+        ("add", alert_id, token, operator, threshold)
+        ("add_many", token, [(alert_id, operator, threshold), ...])
+        ("add_rule", alert_id, token, kind, params, last_fired)
+        ("remove", alert_id)
+        ("tick", token, price, volume, ts)
+        ("stop",)
+    Triggers are sent back as ("triggered", shard_id, [(alert_id, price), ...]).
+    """
+    index = AlertIndex()
+    rules: Dict[str, Dict[str, AlertRule]] = {}
+    rule_tokens: Dict[str, str] = {}
+
+    try:
+        while True:
+            message = inbox.get()
+            op = message[0]
+            if op == "stop":
+                break
+            try:
+                _handle_message(shard_id, message, index, rules, rule_tokens, results)
+            except Exception as e:
+                # One bad message must not take the shard's alerts down with it
+                print(f"❌ Alert shard {shard_id} error on '{op}': {e}")
+    except KeyboardInterrupt:
+        pass
+
+
+def _handle_message(shard_id: int, message: tuple, index: AlertIndex,
+                    rules: Dict[str, Dict[str, AlertRule]], rule_tokens: Dict[str, str], results):
+    """Apply one inbox message to a worker's index and rules."""
+    op = message[0]
+    if op == "tick":
+        _, token, price, volume, ts = message
+        fired = [(alert_id, price) for alert_id in index.pop_crossed(token, price)]
+        token_rules = rules.get(token)
+        if token_rules:
+            for alert_id, rule in list(token_rules.items()):
+                if rule.update(price, volume, ts):
+                    fired.append((alert_id, price))
+                    if not rule.repeat:
+                        del token_rules[alert_id]
+                        del rule_tokens[alert_id]
+            if not token_rules:
+                del rules[token]
+        if fired:
+            results.put(("triggered", shard_id, fired))
+    elif op == "add":
+        _, alert_id, token, operator, threshold = message
+        index.add(alert_id, token, operator, threshold)
+    elif op == "add_many":
+        _, token, entries = message
+        index.add_many(token, entries)
+    elif op == "add_rule":
+        _, alert_id, token, kind, params, last_fired = message
+        rules.setdefault(token, {})[alert_id] = build_rule(kind, params, last_fired)
+        rule_tokens[alert_id] = token
+    elif op == "remove":
+        alert_id = message[1]
+        if not index.remove(alert_id) and alert_id in rule_tokens:
+            token = rule_tokens.pop(alert_id)
+            del rules[token][alert_id]
+            if not rules[token]:
+                del rules[token]
+
+
+class ShardPool:
+    """
+    Worker processes evaluating alerts for disjoint sets of tokens.
+
+    Args:
+        shards: Number of worker processes
+    """
+
+    def __init__(self, shards: int):
+        self.shards = shards
+        self._ctx = mp.get_context("spawn")
+        self._inboxes = []
+        self._results = None
+        self._processes: List[mp.Process] = []
+        self._reader: Optional[threading.Thread] = None
+        self._token_of: Dict[str, str] = {}
+        self._token_counts: Dict[str, int] = {}
+        self._stats = {"ticks": 0, "triggered": 0, "restarts": 0}
+
+    # -- Lifecycle ---------------------------------------------------------
+
+    def start(self, on_triggered: Callable[[Triggered], None]):
+        """
+        Spawn the workers and start reading triggers. on_triggered runs on
+        the calling thread's event loop (start needs a running loop).
+        """
+        self._results = self._ctx.Queue()
+        self._inboxes = [self._ctx.Queue() for _ in range(self.shards)]
+        self._processes = [self._spawn(i) for i in range(self.shards)]
+        loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(
+            target=self._read_results, args=(loop, self._results, on_triggered),
+            name="alert-shard-results", daemon=True,
+        )
+        self._reader.start()
+
+    def _spawn(self, shard_id: int) -> mp.Process:
+        process = self._ctx.Process(
+            target=_shard_main, args=(shard_id, self._inboxes[shard_id], self._results),
+            name=f"alert-shard-{shard_id}", daemon=True,
+        )
+        process.start()
+        return process
+
+    def dead_shards(self) -> List[int]:
+        """Shards whose worker process has exited (crashed or was killed)."""
+        return [i for i, process in enumerate(self._processes) if not process.is_alive()]
+
+    def restart_shard(self, shard_id: int):
+        """
+        Replace a dead worker with a fresh, empty one. Routing state for the
+        shard's alerts is dropped; the caller re-sends them (add, add_many,
+        add_rule) and catches up on ticks missed meanwhile.
+        """
+        old_inbox = self._inboxes[shard_id]
+        old_inbox.cancel_join_thread()
+        old_inbox.close()
+        self._inboxes[shard_id] = self._ctx.Queue()
+        self._processes[shard_id] = self._spawn(shard_id)
+        for alert_id, token in list(self._token_of.items()):
+            if shard_of(token, self.shards) == shard_id:
+                self.forget(alert_id)
+        self._stats["restarts"] += 1
+
+    def _read_results(self, loop: asyncio.AbstractEventLoop, results, on_triggered: Callable[[Triggered], None]):
+        """Reader thread: hand trigger batches to the event loop until stopped."""
+        while True:
+            message = results.get()
+            if message is None:
+                break
+            _, _, fired = message
+            try:
+                loop.call_soon_threadsafe(self._handle_triggered, on_triggered, fired)
+            except RuntimeError:
+                break  # loop closed
+
+    def _handle_triggered(self, on_triggered: Callable[[Triggered], None], fired: Triggered):
+        self._stats["triggered"] += len(fired)
+        try:
+            on_triggered(fired)
+        except Exception as e:
+            print(f"❌ Shard trigger handling error: {e}")
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Stop the workers and the reader thread. A stopped pool is not
+        restarted; the engine starts a new one and re-sends its alerts.
+        """
+        for inbox in self._inboxes:
+            inbox.put(("stop",))
+        if self._results is not None:
+            self._results.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        if self._reader is not None:
+            self._reader.join(max(0.0, deadline - time.monotonic()))
+        self._processes = []
+        self._inboxes = []
+        self._results = None
+        self._reader = None
+        self._token_of.clear()
+        self._token_counts.clear()
+
+    # -- Routing -----------------------------------------------------------
+
+    def _inbox(self, token: str):
+        return self._inboxes[shard_of(token, self.shards)]
+
+    def _track(self, alert_id: str, token: str):
+        if alert_id not in self._token_of:
+            self._token_of[alert_id] = token
+            self._token_counts[token] = self._token_counts.get(token, 0) + 1
+
+    def forget(self, alert_id: str):
+        """Drop routing state for an alert the shard already removed (triggered)."""
+        token = self._token_of.pop(alert_id, None)
+        if token is not None:
+            self._token_counts[token] -= 1
+            if not self._token_counts[token]:
+                del self._token_counts[token]
+
+    def add(self, alert_id: str, token: str, operator: str, threshold: float):
+        """Send a threshold alert to its shard."""
+        self._track(alert_id, token)
+        self._inbox(token).put(("add", alert_id, token, operator, float(threshold)))
+
+    def add_many(self, token: str, entries: Iterable[Tuple[str, str, float]]):
+        """Send many threshold alerts of one token to its shard in one message."""
+        entries = [(alert_id, op, float(t)) for alert_id, op, t in entries]
+        for alert_id, _, _ in entries:
+            self._track(alert_id, token)
+        self._inbox(token).put(("add_many", token, entries))
+
+    def add_rule(self, alert_id: str, token: str, kind: str, params: dict, last_fired: Optional[float]):
+        """Send a stateful rule alert to its shard (built there)."""
+        self._track(alert_id, token)
+        self._inbox(token).put(("add_rule", alert_id, token, kind, params, last_fired))
+
+    def remove(self, alert_id: str):
+        """Remove an alert from its shard (cancelled or deleted)."""
+        token = self._token_of.get(alert_id)
+        if token is not None:
+            self.forget(alert_id)
+            self._inbox(token).put(("remove", alert_id))
+
+    def tick(self, token: str, price: float, volume: Optional[float] = None, ts: Optional[float] = None):
+        """
+        Route a price tick to the shard owning the token (if it has alerts
+        and its worker is up; a dead worker's ticks are dropped until it is
+        restarted).
+        """
+        if token in self._token_counts:
+            shard_id = shard_of(token, self.shards)
+            if not self._processes[shard_id].is_alive():
+                return
+            self._stats["ticks"] += 1
+            self._inboxes[shard_id].put(("tick", token, price, volume, time.time() if ts is None else ts))
+
+    def has_token(self, token: str) -> bool:
+        return token in self._token_counts
+
+    def tokens(self) -> List[str]:
+        return list(self._token_counts)
+
+    def get_stats(self) -> dict:
+        per_shard = [0] * self.shards
+        for token, count in self._token_counts.items():
+            per_shard[shard_of(token, self.shards)] += count
+        return {
+            **self._stats,
+            "shards": self.shards,
+            "alive": sum(p.is_alive() for p in self._processes),
+            "alerts_per_shard": per_shard,
+        }
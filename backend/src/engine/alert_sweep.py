@@ -0,0 +1,147 @@
+"""
+Vectorized Alert Sweep
+======================
+Columnar copy of the active price alerts for evaluating all of them at
+once with NumPy: on the REST fallback path, and to catch up after the live
+feed was down (or the server was) and ticks were missed.
+
+Alerts are rows of three columns - token id, operator code, threshold -
+plus an active flag. A sweep broadcasts a per-token price vector onto the
+rows and compares it with the thresholds, giving a boolean mask of
+triggered rows. Tokens without a price are NaN and never trigger.
+
+Usage:
+    columns = AlertColumns()
+    columns.add("a1b2c3d4", "BTC", ">=", 100000.0)
+    triggered_ids = columns.sweep({"BTC": 100250.0})
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Operator codes stored in the ops column
+OP_CODES = {">": 0, ">=": 1, "<": 2, "<=": 3}
+GT, GE, LT, LE = range(4)
+
+
+class AlertColumns:
+    """
+    Active alerts as NumPy columns, with O(1) add/remove (freed rows are
+    reused).
+
+    Args:
+        capacity: Initial number of rows
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.token_ids = np.zeros(capacity, dtype=np.int32)
+        self.ops = np.zeros(capacity, dtype=np.int8)
+        self.thresholds = np.zeros(capacity, dtype=np.float64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.alert_ids: List[Optional[str]] = [None] * capacity
+        self._row_of: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self._token_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return alert_id in self._row_of
+
+    def _token_id(self, token: str) -> int:
+        token_id = self._token_index.get(token)
+        if token_id is None:
+            token_id = self._token_index[token] = len(self._token_index)
+        return token_id
+
+    def _grow(self, needed: int):
+        capacity = len(self.active)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ("token_ids", "ops", "thresholds", "active"):
+            column = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:capacity] = column
+            setattr(self, name, grown)
+        self.alert_ids.extend([None] * (new_capacity - capacity))
+
+    def add(self, alert_id: str, token: str, operator: str, threshold: float):
+        """Add an active alert row."""
+        if alert_id in self._row_of:
+            self.remove(alert_id)
+        if self._free:
+            row = self._free.pop()
+        else:
+            self._grow(self._size + 1)
+            row = self._size
+            self._size += 1
+        self.token_ids[row] = self._token_id(token)
+        self.ops[row] = OP_CODES[operator]
+        self.thresholds[row] = threshold
+        self.active[row] = True
+        self.alert_ids[row] = alert_id
+        self._row_of[alert_id] = row
+
+    def add_many(self, token: str, entries: Iterable[Tuple[str, str, float]]):
+        """Append many (alert id, operator, threshold) rows for one token at once."""
+        entries = [e for e in entries if e[0] not in self._row_of]
+        if not entries:
+            return
+        start = self._size
+        end = start + len(entries)
+        self._grow(end)
+        ids, operators, thresholds = zip(*entries)
+        self.token_ids[start:end] = self._token_id(token)
+        self.ops[start:end] = [OP_CODES[op] for op in operators]
+        self.thresholds[start:end] = thresholds
+        self.active[start:end] = True
+        self.alert_ids[start:end] = ids
+        self._row_of.update(zip(ids, range(start, end)))
+        self._size = end
+
+    def remove(self, alert_id: str) -> bool:
+        """Deactivate an alert row (triggered or cancelled)."""
+        row = self._row_of.pop(alert_id, None)
+        if row is None:
+            return False
+        self.active[row] = False
+        self.alert_ids[row] = None
+        self._free.append(row)
+        return True
+
+    def sweep(self, prices: Dict[str, float]) -> List[str]:
+        """
+        Find every active alert triggered at the given prices.
+
+        Args:
+            prices: Token -> price (tokens missing here are skipped)
+
+        Returns:
+            Ids of the triggered alerts (not removed; callers remove them)
+        """
+        n = self._size
+        if not n or not prices:
+            return []
+
+        price_vector = np.full(len(self._token_index), np.nan)
+        for token, price in prices.items():
+            token_id = self._token_index.get(token)
+            if token_id is not None and price is not None:
+                price_vector[token_id] = price
+
+        price = price_vector[self.token_ids[:n]]
+        threshold = self.thresholds[:n]
+        ops = self.ops[:n]
+        with np.errstate(invalid="ignore"):
+            mask = (
+                ((ops == GT) & (price > threshold))
+                | ((ops == GE) & (price >= threshold))
+                | ((ops == LT) & (price < threshold))
+                | ((ops == LE) & (price <= threshold))
+            )
+        mask &= self.active[:n]
+        return [self.alert_ids[row] for row in np.flatnonzero(mask)]
@@ -0,0 +1,108 @@
+"""
+Order Trigger Book
+==================
+Index of pending conditional orders by token and trigger price, so a
+price tick fills exactly the orders it crosses.
+
+- "<", "<=", ">", ">=" orders live in the per-token threshold heaps of
+  AlertIndex (O(log n + k) per tick for k filled orders)
+- "==" orders (filled within EQUAL_TOLERANCE of the target) live in a
+  per-token sorted list of targets; a tick bisects to the band
+  [price - tolerance, price + tolerance]
+
+Usage:
+    book = OrderTriggerBook()
+    book.add("a1b2c3d4", "APT", "<=", 7.0)
+    for trade_id in book.pop_triggered("APT", 6.95):
+        ...
+"""
+
+import math
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from src.engine.alert_index import OPERATORS, AlertIndex
+
+# "==" conditions match within this absolute price distance
+EQUAL_TOLERANCE = 0.01
+
+
+class OrderTriggerBook:
+    """Pending orders indexed per token by trigger price."""
+
+    def __init__(self):
+        self._thresholds = AlertIndex()
+        self._equal: Dict[str, List[Tuple[float, str]]] = {}
+        self._equal_token_of: Dict[str, Tuple[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._thresholds) + len(self._equal_token_of)
+
+    def __contains__(self, trade_id: str) -> bool:
+        return trade_id in self._thresholds or trade_id in self._equal_token_of
+
+    def tokens(self) -> List[str]:
+        """Tokens with at least one pending order."""
+        return list(set(self._thresholds.tokens()) | set(self._equal))
+
+    def has_token(self, token: str) -> bool:
+        return self._thresholds.has_token(token) or token in self._equal
+
+    def add(self, trade_id: str, token: str, operator: str, target: float):
+        """
+        Index a pending order.
+
+        Raises:
+            ValueError: Unknown operator
+        """
+        self.remove(trade_id)
+        if operator == "==":
+            entry = (float(target), trade_id)
+            insort(self._equal.setdefault(token, []), entry)
+            self._equal_token_of[trade_id] = (token, entry[0])
+        elif operator in OPERATORS:
+            self._thresholds.add(trade_id, token, operator, target)
+        else:
+            raise ValueError(f"Invalid operator: {operator}")
+
+    def remove(self, trade_id: str) -> bool:
+        """Drop an order (cancelled)."""
+        if self._thresholds.remove(trade_id):
+            return True
+        located = self._equal_token_of.pop(trade_id, None)
+        if located is None:
+            return False
+        token, target = located
+        entries = self._equal[token]
+        i = bisect_left(entries, (target, trade_id))
+        if i < len(entries) and entries[i] == (target, trade_id):
+            del entries[i]
+        if not entries:
+            del self._equal[token]
+        return True
+
+    def pop_triggered(self, token: str, price: float) -> List[str]:
+        """Remove and return the ids of every order on `token` triggered at `price`."""
+        triggered = self._thresholds.pop_crossed(token, price)
+
+        entries = self._equal.get(token)
+        if entries:
+            # Widen the bisect bounds by one ulp; the exact check decides
+            lo = bisect_left(entries, (math.nextafter(price - EQUAL_TOLERANCE, -math.inf),))
+            hi = bisect_left(entries, (math.nextafter(price + EQUAL_TOLERANCE, math.inf),))
+            keep = []
+            for target, trade_id in entries[lo:hi]:
+                if abs(price - target) < EQUAL_TOLERANCE:
+                    triggered.append(trade_id)
+                    del self._equal_token_of[trade_id]
+                else:
+                    keep.append((target, trade_id))
+            entries[lo:hi] = keep
+            if not entries:
+                del self._equal[token]
+
+        return triggered
+
+    def token_of(self, trade_id: str) -> Optional[str]:
+        located = self._equal_token_of.get(trade_id)
+        return located[0] if located else self._thresholds.token_of(trade_id)
@@ -0,0 +1,279 @@
+"""
+Swap Quote Engine
+=================
+Python mirror of the quote math in contracts/sources/swap_router.move,
+in exact integer arithmetic, so simulated trades and risk warnings quote
+what the router would return on chain.
+
+- Amounts are u64 base units (8 decimals, octas for APT), as in the
+  contract; to_base_units / from_base_units convert token amounts.
+- Division floors like Move's u64 division, and any intermediate value
+  above U64_MAX raises SwapAbort, where the Move call would abort with an
+  arithmetic error.
+- quote_ladder() prices a whole array of amounts in one vectorized NumPy
+  call (uint64, with overflow masked out up front, so results stay exact).
+
+The router is a template: it swaps at a fixed simulated rate
+(1 APT = 8.50 USDC) less a 0.3% fee, and reports price impact as a step
+function of trade size rather than from pool reserves. This module mirrors
+that exactly.
+
+Usage:
+    amount_out = get_amount_out(to_base_units(12.5))      # APT -> USDC
+    ladder = quote_ladder([10**8, 10**10, 10**12])
+    ladder["amount_out"], ladder["price_impact_bps"], ladder["aborted"]
+"""
+
+from typing import Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+U64_MAX = 2 ** 64 - 1
+
+# Base units per token (8 decimals)
+DECIMALS = 8
+UNITS_PER_TOKEN = 10 ** DECIMALS
+
+# Token the router quotes (APT -> USDC)
+ROUTER_TOKEN = "APT"
+
+# calculate_output / calculate_input constants
+RATE = 850                      # 8.50 with 2 decimals
+RATE_SCALE = 100
+FEE_NUMERATOR = 997             # 0.3% fee
+FEE_DENOMINATOR = 1000
+
+# get_price_impact tiers: (amount_in below, impact in basis points)
+PRICE_IMPACT_TIERS = (
+    (1000 * UNITS_PER_TOKEN, 10),    # < 1000 APT: 0.1%
+    (10000 * UNITS_PER_TOKEN, 50),   # < 10000 APT: 0.5%
+)
+MAX_PRICE_IMPACT_BPS = 100           # 1%
+
+# Error codes (swap_router.move)
+E_INSUFFICIENT_OUTPUT = 1
+E_INVALID_PATH = 2
+E_DEADLINE_EXCEEDED = 3
+E_ZERO_AMOUNT = 4
+
+# Largest inputs whose intermediate products fit in a u64
+MAX_OUTPUT_INPUT = U64_MAX // (RATE * FEE_NUMERATOR)
+MAX_INPUT_OUTPUT = U64_MAX // (RATE_SCALE * FEE_NUMERATOR)
+MAX_FEE_INPUT = U64_MAX // FEE_NUMERATOR
+
+
+class SwapAbort(ValueError):
+    """
+    A quote the router would abort on.
+
+    Attributes:
+        code: Router error code, or None for an arithmetic (u64 overflow) abort
+    """
+
+    def __init__(self, message: str, code: Union[int, None] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def _check_u64(amount: int, name: str):
+    if not isinstance(amount, (int, np.integer)) or isinstance(amount, bool):
+        raise TypeError(f"{name} must be an integer number of base units")
+    if amount < 0 or amount > U64_MAX:
+        raise SwapAbort(f"{name} {amount} is not a u64")
+
+
+def to_base_units(amount: float) -> int:
+    """Token amount to u64 base units (floored)."""
+    units = int(amount * UNITS_PER_TOKEN)
+    _check_u64(units, "amount")
+    return units
+
+
+def from_base_units(units: int) -> float:
+    """u64 base units to a token amount."""
+    return units / UNITS_PER_TOKEN
+
+
+# ==========================================
+# ROUTER MATH (one amount)
+# ==========================================
+
+def calculate_output(amount_in: int) -> int:
+    """(amount_in * 850 * 997) / (100 * 1000), aborting on u64 overflow."""
+    _check_u64(amount_in, "amount_in")
+    if amount_in > MAX_OUTPUT_INPUT:
+        raise SwapAbort(f"amount_in {amount_in} overflows u64 in calculate_output")
+    return amount_in * RATE * FEE_NUMERATOR // (RATE_SCALE * FEE_DENOMINATOR)
+
+
+def calculate_input(amount_out: int) -> int:
+    """(amount_out * 100 * 997) / (850 * 1000) + 1, aborting on u64 overflow."""
+    _check_u64(amount_out, "amount_out")
+    if amount_out > MAX_INPUT_OUTPUT:
+        raise SwapAbort(f"amount_out {amount_out} overflows u64 in calculate_input")
+    return amount_out * RATE_SCALE * FEE_NUMERATOR // (RATE * FEE_DENOMINATOR) + 1
+
+
+def get_amount_out(amount_in: int) -> int:
+    """Expected output for `amount_in` (view function get_amount_out)."""
+    return calculate_output(amount_in)
+
+
+def get_amount_in(amount_out: int) -> int:
+    """Input needed for `amount_out` (view function get_amount_in)."""
+    return calculate_input(amount_out)
+
+
+def get_price_impact(amount_in: int) -> int:
+    """Price impact in basis points (view function get_price_impact)."""
+    _check_u64(amount_in, "amount_in")
+    for below, bps in PRICE_IMPACT_TIERS:
+        if amount_in < below:
+            return bps
+    return MAX_PRICE_IMPACT_BPS
+
+
+def apply_fee(amount: int) -> int:
+    """The router's 0.3% fee on its own: amount * 997 / 1000."""
+    _check_u64(amount, "amount")
+    if amount > MAX_FEE_INPUT:
+        raise SwapAbort(f"amount {amount} overflows u64 in the fee calculation")
+    return amount * FEE_NUMERATOR // FEE_DENOMINATOR
+
+
+# ==========================================
+# ENTRY FUNCTION CHECKS
+# ==========================================
+
+def swap_exact_input(amount_in: int, min_amount_out: int = 0) -> int:
+    """
+    Output of swap_exact_input (APT -> USDC).
+
+    Raises:
+        SwapAbort: E_ZERO_AMOUNT, E_INSUFFICIENT_OUTPUT or u64 overflow
+    """
+    if amount_in == 0:
+        raise SwapAbort("amount_in must be positive", E_ZERO_AMOUNT)
+    amount_out = calculate_output(amount_in)
+    if amount_out < min_amount_out:
+        raise SwapAbort(f"Output {amount_out} below minimum {min_amount_out}", E_INSUFFICIENT_OUTPUT)
+    return amount_out
+
+
+def swap_exact_output(amount_out: int, max_amount_in: int = U64_MAX) -> int:
+    """
+    Input taken by swap_exact_output (APT -> USDC).
+
+    Raises:
+        SwapAbort: E_ZERO_AMOUNT, E_INSUFFICIENT_OUTPUT or u64 overflow
+    """
+    if amount_out == 0:
+        raise SwapAbort("amount_out must be positive", E_ZERO_AMOUNT)
+    amount_in = calculate_input(amount_out)
+    if amount_in > max_amount_in:
+        raise SwapAbort(f"Input {amount_in} above maximum {max_amount_in}", E_INSUFFICIENT_OUTPUT)
+    return amount_in
+
+
+def swap_multi_hop(amount_in: int, min_amount_out: int = 0) -> int:
+    """
+    Output of swap_multi_hop (APT -> USDC -> USDT, calculate_output twice).
+
+    Raises:
+        SwapAbort: E_ZERO_AMOUNT, E_INSUFFICIENT_OUTPUT or u64 overflow
+    """
+    if amount_in == 0:
+        raise SwapAbort("amount_in must be positive", E_ZERO_AMOUNT)
+    amount_out = calculate_output(calculate_output(amount_in))
+    if amount_out < min_amount_out:
+        raise SwapAbort(f"Output {amount_out} below minimum {min_amount_out}", E_INSUFFICIENT_OUTPUT)
+    return amount_out
+
+
+# ==========================================
+# LADDER (many amounts, vectorized)
+# ==========================================
+
+def _as_u64(amounts: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Amounts as a uint64 array plus a mask of those that are valid u64s
+    (invalid entries are zeroed).
+
+    Raises:
+        TypeError: Non-integer amounts
+    """
+    if isinstance(amounts, np.ndarray):
+        raw = amounts
+    else:
+        amounts = list(amounts)
+        raw = np.asarray(amounts)
+        if raw.dtype.kind not in "iu":
+            # Mixed signs past int64, or ints past uint64: keep exact values
+            raw = np.array(amounts, dtype=object)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    kind = raw.dtype.kind
+    if kind == "u":
+        return raw.astype(np.uint64), np.ones(raw.shape, dtype=bool)
+    if kind == "i":
+        valid = raw >= 0
+        return np.where(valid, raw, 0).astype(np.uint64), valid
+    if kind == "O":
+        # Python ints beyond int64/uint64
+        if not all(isinstance(a, int) and not isinstance(a, bool) for a in raw.flat):
+            raise TypeError("amounts must be integers (base units)")
+        valid = np.array([0 <= a <= U64_MAX for a in raw.flat], dtype=bool).reshape(raw.shape)
+        return np.where(valid, raw, 0).astype(np.uint64), valid
+    raise TypeError("amounts must be integers (base units)")
+
+
+def quote_ladder(amounts_in: Iterable[int], hops: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Quote many input amounts at once.
+
+    Every entry equals the single-amount functions: amount_out is
+    get_amount_out (applied `hops` times, as swap_multi_hop does for 2),
+    amount_in is get_amount_in of that output, price_impact_bps is
+    get_price_impact. Entries the router would abort on (negative, above
+    U64_MAX or overflowing an intermediate) are flagged in `aborted` and
+    quoted as 0.
+
+    Args:
+        amounts_in: Input amounts in base units
+        hops: calculate_output applications (1 = swap_exact_input,
+              2 = swap_multi_hop)
+
+    Returns:
+        {"amount_in", "amount_out", "required_in", "price_impact_bps",
+         "aborted"} arrays (uint64, bool for aborted); required_in is the
+        input get_amount_in asks for the quoted output
+    """
+    if hops < 1:
+        raise ValueError("hops must be at least 1")
+    amounts, valid = _as_u64(amounts_in)
+
+    ok = valid.copy()
+    out = amounts
+    for _ in range(hops):
+        ok &= out <= MAX_OUTPUT_INPUT
+        safe = np.where(ok, out, np.uint64(0))
+        out = safe * np.uint64(RATE * FEE_NUMERATOR) // np.uint64(RATE_SCALE * FEE_DENOMINATOR)
+
+    required_ok = ok & (out <= MAX_INPUT_OUTPUT)
+    safe_out = np.where(required_ok, out, np.uint64(0))
+    required_in = safe_out * np.uint64(RATE_SCALE * FEE_NUMERATOR) // np.uint64(RATE * FEE_DENOMINATOR) + np.uint64(1)
+    required_in = np.where(required_ok, required_in, np.uint64(0))
+
+    impact = np.full(amounts.shape, MAX_PRICE_IMPACT_BPS, dtype=np.uint64)
+    for below, bps in reversed(PRICE_IMPACT_TIERS):
+        impact[amounts < below] = bps
+    impact[~valid] = 0
+
+    return {
+        "amount_in": amounts,
+        "amount_out": np.where(ok, out, np.uint64(0)),
+        "required_in": required_in,
+        "price_impact_bps": impact,
+        "aborted": ~ok,
+    }
+
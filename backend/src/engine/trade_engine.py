@@ -8,25 +8,40 @@ simulated execution results.
 Features:
 - Price staleness protection (rejects if price moved too much)
 - Real-time price from WebSocket cache
-- Conditional order support
+- Conditional order support: pending orders are indexed by token and
+  trigger price (engine/order_triggers.py) and filled on live ticks at the
+  tick price, with a batched REST check as fallback
+- Pending trades are journaled (database/trade_journal.py) and restored
+  on startup
+- APT fills are quoted with the swap router's integer math
+  (engine/swap_quote.py): its 0.3% fee and price impact tier; other
+  tokens fill at market with no impact estimate
 
 Note: This is a SIMULATION only - no actual blockchain transactions occur.
 """
 
+import asyncio
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, validator
 from enum import Enum
 import uuid
 
-from src.api.price import get_token_price
-
-# Try to use real-time prices if available
-try:
-    from src.api.websocket_price import get_price_service
-    USE_REALTIME_PRICES = True
-except ImportError:
-    USE_REALTIME_PRICES = False
+from src.api.price_resolver import resolve_price, resolve_prices
+from src.api.websocket_price import PriceData
+from src.database.trade_journal import get_trade_journal
+from src.engine.order_triggers import OrderTriggerBook
+from src.engine.swap_quote import (
+    FEE_DENOMINATOR,
+    FEE_NUMERATOR,
+    ROUTER_TOKEN,
+    SwapAbort,
+    apply_fee,
+    from_base_units,
+    get_price_impact,
+    to_base_units,
+)
 
 
 class TradeStatus(str, Enum):
@@ -73,6 +88,7 @@ class TradeResult(BaseModel):
     expectedPrice: Optional[float] = None
     priceDeviation: Optional[float] = None  # Percentage price moved
     tokensReceived: Optional[float] = None
+    priceImpactBps: Optional[int] = None  # Swap router price impact (APT only)
     timestamp: datetime
     reason: Optional[str] = None
 
@@ -80,16 +96,51 @@ class TradeResult(BaseModel):
 # In-memory storage for pending trades
 pending_trades: dict[str, TradeRequest] = {}
 
+# Pending trades' trigger prices indexed per token
+order_book = OrderTriggerBook()
+
 
 async def get_current_price(token: str) -> Optional[float]:
-    """Get current price, preferring real-time WebSocket cache."""
-    if USE_REALTIME_PRICES:
-        service = get_price_service()
-        price = service.get_price(token)
-        if price is not None:
-            return price
-    # Fallback to REST API
-    return await get_token_price(token)
+    """Get current price via the shared resolver (live tick, cache, then REST)."""
+    return await resolve_price(token)
+
+
+def get_price_check_token(trade: TradeRequest) -> str:
+    """Get the token whose price drives a trade's condition."""
+    if trade.action == "sell":
+        return trade.tokenFrom
+    # buy and swap are priced on the token being acquired
+    return trade.tokenTo
+
+
+def quote_fill(trade: TradeRequest, current_price: float) -> tuple[float, Optional[int]]:
+    """
+    Quote a simulated fill at market price.
+    
+    The swap router only models APT/USDC, so only APT trades get its terms:
+    the APT quantity (amountUsd / price, in octas) sets the price impact
+    tier and the amount received is net of the 0.3% fee. Other tokens, and
+    APT amounts outside the router's u64 range, fill at market as before
+    with no impact estimate.
+    
+    Returns:
+        (tokens received - USD for sells, price impact in basis points or None)
+    """
+    quantity = trade.amountUsd / current_price
+    received = trade.amountUsd if trade.action == "sell" else quantity
+    if get_price_check_token(trade).upper() != ROUTER_TOKEN:
+        return received, None
+    try:
+        octas = to_base_units(quantity)
+        price_impact = get_price_impact(octas)
+        if trade.action == "sell":
+            # Receiving USD equivalent, net of the fee
+            received = trade.amountUsd * FEE_NUMERATOR / FEE_DENOMINATOR
+        else:  # buy, swap
+            received = from_base_units(apply_fee(octas))
+    except SwapAbort:
+        return received, None
+    return received, price_impact
 
 
 def check_price_staleness(
@@ -177,12 +228,7 @@ async def execute_trade(trade: TradeRequest) -> TradeResult:
     timestamp = datetime.utcnow()
     
     # Determine which token price to check for condition
-    if trade.action == "buy":
-        price_check_token = trade.tokenTo
-    elif trade.action == "sell":
-        price_check_token = trade.tokenFrom
-    else:  # swap
-        price_check_token = trade.tokenTo
+    price_check_token = get_price_check_token(trade)
     
     # Fetch current price (prefer real-time WebSocket)
     current_price = await get_current_price(price_check_token)
@@ -234,13 +280,7 @@ async def execute_trade(trade: TradeRequest) -> TradeResult:
     
     if condition_met:
         # Simulate execution
-        # Calculate tokens received (simplified: amount / price)
-        if trade.action == "buy":
-            tokens_received = trade.amountUsd / current_price
-        elif trade.action == "sell":
-            tokens_received = trade.amountUsd  # Receiving USD equivalent
-        else:  # swap
-            tokens_received = trade.amountUsd / current_price
+        tokens_received, price_impact = quote_fill(trade, current_price)
         
         # Calculate actual deviation if expected price was provided
         deviation = None
@@ -258,12 +298,26 @@ async def execute_trade(trade: TradeRequest) -> TradeResult:
             expectedPrice=trade.expectedPrice,
             priceDeviation=round(deviation, 2) if deviation else None,
             tokensReceived=round(tokens_received, 8),
+            priceImpactBps=price_impact,
             timestamp=timestamp,
             reason=None
         )
     else:
-        # Condition not met - store as pending
-        pending_trades[trade_id] = trade
+        # Condition not met - store as pending (durably, before answering)
+        try:
+            await add_pending_trade(trade_id, trade)
+        except Exception as e:
+            return TradeResult(
+                trade_id=trade_id,
+                status=TradeStatus.FAILED,
+                action=trade.action,
+                tokenFrom=trade.tokenFrom,
+                tokenTo=trade.tokenTo,
+                amountUsd=trade.amountUsd,
+                executedPrice=current_price,
+                timestamp=timestamp,
+                reason=f"Could not record pending trade: {e}"
+            )
         
         condition_desc = f"{trade.conditions.operator} ${trade.conditions.value}"
         
@@ -280,64 +334,115 @@ async def execute_trade(trade: TradeRequest) -> TradeResult:
         )
 
 
-async def check_pending_trades() -> list[TradeResult]:
+def _journal(record: dict) -> Optional[Future]:
     """
-    Check all pending trades and execute any whose conditions are now met.
-    Called periodically by the background worker.
+    Append to the trade journal if it was started (None if it never was).
+    
+    Raises:
+        RuntimeError: The journal stopped on an error
+    """
+    journal = get_trade_journal()
+    if not journal.running and journal.error is None:
+        return None
+    return journal.append(record)
+
+
+def _journal_best_effort(record: dict):
+    """Journal a fill or cancel that has already happened in memory."""
+    try:
+        _journal(record)
+    except RuntimeError as e:
+        print(f"⚠️ {record['op'].capitalize()} of trade {record['id']} not journaled: {e}")
+
+
+async def add_pending_trade(trade_id: str, trade: TradeRequest):
+    """
+    Store a pending trade: journal it, then index its trigger price once
+    the record is durable (so a failed commit leaves nothing behind).
+    
+    Raises:
+        Exception: The journal failed or could not commit the record
+    """
+    committed = _journal({"op": "create", "id": trade_id, "trade": trade.model_dump(mode="json")})
+    if committed is not None:
+        await asyncio.wrap_future(committed)
+    _index_pending_trade(trade_id, trade)
+
+
+def _index_pending_trade(trade_id: str, trade: TradeRequest):
+    pending_trades[trade_id] = trade
+    condition = trade.conditions
+    # Conditions that can never be met stay pending without being indexed
+    if condition.type == "price_trigger" and condition.operator is not None and condition.value is not None:
+        try:
+            order_book.add(trade_id, get_price_check_token(trade).upper(), condition.operator, condition.value)
+        except ValueError:
+            pass
+
+
+def _fill_pending_trade(trade_id: str, current_price: float) -> TradeResult:
+    """Execute a triggered pending trade at the given price and remove it."""
+    trade = pending_trades.pop(trade_id)
+    _journal_best_effort({"op": "fill", "id": trade_id, "price": current_price})
+    tokens_received, price_impact = quote_fill(trade, current_price)
+    
+    print(f"🎯 Pending trade {trade_id} EXECUTED at ${current_price:.4f}")
+    return TradeResult(
+        trade_id=trade_id,
+        status=TradeStatus.EXECUTED,
+        action=trade.action,
+        tokenFrom=trade.tokenFrom,
+        tokenTo=trade.tokenTo,
+        amountUsd=trade.amountUsd,
+        executedPrice=current_price,
+        tokensReceived=round(tokens_received, 8),
+        priceImpactBps=price_impact,
+        timestamp=datetime.utcnow(),
+        reason="Pending trade condition met"
+    )
+
+
+def fill_triggered_trades(token: str, current_price: float) -> list[TradeResult]:
+    """
+    Execute every pending trade on `token` whose condition holds at
+    `current_price`. Only the crossed orders are visited (O(log n + k)).
     
     Returns:
         List of TradeResults for trades that were executed
     """
-    executed_trades = []
-    trades_to_remove = []
+    return [
+        _fill_pending_trade(trade_id, current_price)
+        for trade_id in order_book.pop_triggered(token.upper(), current_price)
+    ]
+
+
+async def on_price_tick(symbol: str, price_data: PriceData):
+    """RealTimePriceService callback: fill pending trades crossed by the tick."""
+    if order_book.has_token(symbol):
+        fill_triggered_trades(symbol, price_data.price)
+
+
+async def check_pending_trades() -> list[TradeResult]:
+    """
+    Check pending trades against resolved prices and execute any whose
+    conditions are now met. Called periodically by the background worker
+    as a fallback for ticks (the resolver serves fresh live prices without
+    a request).
     
-    for trade_id, trade in pending_trades.items():
-        # Determine price check token
-        if trade.action == "buy":
-            price_check_token = trade.tokenTo
-        elif trade.action == "sell":
-            price_check_token = trade.tokenFrom
-        else:
-            price_check_token = trade.tokenTo
-        
-        # Fetch current price
-        current_price = await get_token_price(price_check_token)
-        
-        if current_price is None:
-            continue
-        
-        # Check if condition is now met
-        if evaluate_condition(trade.conditions, current_price):
-            # Execute the trade
-            if trade.action == "buy":
-                tokens_received = trade.amountUsd / current_price
-            elif trade.action == "sell":
-                tokens_received = trade.amountUsd
-            else:
-                tokens_received = trade.amountUsd / current_price
-            
-            result = TradeResult(
-                trade_id=trade_id,
-                status=TradeStatus.EXECUTED,
-                action=trade.action,
-                tokenFrom=trade.tokenFrom,
-                tokenTo=trade.tokenTo,
-                amountUsd=trade.amountUsd,
-                executedPrice=current_price,
-                tokensReceived=round(tokens_received, 8),
-                timestamp=datetime.utcnow(),
-                reason="Pending trade condition met"
-            )
-            
-            executed_trades.append(result)
-            trades_to_remove.append(trade_id)
-            
-            print(f"🎯 Pending trade {trade_id} EXECUTED at ${current_price:.4f}")
+    Returns:
+        List of TradeResults for trades that were executed
+    """
+    tokens = order_book.tokens()
+    if not tokens:
+        return []
     
-    # Remove executed trades from pending
-    for trade_id in trades_to_remove:
-        del pending_trades[trade_id]
+    # Resolve every trigger token in one batch
+    prices = await resolve_prices(tokens)
     
+    executed_trades = []
+    for token, current_price in prices.items():
+        if current_price is not None:
+            executed_trades += fill_triggered_trades(token, current_price)
     return executed_trades
 
 
@@ -358,5 +463,32 @@ def cancel_pending_trade(trade_id: str) -> bool:
     """
     if trade_id in pending_trades:
         del pending_trades[trade_id]
+        order_book.remove(trade_id)
+        _journal_best_effort({"op": "cancel", "id": trade_id})
         return True
     return False
+
+
+def load_pending_trades() -> int:
+    """
+    Replay the trade journal into the pending trades and trigger index,
+    then start journaling.
+    
+    Returns:
+        Number of pending trades restored
+    """
+    journal = get_trade_journal()
+    if journal.running:
+        return 0
+    restored = 0
+    for trade_id, data in journal.replay().items():
+        if trade_id not in pending_trades:
+            _index_pending_trade(trade_id, TradeRequest.model_validate(data))
+            restored += 1
+    journal.start()
+    return restored
+
+
+def close_trade_journal():
+    """Commit queued journal records and stop journaling."""
+    get_trade_journal().close()
@@ -13,10 +13,13 @@ Endpoints:
     POST /ai/parse         - Parse natural language trading instructions
     GET  /ai/stream        - SSE stream for live AI updates
     POST /trade/execute    - Execute a parsed trade (simulated)
+    POST /trade/quote      - Quote a ladder of amounts with the swap router math
     GET  /price/{token}    - Get real-time token price
     GET  /prices/stream    - SSE stream for live price updates
     POST /alerts           - Create a price alert
-    GET  /alerts           - List all alerts
+    GET  /alerts           - List the session user's alerts (cursor paginated)
+    GET  /alerts/stream    - SSE stream of triggered alerts
+    WS   /ws/alerts        - WebSocket stream of triggered alerts
     DELETE /alerts/{id}    - Cancel/delete an alert
     POST /auth/login       - Login with wallet
     POST /auth/logout      - Logout and invalidate session
@@ -32,9 +35,9 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional, AsyncGenerator, List
 
-from fastapi import FastAPI, HTTPException, Request, Header, Depends
+from fastapi import FastAPI, HTTPException, Request, Header, Depends, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -44,7 +47,14 @@ load_dotenv()
 # Import our modules
 from src.ai.parser import parse_user_request, parse_user_request_mock, chat_with_ai
 from src.ai.agent import process_message as ai_agent_process
-from src.api.price import get_token_price, get_token_info, get_supported_tokens, get_multiple_prices
+from src.api.price import get_token_info, get_supported_tokens, token_info_cache
+from src.api.price_resolver import resolve_price, resolve_prices, get_resolver_stats
+from src.api.resilience import get_upstream_stats
+from src.api.token_registry import get_token_registry, start_registry_refresh, stop_registry_refresh
+from src.api.http_cache import make_etag, etag_matches, not_modified, set_etag
+from src.api.indicators import parse_indicator_spec, check_periods, compute_indicator, indicator_key
+from src.api.screener import start_screener, stop_screener, ensure_screener, query_screener
+from src.api.kline_backfill import start_backfill_scheduler, stop_backfill_scheduler
 from src.api.websocket_price import (
     get_price_service,
     start_price_service,
@@ -52,7 +62,21 @@ from src.api.websocket_price import (
     RealTimePriceService,
     PriceData,
 )
-from src.api.chart_data import get_chart_data
+from src.api.chart_data import (
+    get_chart_series,
+    format_chart_data,
+    format_chart_columnar,
+    encode_chart_binary,
+    downsample_series,
+    downsample_indices,
+    get_indicator_set,
+    iter_chart_series,
+    chart_cache,
+    get_chart_fetch_stats,
+    normalize_days,
+    CHART_BINARY_MEDIA_TYPE,
+    MAX_CHART_POINTS,
+)
 from src.engine.trade_engine import (
     TradeRequest,
     TradeCondition,
@@ -64,16 +88,20 @@ from src.engine.alert_engine import (
     AlertRequest,
     Alert,
     create_alert,
-    get_all_alerts,
-    get_active_alerts,
+    describe_alert,
+    list_alerts,
     get_alert,
+    get_alert_engine_stats,
     cancel_alert,
     delete_alert,
     start_background_worker,
     stop_background_worker,
 )
+from src.engine.alert_delivery import get_alert_delivery
+from src.engine.swap_quote import quote_ladder
 
 # Database and Blockchain imports
+from src.database.candles import get_candle_store
 from src.database.models import (
     create_user,
     get_user_by_address,
@@ -162,6 +190,21 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Trade.apt server starting...")
     
+    # Keep the token registry in sync with CoinGecko/Binance listings
+    start_registry_refresh()
+    print("✅ Token registry refresh scheduled")
+    
+    # Keep popular token market info warm
+    token_info_cache.start_refresher()
+    
+    # Score the whole token universe in the background
+    start_screener()
+    print("✅ Market screener started")
+    
+    # Keep the local candle store topped up from Binance klines
+    if start_backfill_scheduler():
+        print("✅ Kline backfill scheduled")
+    
     # Start real-time price service (Binance WebSocket)
     await start_price_service()
     print("✅ Real-time price service started (Binance WebSocket)")
@@ -177,7 +220,12 @@ async def lifespan(app: FastAPI):
     await stop_price_service()
     print("✅ Real-time price service stopped")
     stop_background_worker()
+    await get_alert_delivery().stop()
     print("✅ Background worker stopped")
+    stop_registry_refresh()
+    token_info_cache.stop_refresher()
+    stop_screener()
+    stop_backfill_scheduler()
 
 
 # ============================================================================
@@ -225,6 +273,36 @@ async def health_check():
     )
 
 
+@app.get("/health/upstreams")
+async def upstream_health():
+    """Circuit breaker state and latency percentiles per price source."""
+    return {
+        "upstreams": get_upstream_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/health/caches")
+async def cache_health():
+    """Hit/miss counters for the price, market info and chart caches, and candle store size."""
+    return {
+        "price_resolver": get_resolver_stats(),
+        "token_info": token_info_cache.get_stats(),
+        "chart": {**chart_cache.get_stats(), **get_chart_fetch_stats()},
+        "candles": get_candle_store().get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/health/alerts")
+async def alert_health():
+    """Alert engine counts, shard workers and alert storage."""
+    return {
+        "engine": get_alert_engine_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 # ----------------------------------------------------------------------------
 # AI Parsing Endpoints
 # ----------------------------------------------------------------------------
@@ -247,18 +325,22 @@ async def parse_trading_instruction(request: ParseRequest):
     try:
         # Fetch real-time prices for context
         top_tokens = ["BTC", "ETH", "APT", "SOL", "BNB", "XRP", "ADA", "DOGE", "AVAX", "DOT"]
-        prices = await get_multiple_prices(top_tokens)
+        prices = await resolve_prices(top_tokens)
         
         # Filter out None values and format prices
         clean_prices = {k: v for k, v in prices.items() if v is not None}
         
+        # Ranked signals from the background screener (no network call)
+        screener = query_screener(limit=5)["results"]
+        
         # Use the new AI agent
         result = await ai_agent_process(
             user_message=request.text,
             prices=clean_prices,
             wallet=None,  # Will be passed from frontend when available
             pending_orders=None,
-            alerts=None
+            alerts=None,
+            screener=screener
         )
         
         # Format response for frontend compatibility
@@ -317,7 +399,8 @@ async def execute_trade_endpoint(trade: TradeRequest):
             "tokenTo": "APT",
             "amountUsd": 20,
             "executedPrice": 6.85,
-            "tokensReceived": 2.91970803,
+            "tokensReceived": 2.91094889,
+            "priceImpactBps": 10,
             "timestamp": "2024-01-15T10:30:00Z"
         }
     
@@ -363,6 +446,42 @@ async def cancel_pending_trade_endpoint(trade_id: str):
     raise HTTPException(status_code=404, detail=f"Trade {trade_id} not found")
 
 
+class QuoteRequest(BaseModel):
+    """Swap router quote request (amounts in 8-decimal base units)."""
+    amounts: List[int]
+    hops: int = 1
+
+
+@app.post("/trade/quote")
+async def quote_trade_endpoint(request: QuoteRequest):
+    """
+    Quote a ladder of input amounts with the swap router's integer math
+    (get_amount_out, get_amount_in, get_price_impact; hops=2 for
+    swap_multi_hop).
+    
+    Example input:
+        {"amounts": [100000000, 500000000000], "hops": 1}
+    
+    Example output:
+        {"quotes": [{"amount_in": 100000000, "amount_out": 847450000,
+                     "required_in": 99400901, "price_impact_bps": 10,
+                     "aborted": false}, ...]}
+    """
+    if not request.amounts or len(request.amounts) > 10000:
+        raise HTTPException(status_code=400, detail="Provide between 1 and 10000 amounts")
+    if request.hops not in (1, 2):
+        raise HTTPException(status_code=400, detail="hops must be 1 or 2")
+    ladder = quote_ladder(request.amounts, request.hops)
+    fields = ("amount_out", "required_in", "price_impact_bps", "aborted")
+    columns = {name: ladder[name].tolist() for name in fields}
+    return {
+        "quotes": [
+            {"amount_in": amount, **{name: columns[name][i] for name in fields}}
+            for i, amount in enumerate(request.amounts)
+        ]
+    }
+
+
 # ----------------------------------------------------------------------------
 # Price Endpoints
 # ----------------------------------------------------------------------------
@@ -387,8 +506,8 @@ async def get_price_endpoint(token: str):
             error=None
         )
     
-    # Fallback to REST API
-    price = await get_token_price(token)
+    # Fallback to the shared resolver (local cache, then REST)
+    price = await resolve_price(token)
     
     return PriceResponse(
         token=token.upper(),
@@ -399,13 +518,26 @@ async def get_price_endpoint(token: str):
 
 
 @app.get("/prices/live")
-async def get_all_live_prices():
+async def get_all_live_prices(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Get all live prices from WebSocket cache.
     Returns real-time prices with metadata.
+    
+    The ETag tracks the price snapshot sequence of this process (and how
+    many prices have gone stale), so polling with If-None-Match gets a 304 until a price
+    actually changes.
     """
     service = get_price_service()
+    etag = make_etag("prices", service.snapshot_epoch, service.snapshot_seq,
+                     service.stale_count(), weak=True)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
     prices = service.get_all_price_data()
+    set_etag(response, etag)
     
     return {
         "prices": {s: p.to_dict() for s, p in prices.items()},
@@ -512,8 +644,17 @@ async def get_token_info_endpoint(token: str):
 
 
 @app.get("/tokens")
-async def get_supported_tokens_endpoint():
-    """Get list of supported tokens."""
+async def get_supported_tokens_endpoint(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+):
+    """Get list of supported tokens (ETag follows the token registry version)."""
+    registry = get_token_registry()
+    etag = make_etag("tokens", registry.version, len(registry))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    set_etag(response, etag)
     tokens = get_supported_tokens()
     return {
         "count": len(tokens),
@@ -526,68 +667,309 @@ async def get_supported_tokens_endpoint():
 # ----------------------------------------------------------------------------
 
 @app.get("/chart/{token}")
-async def get_chart_data_endpoint(token: str, days: int = 7):
+async def get_chart_data_endpoint(
+    token: str,
+    days: int = 7,
+    fmt: str = Query("points", alias="format"),
+    delta: bool = False,
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Get historical OHLC chart data for a token.
     
     Args:
         token: Token symbol (e.g., BTC, ETH, APT)
         days: Number of days of history (1, 7, 30, 90, 365)
+        format: "points" (list of {time, value}) or "columnar"
+            (parallel timestamps/prices/volumes arrays)
+        delta: With format=columnar, delta-encode the timestamps
+        max_points: Downsample to at most this many points (LTTB)
+    
+    Sending "Accept: application/vnd.tradeapt.chart" returns a binary
+    int64/float64 payload instead (see encode_chart_binary).
+    
+    The ETag is derived from the cached series (last point timestamp and
+    fetch time) plus the requested representation; a matching
+    If-None-Match returns 304 without formatting the series.
     
     Returns:
         OHLC data with timestamps for charting
     """
-    if days not in [1, 7, 30, 90, 365]:
-        days = 7  # Default to 7 days if invalid
+    days = normalize_days(days)  # Default to 7 days if invalid
     
-    chart_data = await get_chart_data(token, days)
+    series = await get_chart_series(token, days)
     
-    if not chart_data or "error" in chart_data:
+    if series is None:
         raise HTTPException(
             status_code=404, 
             detail=f"Chart data not found for {token}"
         )
     
-    return chart_data
+    binary = bool(accept and CHART_BINARY_MEDIA_TYPE in accept)
+    variant = "bin" if binary else f"{fmt}{'d' if delta and fmt == 'columnar' else ''}"
+    etag = make_etag(
+        "chart", series.symbol, days, series.last_timestamp, int(series.fetched_at),
+        variant, max_points or 0,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, vary="Accept")
+    
+    series = downsample_series(series, max_points)
+    
+    if binary:
+        response = Response(content=encode_chart_binary(series), media_type=CHART_BINARY_MEDIA_TYPE)
+    elif fmt == "columnar":
+        # Serialize directly; the arrays are already plain JSON types
+        body = json.dumps(format_chart_columnar(series, delta), separators=(",", ":"))
+        response = Response(content=body, media_type="application/json")
+    else:
+        response = Response(
+            content=json.dumps(format_chart_data(series)),
+            media_type="application/json",
+        )
+    
+    set_etag(response, etag, vary="Accept")
+    return response
 
 
 @app.get("/chart/{token}/simple")
-async def get_simple_chart_data_endpoint(token: str, days: int = 7):
+async def get_simple_chart_data_endpoint(
+    token: str,
+    days: int = 7,
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
+):
     """
     Get simplified price history for sparkline charts.
-    Returns just prices without OHLC detail.
+    Returns just prices without OHLC detail, optionally downsampled to
+    max_points with LTTB.
     """
-    chart_data = await get_chart_data(token, days)
+    series = await get_chart_series(token, days)
     
-    if not chart_data or "error" in chart_data:
+    if series is None or not len(series):
         raise HTTPException(
             status_code=404, 
             detail=f"Chart data not found for {token}"
         )
     
-    # Extract just closing prices for simple charts
+    series = downsample_series(series, max_points)
+    prices = series.prices.tolist()
+    
     return {
-        "token": chart_data["token"],
-        "days": days,
-        "prices": chart_data["close"],
-        "timestamps": chart_data["timestamps"],
-        "current_price": chart_data["close"][-1] if chart_data["close"] else None,
+        "token": series.symbol,
+        "days": series.days,
+        "prices": prices,
+        "timestamps": series.timestamps.tolist(),
+        "current_price": prices[-1],
         "price_change_percent": (
-            ((chart_data["close"][-1] - chart_data["close"][0]) / chart_data["close"][0] * 100)
-            if chart_data["close"] and len(chart_data["close"]) > 1
+            ((prices[-1] - prices[0]) / prices[0] * 100)
+            if len(prices) > 1 and prices[0]
             else 0
         )
     }
 
 
+@app.get("/screener")
+async def get_screener_endpoint(
+    action: Optional[str] = None,
+    trend: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    min_volume_ratio: Optional[float] = None,
+    min_market_cap: Optional[float] = None,
+    rsi_below: Optional[float] = None,
+    rsi_above: Optional[float] = None,
+    symbols: Optional[str] = None,
+    sort: str = "score",
+    order: str = "desc",
+    limit: int = Query(20, ge=1, le=500),
+):
+    """
+    Ranked trading signals for the whole token universe.
+    
+    Scores are precomputed by the background screener with the same rules
+    as coin analysis suggestions, so this never waits on per-coin upstream calls.
+    
+    Query params:
+        action: consider_buy, consider_sell or hold
+        trend: bullish, bearish or neutral
+        min_score / max_score: Score bounds (0-100)
+        min_volume_ratio: Minimum 24h volume / market cap (%)
+        min_market_cap: Minimum market cap (USD)
+        rsi_below / rsi_above: RSI(14) bounds
+        symbols: Comma-separated subset of tokens
+        sort: score, price, change_1h, change_24h, change_7d, market_cap,
+            volume_24h, volume_ratio, ath_change or rsi
+        order: desc (default) or asc
+        limit: Maximum results
+    """
+    await ensure_screener()
+    
+    try:
+        return query_screener(
+            action=action,
+            trend=trend,
+            min_score=min_score,
+            max_score=max_score,
+            min_volume_ratio=min_volume_ratio,
+            min_market_cap=min_market_cap,
+            rsi_below=rsi_below,
+            rsi_above=rsi_above,
+            symbols=[s.strip() for s in symbols.split(",") if s.strip()] if symbols else None,
+            sort=sort,
+            descending=order != "asc",
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Maximum symbols per /charts request
+MAX_CHART_SYMBOLS = 50
+
+
+@app.get("/charts")
+async def get_multi_chart_endpoint(
+    symbols: str,
+    days: int = 7,
+    fmt: str = Query("columnar", alias="format"),
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
+):
+    """
+    Get charts for several tokens in one request.
+    
+    Query params:
+        symbols: Comma-separated token symbols (e.g. "BTC,ETH,APT")
+        days: Number of days of history (1, 7, 30, 90, 365)
+        format: "columnar" (default) or "points"
+        max_points: Downsample each chart to at most this many points (LTTB)
+    
+    Streams newline-delimited JSON, one line per symbol:
+        {"token": "BTC", "cached": true, "data": {...}}
+    Cached charts are written first; the rest follow as their upstream
+    fetches complete. Unknown tokens get "data": null.
+    """
+    requested = [s.strip() for s in symbols.split(",") if s.strip()]
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > MAX_CHART_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_CHART_SYMBOLS} symbols per request"
+        )
+    
+    days = normalize_days(days)  # Default to 7 days if invalid
+    
+    async def chart_generator():
+        async for symbol, series, cached in iter_chart_series(requested, days):
+            data = None
+            if series is not None and len(series):
+                series = downsample_series(series, max_points)
+                if fmt == "points":
+                    data = format_chart_data(series)
+                else:
+                    data = format_chart_columnar(series)
+            line = {"token": symbol, "days": days, "cached": cached, "data": data}
+            yield json.dumps(line, separators=(",", ":")) + "\n"
+    
+    return StreamingResponse(
+        chart_generator(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/chart/{token}/indicators")
+async def get_chart_indicators_endpoint(
+    token: str,
+    days: int = 30,
+    indicators: str = "sma,ema,rsi,macd,bbands,atr",
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
+):
+    """
+    Compute technical indicators over a token's chart series.
+    
+    Query params:
+        days: Chart range (1, 7, 30, 90, 365; others fall back to 7)
+        indicators: Comma-separated list (at most 16) with optional
+            ":"-separated parameters, e.g.
+            "sma:50,ema:200,rsi:14,macd:12:26:9,bbands:20:2,atr:14";
+            periods may not exceed the series length
+        max_points: Sample the results at the LTTB-downsampled points
+    
+    Indicators are computed over the full series and cached with it, so
+    several indicators per request share their intermediates. Values
+    inside an indicator's warm-up window are null.
+    """
+    days = normalize_days(days)  # Default to 7 days if invalid
+    
+    try:
+        requested = parse_indicator_spec(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    series = await get_chart_series(token, days)
+    
+    if series is None or not len(series):
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Chart data not found for {token}"
+        )
+    
+    try:
+        check_periods(requested, len(series))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    indicator_set = get_indicator_set(series)
+    idx = downsample_indices(series, max_points)
+    
+    def to_list(values):
+        if idx is not None:
+            values = values[idx]
+        return [None if v != v else v for v in values.tolist()]
+    
+    results = {}
+    for name, params in requested:
+        value = compute_indicator(indicator_set, name, params)
+        if isinstance(value, dict):
+            results[indicator_key(name, params)] = {k: to_list(v) for k, v in value.items()}
+        else:
+            results[indicator_key(name, params)] = to_list(value)
+    
+    timestamps = series.timestamps if idx is None else series.timestamps[idx]
+    
+    return {
+        "token": series.symbol,
+        "days": series.days,
+        "timestamps": timestamps.tolist(),
+        "indicators": results,
+        "data_points": len(timestamps),
+    }
+
+
 # ----------------------------------------------------------------------------
 # Alert Endpoints
 # ----------------------------------------------------------------------------
 
+def _alert_owner(authorization: Optional[str]) -> Optional[int]:
+    """
+    User id behind an optional Bearer session token. Alerts created
+    without a session belong to no user (None).
+    """
+    if not authorization:
+        return None
+    user = validate_session(authorization.replace("Bearer ", ""))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return user.id
+
+
 @app.post("/alerts", response_model=AlertResponse)
-async def create_alert_endpoint(request: AlertRequest):
+async def create_alert_endpoint(request: AlertRequest, authorization: Optional[str] = Header(None)):
     """
-    Create a new price alert.
+    Create a new price alert, owned by the session user.
     
     Example input:
         {
@@ -596,54 +978,214 @@ async def create_alert_endpoint(request: AlertRequest):
             "target_price": 7.0,
             "message": "APT dropped below $7!"
         }
+    
+    Other alert types:
+        {"token": "APT", "alert_type": "percent_move", "percent": 5, "window_seconds": 3600}
+        {"token": "BTC", "alert_type": "cross", "direction": "up", "target_price": 100000,
+         "hysteresis_percent": 0.5, "debounce_seconds": 30}
+        {"token": "ETH", "alert_type": "volume_spike", "multiplier": 3, "window_seconds": 300,
+         "repeat": true, "cooldown_seconds": 3600}
     """
     try:
-        alert = create_alert(request)
+        alert = create_alert(request, _alert_owner(authorization))
         return AlertResponse(
             success=True,
             alert=alert,
-            message=f"Alert created: {alert.token} {alert.operator.value} ${alert.target_price}"
+            message=f"Alert created: {describe_alert(alert)}"
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/alerts")
-async def list_alerts_endpoint(active_only: bool = False):
+async def list_alerts_endpoint(
+    active_only: bool = False,
+    status: Optional[str] = None,
+    token: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    authorization: Optional[str] = Header(None),
+):
     """
-    List all alerts.
+    List the session user's alerts, newest first.
     
     Query params:
         active_only: If true, only return active (not triggered) alerts
+        status: Only this status (active, triggered, cancelled)
+        token: Only alerts on this token
+        cursor: next_cursor from the previous page
+        limit: Page size (max 200)
     """
     if active_only:
-        alerts_list = get_active_alerts()
-    else:
-        alerts_list = get_all_alerts()
+        status = "active"
+    try:
+        alerts_list, next_cursor = list_alerts(_alert_owner(authorization), status, token, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
     
     return {
         "count": len(alerts_list),
-        "alerts": alerts_list
+        "alerts": alerts_list,
+        "next_cursor": next_cursor,
     }
 
 
+def _client_event(event: dict) -> str:
+    """Serialize a delivery event for a client (internal fields dropped)."""
+    return json.dumps({k: v for k, v in event.items() if k != "_queued_at"})
+
+
+@app.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    session: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events (SSE) stream of the session user's triggered alerts.
+    EventSource can't send headers, so the session token may also be passed
+    as ?session=.
+    
+    Each subscriber has its own bounded buffer: a slow client loses its
+    oldest events rather than holding up alert evaluation.
+    
+    Example (JavaScript):
+        const eventSource = new EventSource(`/alerts/stream?session=${token}`);
+        eventSource.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+            if (data.type === 'alert_triggered') console.log(data.alert);
+        };
+    """
+    user_id = _alert_owner(authorization or session)
+    
+    async def alert_generator() -> AsyncGenerator[str, None]:
+        delivery = get_alert_delivery()
+        queue = delivery.subscribe(user_id)
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15.0)
+                    yield f"data: {_client_event(event)}\n\n"
+                    delivery.record_delivered(event)
+                except asyncio.TimeoutError:
+                    yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': datetime.utcnow().isoformat()})}\n\n"
+        finally:
+            delivery.unsubscribe(queue)
+    
+    return StreamingResponse(
+        alert_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.websocket("/ws/alerts")
+async def alerts_websocket(websocket: WebSocket, session: Optional[str] = None):
+    """
+    WebSocket stream of the session user's triggered alerts (same events as
+    /alerts/stream; session token as ?session=).
+    """
+    user_id = None
+    if session:
+        user = validate_session(session)
+        if not user:
+            await websocket.close(code=1008)
+            return
+        user_id = user.id
+    await websocket.accept()
+    delivery = get_alert_delivery()
+    queue = delivery.subscribe(user_id)
+    try:
+        while True:
+            event = await queue.get()
+            await websocket.send_text(_client_event(event))
+            delivery.record_delivered(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        delivery.unsubscribe(queue)
+
+
+class WebhookRequest(BaseModel):
+    """Webhook destination for triggered alerts."""
+    url: str
+
+
+@app.get("/alerts/delivery")
+async def alert_delivery_stats():
+    """Alert delivery queue depths, counters and latency per channel."""
+    return get_alert_delivery().get_stats()
+
+
+def _webhook_owner(authorization: Optional[str]) -> int:
+    """Session user id for webhook management (a session is required)."""
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return _alert_owner(authorization)
+
+
+@app.get("/alerts/webhooks")
+async def list_alert_webhooks(authorization: Optional[str] = Header(None)):
+    """List the session user's webhook destinations with delivery stats."""
+    user_id = _webhook_owner(authorization)
+    return {"webhooks": get_alert_delivery().webhook_stats(user_id)}
+
+
+@app.post("/alerts/webhooks")
+async def add_alert_webhook(request: WebhookRequest, authorization: Optional[str] = Header(None)):
+    """
+    Add a webhook destination for the session user's alerts. Their
+    triggered alerts are POSTed to it in batches as {"alerts": [...]}.
+    The URL must resolve to a public address.
+    """
+    user_id = _webhook_owner(authorization)
+    try:
+        added = await get_alert_delivery().add_webhook(request.url, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": added, "url": request.url}
+
+
+@app.delete("/alerts/webhooks")
+async def remove_alert_webhook(url: str, authorization: Optional[str] = Header(None)):
+    """Remove one of the session user's webhook destinations."""
+    user_id = _webhook_owner(authorization)
+    if not get_alert_delivery().remove_webhook(url, user_id):
+        raise HTTPException(status_code=404, detail=f"Webhook {url} not found")
+    return {"success": True, "url": url}
+
+
 @app.get("/alerts/{alert_id}")
-async def get_alert_endpoint(alert_id: str):
-    """Get a specific alert by ID."""
+async def get_alert_endpoint(alert_id: str, authorization: Optional[str] = Header(None)):
+    """Get a specific alert by ID (only the owner's)."""
     alert = get_alert(alert_id)
-    if not alert:
+    if not alert or alert.user_id != _alert_owner(authorization):
         raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
     return alert
 
 
 @app.delete("/alerts/{alert_id}")
-async def delete_alert_endpoint(alert_id: str, cancel_only: bool = False):
+async def delete_alert_endpoint(
+    alert_id: str,
+    cancel_only: bool = False,
+    authorization: Optional[str] = Header(None),
+):
     """
-    Delete or cancel an alert.
+    Delete or cancel an alert (only the owner's).
     
     Query params:
         cancel_only: If true, just mark as cancelled instead of deleting
     """
+    alert = get_alert(alert_id)
+    if not alert or alert.user_id != _alert_owner(authorization):
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    
     if cancel_only:
         if cancel_alert(alert_id):
             return {"success": True, "message": f"Alert {alert_id} cancelled"}
@@ -784,12 +1326,7 @@ async def get_wallet_balance_endpoint(
         net = AptosNetwork.TESTNET
     
     # Get APT price for USD conversion
-    apt_price = None
-    service = get_price_service()
-    if service:
-        price_data = service.get_price("APT")
-        if price_data:
-            apt_price = price_data.price
+    apt_price = await resolve_price("APT")
     
     balance = await get_wallet_balance(address, net, apt_price)
     
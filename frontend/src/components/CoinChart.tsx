@@ -80,7 +80,7 @@ const CoinChart: React.FC<CoinChartProps> = ({ symbol, onClose }) => {
 
       try {
         const response = await fetch(
-          `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/chart/${symbol}?days=${timeframe}`
+          `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/chart/${symbol}?days=${timeframe}&max_points=500`
         );
 
         if (!response.ok) {